@@ -2,18 +2,39 @@
 API роуты для FastAPI
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Request, Header
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any
+from urllib.parse import quote
+import os
+import json
 import logging
 
 from app.models.converter import (
     ConversionResponse, 
     FormatsResponse, 
     HealthResponse,
-    ConversionOptions
+    StatsResponse,
+    SearchResponse,
+    SearchResult,
+    SimilarResponse,
+    SimilarDocument,
+    DuplicatesResponse,
+    UploadCreateRequest,
+    UploadStatusResponse,
+    UploadChunkResponse,
+    UploadFinalizeRequest,
+    ConversionOptions,
+    BackendsResponse,
+    ReadinessResponse,
+    InspectResponse
 )
 from app.services.converter_service import converter_service
+from app.services.upload_service import upload_service, UploadError
+from app.services.rate_limit import rate_limiter, retry_after, units_for_size
+from app.services.result_store import HTTP_ENCODINGS, accepts_encoding, etag_matches
+from doc_converter.archive import is_archive, TAR_SUFFIXES, ZIP_SUFFIXES
 from app.core.config import settings
 
 # Создаем роутер
@@ -21,6 +42,87 @@ api_router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def build_conversion_response(result, filename: str, output_mode: str = "markdown",
+                              result_id: Optional[str] = None) -> ConversionResponse:
+    """Формирует ответ по результату конвертации"""
+    stored = {"result_id": result_id, "result_url": f"/api/results/{result_id}"} if result_id else {}
+    if isinstance(result, os.PathLike):
+        # Результат больше MAX_INLINE_RESULT_SIZE отдается только файлом по result_url
+        suffix = ".jsonl" if output_mode == "chunks" else ".md"
+        return ConversionResponse(
+            success=True,
+            filename=f"{filename.rsplit('.', 1)[0]}{suffix}",
+            **stored
+        )
+    if result and output_mode == "chunks":
+        return ConversionResponse(
+            success=True,
+            chunks=result,
+            filename=f"{filename.rsplit('.', 1)[0]}.jsonl",
+            **stored
+        )
+    elif result:
+        # Генерируем имя выходного файла
+        output_filename = f"{filename.rsplit('.', 1)[0]}.md"
+        
+        return ConversionResponse(
+            success=True,
+            content=result,
+            filename=output_filename,
+            **stored
+        )
+    else:
+        return ConversionResponse(
+            success=False,
+            error="Не удалось конвертировать файл"
+        )
+
+
+def client_address(request: Request) -> Optional[str]:
+    """Адрес клиента (за доверенным прокси - последний адрес X-Forwarded-For)"""
+    host = request.client.host if request.client else None
+    if host in settings.RATE_LIMIT_TRUSTED_PROXIES:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return host
+
+
+def enforce_rate_limit(request: Request, cost: float) -> None:
+    """
+    Списывает стоимость конвертации из корзины клиента
+    
+    Raises:
+        HTTPException: 429 с Retry-After, если лимит клиента исчерпан
+    """
+    client = rate_limiter.client_key(request.headers.get("x-api-key"), client_address(request))
+    wait = rate_limiter.acquire(client, cost)
+    if wait:
+        logger.info(f"Лимит конвертаций исчерпан: {client}, стоимость {cost}")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Превышен лимит конвертаций. Повторите через {retry_after(wait)} с",
+            headers={"Retry-After": retry_after(wait)}
+        )
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Просит ли клиент секции потоком JSONL (Accept: application/x-ndjson)"""
+    return "application/x-ndjson" in request.headers.get("accept", "")
+
+
+def build_chunks_stream(chunks: List[Dict[str, Any]], filename: str,
+                        result_id: Optional[str] = None) -> StreamingResponse:
+    """Отдает секции потоком JSONL, по строке на секцию"""
+    headers = {
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename.rsplit('.', 1)[0] + '.jsonl')}"
+    }
+    if result_id:
+        headers["X-Result-Url"] = f"/api/results/{result_id}"
+    lines = (json.dumps(chunk, ensure_ascii=False) + "\n" for chunk in chunks)
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
+
+
 @api_router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Проверка состояния сервера"""
@@ -30,6 +132,22 @@ async def health_check():
     )
 
 
+@api_router.get("/ready", response_model=ReadinessResponse,
+                responses={503: {"model": ReadinessResponse}})
+async def readiness_check():
+    """Готовность принимать конвертации (503 пока идет прогрев или сервис перегружен)"""
+    return readiness_response()
+
+
+def readiness_response() -> JSONResponse:
+    """Формирует ответ проверки готовности"""
+    readiness = ReadinessResponse(**converter_service.get_readiness())
+    return JSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content=readiness.model_dump()
+    )
+
+
 @api_router.get("/formats", response_model=FormatsResponse)
 async def get_supported_formats():
     """Получение списка поддерживаемых форматов"""
@@ -41,13 +159,25 @@ async def get_supported_formats():
         raise HTTPException(status_code=500, detail="Ошибка сервера")
 
 
-@api_router.post("/convert", response_model=ConversionResponse)
+@api_router.get("/backends", response_model=BackendsResponse)
+async def get_backends():
+    """Бэкенды конвертации, их возможности и замеры скорости по форматам"""
+    return BackendsResponse(backends=converter_service.get_backends())
+
+
+@api_router.post("/convert", response_model=ConversionResponse,
+                 responses={429: {"description": "Лимит конвертаций клиента исчерпан (Retry-After)"}})
 async def convert_document(
+    request: Request,
     file: UploadFile = File(...),
     preserve_formatting: bool = Form(default=True),
     include_images: bool = Form(default=True),
     max_image_size: int = Form(default=1024),
-    table_format: str = Form(default="grid")
+    table_format: str = Form(default="grid"),
+    output_mode: str = Form(default="markdown"),
+    chunk_max_chars: int = Form(default=2000),
+    chunk_max_tokens: Optional[int] = Form(default=None),
+    backend: Optional[str] = Form(default=None)
 ):
     """Конвертация документа в markdown"""
     try:
@@ -66,45 +196,41 @@ async def convert_document(
                 detail=f"Неподдерживаемый формат файла. Поддерживаемые форматы: {', '.join(settings.ALLOWED_EXTENSIONS)}"
             )
         
-        # Читаем содержимое файла
-        file_content = await file.read()
+        if output_mode not in ("markdown", "chunks"):
+            raise HTTPException(status_code=400, detail="output_mode должен быть markdown или chunks")
+        if chunk_max_chars <= 0 or (chunk_max_tokens is not None and chunk_max_tokens <= 0):
+            raise HTTPException(status_code=400, detail="Размер секции должен быть положительным")
+        
+        # Опции конвертации
+        options = {
+            "preserve_formatting": preserve_formatting,
+            "include_images": include_images,
+            "max_image_size": max_image_size,
+            "table_format": table_format,
+            "output_mode": output_mode
+        }
+        if output_mode == "chunks":
+            options["chunk_max_chars"] = chunk_max_chars
+            options["chunk_max_tokens"] = chunk_max_tokens
+        if backend:
+            options["backend"] = backend
+        try:
+            converter_service.check_options(file.filename, options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Сохраняем файл временно
-        saved_file_path = converter_service.save_uploaded_file(file_content, file.filename)
+        # Лимит клиента списывается по размеру: осмотр документа (inspect)
+        # читает его целиком и стоит дороже самой проверки лимита
+        enforce_rate_limit(request, units_for_size(file.size))
         
-        if not saved_file_path:
-            raise HTTPException(status_code=500, detail="Ошибка при сохранении файла")
+        # Конвертируем в пуле асинхронного конвертера: одинаковые одновременные
+        # загрузки присоединяются к уже идущей конвертации. Загрузка копируется
+        # в спул частями из временного файла, а не читается в память
+        result, result_id = await converter_service.convert_upload_async(file.file, file.filename, options)
         
-        try:
-            # Опции конвертации
-            options = {
-                "preserve_formatting": preserve_formatting,
-                "include_images": include_images,
-                "max_image_size": max_image_size,
-                "table_format": table_format
-            }
-            
-            # Конвертируем файл
-            markdown_content = converter_service.convert_file(saved_file_path, options)
-            
-            if markdown_content:
-                # Генерируем имя выходного файла
-                output_filename = f"{file.filename.rsplit('.', 1)[0]}.md"
-                
-                return ConversionResponse(
-                    success=True,
-                    content=markdown_content,
-                    filename=output_filename
-                )
-            else:
-                return ConversionResponse(
-                    success=False,
-                    error="Не удалось конвертировать файл"
-                )
-                
-        finally:
-            # Удаляем временный файл
-            converter_service.cleanup_file(saved_file_path)
+        if output_mode == "chunks" and isinstance(result, list) and wants_ndjson(request):
+            return build_chunks_stream(result, file.filename, result_id)
+        return build_conversion_response(result, file.filename, output_mode, result_id)
             
     except HTTPException:
         raise
@@ -113,6 +239,281 @@ async def convert_document(
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
+@api_router.api_route("/results/{result_id}", methods=["GET", "HEAD"])
+async def get_result(request: Request, result_id: str, download: bool = Query(default=False)):
+    """
+    Сохраненный результат конвертации файлом
+    
+    Отдается через FileResponse (sendfile там, где сервер его поддерживает)
+    со строгим ETag, ответом 304 на If-None-Match и поддержкой Range.
+    Сжатый результат (RESULT_COMPRESSION) отдается как есть с
+    Content-Encoding клиентам, которые его принимают, и со своим ETag;
+    остальным, а также результатам со словарем, - распакованным потоком.
+    """
+    meta = await run_in_threadpool(converter_service.get_result, result_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Результат не найден")
+    
+    encoding = HTTP_ENCODINGS.get(meta.get("encoding"))
+    encoded = (encoding is not None and meta.get("dictionary") is None
+               and accepts_encoding(request.headers.get("accept-encoding"), encoding))
+    etag = f'{meta["etag"][:-1]}-{encoding}"' if encoded else meta["etag"]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.RESULT_CACHE_MAX_AGE}"
+    }
+    if encoding is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoded:
+        headers["Content-Encoding"] = encoding
+    elif encoding is not None:
+        disposition = "attachment" if download else "inline"
+        headers["Content-Disposition"] = f"{disposition}; filename*=UTF-8''{quote(meta['filename'])}"
+        headers["Content-Length"] = str(meta["size"])
+        if request.method == "HEAD":
+            return Response(media_type=meta["media_type"], headers=headers)
+        stream = await run_in_threadpool(converter_service.open_result, meta)
+        
+        def iter_decoded():
+            with stream:
+                yield from iter(lambda: stream.read(256 * 1024), b"")
+        
+        return StreamingResponse(iter_decoded(), media_type=meta["media_type"], headers=headers)
+    return FileResponse(
+        meta["path"],
+        media_type=meta["media_type"],
+        headers=headers,
+        filename=meta["filename"],
+        content_disposition_type="attachment" if download else "inline"
+    )
+
+
+@api_router.post("/uploads", response_model=UploadStatusResponse)
+async def create_upload(request: UploadCreateRequest):
+    """Создание загрузки по частям"""
+    file_ext = request.filename.lower().rsplit('.', 1)[-1] if '.' in request.filename else ''
+    if f'.{file_ext}' not in settings.ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неподдерживаемый формат файла. Поддерживаемые форматы: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+        )
+    try:
+        meta = await run_in_threadpool(upload_service.create, request.filename, request.size, request.chunk_size)
+        return UploadStatusResponse(**meta)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@api_router.put("/uploads/{upload_id}/chunks/{index}", response_model=UploadChunkResponse)
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(default=None)
+):
+    """Загрузка одной части файла (тело запроса - байты части)"""
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            declared_size = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Неверный заголовок Content-Length")
+        if declared_size > settings.MAX_UPLOAD_CHUNK_SIZE:
+            raise HTTPException(status_code=413, detail="Часть слишком большая")
+    
+    # Content-Length может отсутствовать (chunked) или не совпадать с телом,
+    # поэтому лимит проверяется по мере чтения
+    body = bytearray()
+    async for block in request.stream():
+        body.extend(block)
+        if len(body) > settings.MAX_UPLOAD_CHUNK_SIZE:
+            raise HTTPException(status_code=413, detail="Часть слишком большая")
+    data = bytes(body)
+    try:
+        checksum = await run_in_threadpool(upload_service.append_chunk, upload_id, index, data, x_chunk_sha256)
+        return UploadChunkResponse(index=index, checksum=checksum)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@api_router.get("/uploads/{upload_id}", response_model=UploadStatusResponse)
+async def get_upload_status(upload_id: str):
+    """Состояние загрузки: какие части уже получены"""
+    try:
+        return UploadStatusResponse(**await run_in_threadpool(upload_service.status, upload_id))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@api_router.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    """Отмена загрузки по частям"""
+    try:
+        await run_in_threadpool(upload_service.delete, upload_id)
+        return {"deleted": upload_id}
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@api_router.post("/uploads/{upload_id}/finalize", response_model=ConversionResponse,
+                 responses={429: {"description": "Лимит конвертаций клиента исчерпан (Retry-After)"}})
+async def finalize_upload(upload_id: str, request: UploadFinalizeRequest, http_request: Request):
+    """Сборка файла, проверка контрольной суммы и конвертация"""
+    try:
+        with upload_service.finalizing(upload_id):
+            return await assemble_and_convert(upload_id, request, http_request)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+async def assemble_and_convert(upload_id: str, request: UploadFinalizeRequest, http_request: Request):
+    """Собирает загрузку и конвертирует ее (под блокировкой finalizing)"""
+    if rate_limiter.enabled:
+        # Лимит проверяется до сборки: загрузка остается для повторного
+        # finalize после Retry-After
+        status = await run_in_threadpool(upload_service.status, upload_id)
+        enforce_rate_limit(http_request, units_for_size(status["size"]))
+    upload = await run_in_threadpool(upload_service.assemble, upload_id, request.checksum)
+    
+    options = (request.options or ConversionOptions()).model_dump()
+    try:
+        converter_service.check_options(upload["filename"], options)
+    except ValueError as e:
+        await run_in_threadpool(upload_service.delete, upload_id)
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result, result_id = await converter_service.convert_saved_upload_async(
+            upload["path"], upload["filename"], upload["sha256"], options
+        )
+        return build_conversion_response(result, upload["filename"], options["output_mode"], result_id)
+    except Exception as e:
+        logger.error(f"Ошибка при конвертации загрузки {upload_id}: {e}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+    finally:
+        await run_in_threadpool(upload_service.delete, upload_id)
+
+
+@api_router.post("/convert/archive",
+                 responses={429: {"description": "Лимит конвертаций клиента исчерпан (Retry-After)"}})
+async def convert_archive(
+    request: Request,
+    file: UploadFile = File(...),
+    output_format: str = Form(default="zip")
+):
+    """Конвертация всех документов ZIP/TAR архива в архив markdown"""
+    if not is_archive(file.filename or ""):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неподдерживаемый формат архива. Поддерживаемые форматы: {', '.join(ZIP_SUFFIXES + TAR_SUFFIXES)}"
+        )
+    if output_format not in ("zip", "tar.gz"):
+        raise HTTPException(status_code=400, detail="output_format должен быть zip или tar.gz")
+    if file.size and file.size > settings.MAX_ARCHIVE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Архив слишком большой. Максимальный размер: {settings.MAX_ARCHIVE_SIZE} байт"
+        )
+    
+    enforce_rate_limit(request, units_for_size(file.size))
+    
+    lower = file.filename.lower()
+    suffix = next(s for s in ZIP_SUFFIXES + TAR_SUFFIXES if lower.endswith(s))
+    output_name = f"{file.filename[:-len(suffix)]}_markdown.{output_format}"
+    
+    try:
+        # UploadFile уже лежит в сикабельном временном файле, читаем его потоком
+        output, stats = await run_in_threadpool(
+            converter_service.convert_archive, file.file, file.filename, output_name
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при конвертации архива {file.filename}: {e}")
+        raise HTTPException(status_code=400, detail="Не удалось прочитать архив")
+    
+    def iter_output():
+        try:
+            while True:
+                block = output.read(64 * 1024)
+                if not block:
+                    break
+                yield block
+        finally:
+            output.close()
+    
+    media_type = "application/zip" if output_format == "zip" else "application/gzip"
+    return StreamingResponse(
+        iter_output(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(output_name)}",
+            "X-Converted-Count": str(stats["converted"]),
+            "X-Failed-Count": str(stats["failed"]),
+            "X-Skipped-Count": str(stats["skipped"])
+        }
+    )
+
+
+@api_router.get("/search", response_model=SearchResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Строка запроса"),
+    limit: int = Query(default=10, ge=1, le=100, description="Количество результатов")
+):
+    """Полнотекстовый поиск по сконвертированным документам"""
+    try:
+        results = await run_in_threadpool(converter_service.search, q, limit)
+        return SearchResponse(query=q, results=[SearchResult(**r) for r in results])
+    except Exception as e:
+        logger.error(f"Ошибка при поиске: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка сервера")
+
+
+@api_router.post("/similar", response_model=SimilarResponse)
+async def find_similar(file: UploadFile = File(...)):
+    """Поиск почти одинаковых ранее сконвертированных документов"""
+    if file.size and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Файл слишком большой. Максимальный размер: {settings.MAX_FILE_SIZE} байт"
+        )
+    
+    matches = await run_in_threadpool(converter_service.find_similar_upload, file.file, file.filename)
+    if matches is None:
+        raise HTTPException(status_code=500, detail="Ошибка сервера")
+    return SimilarResponse(matches=[SimilarDocument(**m) for m in matches])
+
+
+@api_router.post("/inspect", response_model=InspectResponse)
+async def inspect_document(
+    file: UploadFile = File(...),
+    preserve_formatting: bool = Form(default=True),
+    backend: Optional[str] = Form(default=None)
+):
+    """Осмотр документа без конвертации: страницы, изображения, сканы и оценка стоимости"""
+    if file.size and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Файл слишком большой. Максимальный размер: {settings.MAX_FILE_SIZE} байт"
+        )
+    
+    # Читаются только заголовки и метаданные прямо из временного файла загрузки
+    options = {"preserve_formatting": preserve_formatting, "backend": backend}
+    info = await run_in_threadpool(converter_service.inspect_upload, file.file, file.filename, options)
+    return InspectResponse(**info)
+
+
+@api_router.get("/duplicates", response_model=DuplicatesResponse)
+async def get_duplicates():
+    """Кластеры почти одинаковых сконвертированных документов"""
+    return DuplicatesResponse(clusters=converter_service.get_duplicate_clusters())
+
+
+@api_router.get("/stats", response_model=StatsResponse)
+async def get_stats():
+    """Счетчики конвертаций и объединенных запросов"""
+    return StatsResponse(**converter_service.get_stats())
+
+
 @api_router.get("/")
 async def api_root():
     """Корневой endpoint API"""
@@ -121,7 +522,17 @@ async def api_root():
         "version": "0.1.0",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "formats": "/formats",
-            "convert": "/convert"
+            "backends": "/backends",
+            "convert": "/convert",
+            "convert_archive": "/convert/archive",
+            "inspect": "/inspect",
+            "results": "/results/{result_id}",
+            "uploads": "/uploads",
+            "search": "/search",
+            "similar": "/similar",
+            "duplicates": "/duplicates",
+            "stats": "/stats"
         }
     }
@@ -3,7 +3,7 @@
 """
 
 import os
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -29,15 +29,73 @@ class Settings(BaseSettings):
     
     # Настройки загрузки файлов
     UPLOAD_DIR: str = "uploads"
-    MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
+    MAX_FILE_SIZE: int = 1024 * 1024 * 1024  # 1GB, загрузка пишется на диск, а не в память
     ALLOWED_EXTENSIONS: List[str] = [".docx", ".pdf", ".txt", ".rtf"]
     
+    # Загрузка по частям
+    UPLOAD_CHUNK_SIZE: int = 5 * 1024 * 1024  # 5MB
+    MIN_UPLOAD_CHUNK_SIZE: int = 256 * 1024
+    MAX_UPLOAD_CHUNK_SIZE: int = 16 * 1024 * 1024
+    UPLOAD_TTL: int = 24 * 60 * 60  # брошенные загрузки удаляются через сутки
+    
+    # Пропускная способность (для /ready)
+    MAX_CONCURRENT_CONVERSIONS: int = 4
+    MAX_QUEUE_DEPTH: int = 8  # при такой очереди и занятых слотах сервис не готов
+    MIN_FREE_DISK: int = 512 * 1024 * 1024  # минимум свободного места в UPLOAD_DIR
+    
+    # Лимиты конвертаций по клиентам (token bucket в единицах стоимости,
+    # оцениваемой по размеру загрузки). Выключены по умолчанию
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_RATE: float = 1.0  # пополнение корзины клиента, единиц в секунду
+    RATE_LIMIT_BURST: float = 300.0  # емкость корзины
+    RATE_LIMIT_MIN_COST: float = 1.0  # минимальная стоимость запроса
+    # Байт загрузки на единицу стоимости
+    RATE_LIMIT_BYTES_PER_UNIT: int = 100 * 1024
+    # Лимиты API-ключей (заголовок X-API-Key): {"ключ": {"rate": 10, "burst": 5000}}
+    RATE_LIMIT_CLIENTS: Dict[str, Dict[str, float]] = {}
+    # Прокси, за которыми адрес клиента берется из X-Forwarded-For
+    RATE_LIMIT_TRUSTED_PROXIES: List[str] = []
+    # Общие корзины для нескольких воркеров (нужен пакет redis)
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    
+    # Настройки конвертации архивов
+    MAX_ARCHIVE_SIZE: int = 1024 * 1024 * 1024  # 1GB
+    MAX_ARCHIVE_MEMBER_SIZE: int = 50 * 1024 * 1024  # члены архива конвертируются в памяти
+    ARCHIVE_WORKERS: int = 4
+    
     # Настройки конвертации
     OUTPUT_DIR: str = "output"
     PRESERVE_FORMATTING: bool = True
     INCLUDE_IMAGES: bool = True
     MAX_IMAGE_SIZE: int = 1024
     
+    # Ограничение памяти: документы больше четверти бюджета конвертируются по
+    # страницам с записью результата на диск
+    MEMORY_BUDGET: int = 256 * 1024 * 1024
+    # Результаты больше этого размера не возвращаются в ответе, только по result_url
+    MAX_INLINE_RESULT_SIZE: int = 16 * 1024 * 1024
+    
+    # Полнотекстовый индекс (файл внутри OUTPUT_DIR)
+    SEARCH_INDEX_FILE: str = "search.db"
+    
+    # Индекс почти одинаковых документов (файл внутри OUTPUT_DIR)
+    SIMILARITY_INDEX_FILE: str = "near_duplicates.json"
+    SIMILARITY_THRESHOLD: float = 0.8
+    
+    # Карты отпечатков блоков DOCX для повторной конвертации (каталог внутри OUTPUT_DIR)
+    BLOCK_CACHE_DIR: str = "block_cache"
+    
+    # Сохраненные результаты для GET /api/results/{id} (каталог внутри OUTPUT_DIR)
+    RESULTS_DIR: str = "results"
+    RESULT_CACHE_MAX_AGE: int = 24 * 60 * 60  # Cache-Control max-age для прокси и клиентов
+    RESULT_TTL: int = 7 * 24 * 60 * 60  # результаты удаляются через неделю, 0 - хранить бессрочно
+    # Сжатие сохраненных результатов: None, gzip, zstd (нужен zstandard), zlib или auto
+    RESULT_COMPRESSION: Optional[str] = None
+    RESULT_COMPRESSION_LEVEL: Optional[int] = None
+    # Словарь для множества небольших похожих результатов (doc-converter train-dictionary);
+    # такие результаты отдаются распакованными
+    RESULT_COMPRESSION_DICTIONARY: Optional[str] = None
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
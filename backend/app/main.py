@@ -7,12 +7,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import sys
 import os
+import threading
 
 # Добавляем путь к shared модулю
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
-from app.api.routes import api_router
+from app.api.routes import api_router, readiness_response
 from app.core.config import settings
+from app.services.converter_service import converter_service
 
 app = FastAPI(
     title="Document Converter API",
@@ -42,7 +44,27 @@ async def root():
     """Корневой endpoint"""
     return {"message": "Document Converter API", "version": "0.1.0"}
 
+@app.on_event("startup")
+def start_warm_up():
+    """Запускает прогрев конвертера в фоне, чтобы /health отвечал сразу"""
+    threading.Thread(target=converter_service.warm_up, name="warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+def save_indexes():
+    """Сохраняет индекс почти одинаковых документов при остановке"""
+    converter_service.save_similarity_index()
+
+@app.on_event("shutdown")
+def cancel_conversions():
+    """Прерывает незавершенные конвертации, чтобы остановка не ждала их окончания"""
+    converter_service.async_converter.cancel_all()
+
 @app.get("/health")
 async def health_check():
     """Проверка состояния сервера"""
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Готовность принимать конвертации для балансировщика (503 если не готов)"""
+    return readiness_response()
@@ -3,7 +3,7 @@ Pydantic модели для API
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from enum import Enum
 
 
@@ -20,6 +20,10 @@ class ConversionOptions(BaseModel):
     include_images: bool = Field(default=True, description="Включать изображения")
     max_image_size: int = Field(default=1024, description="Максимальный размер изображения")
     table_format: str = Field(default="grid", description="Формат таблиц")
+    output_mode: str = Field(default="markdown", description="Режим вывода: markdown или chunks")
+    chunk_max_chars: int = Field(default=2000, description="Максимальный размер секции в символах")
+    chunk_max_tokens: Optional[int] = Field(default=None, description="Максимальный размер секции в токенах")
+    backend: Optional[str] = Field(default=None, description="Бэкенд конвертации (по умолчанию выбирается автоматически)")
 
 
 class ConversionRequest(BaseModel):
@@ -28,11 +32,57 @@ class ConversionRequest(BaseModel):
     options: Optional[ConversionOptions] = Field(default=None, description="Опции конвертации")
 
 
+class UploadCreateRequest(BaseModel):
+    """Запрос на создание загрузки по частям"""
+    filename: str = Field(..., description="Имя файла")
+    size: int = Field(..., description="Размер файла в байтах")
+    chunk_size: Optional[int] = Field(default=None, description="Размер части в байтах")
+
+
+class UploadStatusResponse(BaseModel):
+    """Состояние загрузки по частям"""
+    upload_id: str = Field(..., description="Идентификатор загрузки")
+    filename: str = Field(..., description="Имя файла")
+    size: int = Field(..., description="Размер файла в байтах")
+    chunk_size: int = Field(..., description="Размер части в байтах")
+    total_chunks: int = Field(..., description="Количество частей")
+    received: List[int] = Field(default_factory=list, description="Номера полученных частей")
+    complete: bool = Field(default=False, description="Получены ли все части")
+
+
+class UploadChunkResponse(BaseModel):
+    """Ответ на загрузку части"""
+    index: int = Field(..., description="Номер части")
+    checksum: str = Field(..., description="SHA-256 сохраненной части")
+
+
+class UploadFinalizeRequest(BaseModel):
+    """Запрос на завершение загрузки по частям"""
+    checksum: str = Field(..., description="SHA-256 от склеенных hex SHA-256 частей по порядку")
+    options: Optional[ConversionOptions] = Field(default=None, description="Опции конвертации")
+
+
+class DocumentChunk(BaseModel):
+    """Секция документа, ограниченная по размеру"""
+    index: int = Field(..., description="Порядковый номер секции")
+    heading_path: List[str] = Field(..., description="Путь заголовков секции")
+    text: str = Field(..., description="Markdown текст секции")
+    page_start: Optional[int] = Field(default=None, description="Первая страница секции")
+    page_end: Optional[int] = Field(default=None, description="Последняя страница секции")
+    byte_start: int = Field(..., description="Смещение начала секции в байтах UTF-8")
+    byte_end: int = Field(..., description="Смещение конца секции в байтах UTF-8")
+    chars: int = Field(..., description="Размер секции в символах")
+    tokens: int = Field(..., description="Оценка размера секции в токенах")
+
+
 class ConversionResponse(BaseModel):
     """Ответ на конвертацию"""
     success: bool = Field(..., description="Успешность конвертации")
-    content: Optional[str] = Field(default=None, description="Конвертированный контент")
+    content: Optional[str] = Field(default=None, description="Конвертированный контент (нет для результатов больше MAX_INLINE_RESULT_SIZE, см. result_url)")
+    chunks: Optional[List[DocumentChunk]] = Field(default=None, description="Секции документа в режиме chunks")
     filename: Optional[str] = Field(default=None, description="Имя выходного файла")
+    result_id: Optional[str] = Field(default=None, description="Идентификатор сохраненного результата")
+    result_url: Optional[str] = Field(default=None, description="Адрес результата файлом (с ETag и Range)")
     error: Optional[str] = Field(default=None, description="Сообщение об ошибке")
 
 
@@ -45,3 +95,95 @@ class HealthResponse(BaseModel):
     """Ответ о состоянии сервера"""
     status: str = Field(..., description="Статус сервера")
     version: str = Field(..., description="Версия приложения")
+
+
+class ReadinessResponse(BaseModel):
+    """Готовность принимать конвертации"""
+    ready: bool = Field(..., description="Готов ли сервис принимать новые конвертации")
+    warm: bool = Field(..., description="Завершен ли прогрев конвертера")
+    slots_total: int = Field(..., description="Количество слотов конвертации")
+    slots_free: int = Field(..., description="Свободные слоты")
+    queue_depth: int = Field(..., description="Конвертации, ожидающие слота")
+    max_queue_depth: int = Field(..., description="Очередь, при которой сервис перестает быть готовым")
+    disk_free: Optional[int] = Field(default=None, description="Свободное место в каталоге загрузок, байт")
+    min_disk_free: int = Field(..., description="Минимально допустимое свободное место, байт")
+    reasons: List[str] = Field(default_factory=list, description="Причины неготовности")
+
+
+class StatsResponse(BaseModel):
+    """Счетчики дедупликации конвертаций"""
+    conversions: int = Field(..., description="Количество выполненных конвертаций")
+    coalesced: int = Field(..., description="Количество запросов, присоединенных к уже идущей конвертации")
+    in_flight: int = Field(..., description="Количество конвертаций в работе")
+
+
+class BackendInfo(BaseModel):
+    """Описание бэкенда конвертации"""
+    name: str = Field(..., description="Имя бэкенда")
+    available: bool = Field(..., description="Установлены ли зависимости")
+    formats: Dict[str, float] = Field(..., description="Форматы и заявленное качество результата")
+    capabilities: List[str] = Field(..., description="Возможности бэкенда")
+    profile: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Замеры по форматам")
+
+
+class BackendsResponse(BaseModel):
+    """Список бэкендов конвертации"""
+    backends: List[BackendInfo] = Field(..., description="Бэкенды")
+
+
+class SearchResult(BaseModel):
+    """Результат полнотекстового поиска"""
+    key: str = Field(..., description="Ключ документа в индексе")
+    title: str = Field(..., description="Имя документа")
+    snippet: str = Field(..., description="Фрагмент с найденными словами")
+    score: float = Field(..., description="Релевантность (больше - лучше)")
+
+
+class SearchResponse(BaseModel):
+    """Ответ полнотекстового поиска"""
+    query: str = Field(..., description="Строка запроса")
+    results: List[SearchResult] = Field(..., description="Найденные документы")
+
+
+class SimilarDocument(BaseModel):
+    """Почти одинаковый документ"""
+    key: str = Field(..., description="Ключ документа в индексе сходства (SHA-256 содержимого, как key в поиске)")
+    similarity: float = Field(..., description="Оценка сходства от 0 до 1")
+
+
+class SimilarResponse(BaseModel):
+    """Ответ поиска почти одинаковых документов"""
+    matches: List[SimilarDocument] = Field(..., description="Найденные документы по убыванию сходства")
+
+
+class DuplicatesResponse(BaseModel):
+    """Кластеры почти одинаковых документов"""
+    clusters: List[List[str]] = Field(..., description="Кластеры ключей документов")
+
+
+class CostEstimate(BaseModel):
+    """Оценка стоимости конвертации"""
+    units: float = Field(..., description="Единицы стоимости для квот (страница с текстом = 1)")
+    seconds: Optional[float] = Field(default=None, description="Оценка времени по замерам бэкенда")
+    pages: int = Field(..., description="Оценка числа страниц")
+
+
+class InspectResponse(BaseModel):
+    """Результат осмотра документа без конвертации"""
+    name: str = Field(..., description="Имя файла")
+    size: int = Field(..., description="Размер в байтах")
+    extension: str = Field(..., description="Расширение")
+    supported: bool = Field(..., description="Поддерживается ли формат")
+    pages: Optional[int] = Field(default=None, description="Число страниц (если известно)")
+    text_pages: Optional[int] = Field(default=None, description="Страниц с текстовым слоем")
+    scanned_pages: int = Field(default=0, description="Страниц-сканов без текстового слоя")
+    scanned: bool = Field(default=False, description="Документ целиком состоит из сканов")
+    images: int = Field(default=0, description="Число встроенных изображений")
+    images_size: int = Field(default=0, description="Суммарный размер изображений в байтах")
+    paragraphs: Optional[int] = Field(default=None, description="Число абзацев DOCX")
+    tables: Optional[int] = Field(default=None, description="Число таблиц DOCX")
+    words: Optional[int] = Field(default=None, description="Число слов из метаданных DOCX")
+    encrypted: bool = Field(default=False, description="Документ зашифрован")
+    backend: Optional[str] = Field(default=None, description="Бэкенд, который будет выбран")
+    cost: CostEstimate = Field(..., description="Оценка стоимости конвертации")
+    error: Optional[str] = Field(default=None, description="Ошибка чтения метаданных")
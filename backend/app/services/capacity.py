@@ -0,0 +1,140 @@
+"""
+Учет свободных слотов конвертации для проверки готовности
+"""
+
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, Callable, List
+
+
+class CapacityTracker:
+    """
+    Ограничивает число одновременных конвертаций и считает ожидающих.
+
+    Конвертация занимает слот на все время работы (конвертация в несколько
+    потоков - по слоту на поток); запросы сверх числа слотов ждут в очереди. Снимок состояния для /ready не берет блокировок
+    дольше, чем нужно на копирование счетчиков.
+    """
+
+    def __init__(self, slots: int, max_queue_depth: int, spool_dir: str, min_free_disk: int):
+        """
+        Инициализация
+
+        Args:
+            slots: Количество одновременных конвертаций
+            max_queue_depth: Длина очереди, при которой сервис перестает быть готовым
+            spool_dir: Каталог спула, свободное место в котором проверяется
+            min_free_disk: Минимум свободного места в спуле в байтах
+        """
+        self.slots = slots
+        self.max_queue_depth = max_queue_depth
+        self.spool_dir = spool_dir
+        self.min_free_disk = min_free_disk
+        self._semaphore = threading.BoundedSemaphore(slots)
+        # Несколько слотов набирает только один запрос за раз: иначе двое,
+        # набравших по части слотов, ждали бы друг друга бесконечно
+        self._multi_slot_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._warm = False
+        self._warmup_error: Optional[str] = None
+        self._queue_sources: List[Callable[[], int]] = []
+
+    @contextmanager
+    def slot(self, count: int = 1) -> Iterator[None]:
+        """
+        Занимает слоты конвертации, ожидая освобождения при необходимости
+
+        Args:
+            count: Количество слотов (потоков конвертации), от 1 до slots
+        """
+        if not 1 <= count <= self.slots:
+            raise ValueError(f"count должен быть от 1 до {self.slots}")
+        with self._lock:
+            self._waiting += 1
+        acquired = 0
+        try:
+            if count == 1:
+                self._semaphore.acquire()
+                acquired = 1
+            else:
+                with self._multi_slot_lock:
+                    while acquired < count:
+                        self._semaphore.acquire()
+                        acquired += 1
+        except BaseException:
+            for _ in range(acquired):
+                self._semaphore.release()
+            raise
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        with self._lock:
+            self._active += count
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= count
+            for _ in range(count):
+                self._semaphore.release()
+
+    def add_queue_source(self, source: Callable[[], int]) -> None:
+        """
+        Добавляет внешнюю очередь, учитываемую в глубине очереди
+
+        Args:
+            source: Функция, возвращающая число ожидающих запросов
+        """
+        self._queue_sources.append(source)
+
+    def mark_warm(self, error: Optional[str] = None) -> None:
+        """
+        Отмечает окончание прогрева
+
+        Args:
+            error: Текст ошибки прогрева (сервис остается не готовым)
+        """
+        self._warmup_error = error
+        self._warm = error is None
+
+    def disk_free(self) -> Optional[int]:
+        """Свободное место в спуле в байтах или None если каталог недоступен"""
+        try:
+            return shutil.disk_usage(self.spool_dir).free
+        except OSError:
+            return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Снимок состояния для проверки готовности
+
+        Returns:
+            Словарь с признаком готовности и причинами неготовности
+        """
+        with self._lock:
+            active, waiting = self._active, self._waiting
+        waiting += sum(source() for source in self._queue_sources)
+        disk_free = self.disk_free()
+
+        reasons = []
+        if not self._warm:
+            reasons.append(self._warmup_error or "прогрев не завершен")
+        if waiting >= self.max_queue_depth and active >= self.slots:
+            reasons.append("все слоты заняты, очередь заполнена")
+        if disk_free is None or disk_free < self.min_free_disk:
+            reasons.append("мало места в каталоге загрузок")
+
+        return {
+            "ready": not reasons,
+            "warm": self._warm,
+            "slots_total": self.slots,
+            "slots_free": max(self.slots - active, 0),
+            "queue_depth": waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "disk_free": disk_free,
+            "min_disk_free": self.min_free_disk,
+            "reasons": reasons
+        }
@@ -3,17 +3,33 @@
 """
 
 import os
+import json
+import uuid
+import asyncio
+import hashlib
+import functools
 import tempfile
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union, Tuple, BinaryIO
 import sys
 
 # Добавляем путь к shared модулю
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'shared'))
+# Добавляем путь к пакету doc_converter
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from converter import DocumentConverter
+from converter import DocumentConverter, DocumentStream
+from doc_converter.async_converter import AsyncDocumentConverter
+from doc_converter.search_index import SearchIndex
+from doc_converter.similarity import NearDuplicateIndex
+from doc_converter.archive import convert_archive
+from doc_converter.postprocess import TABLE_FORMATS
+from doc_converter.compression import load_dictionary
 from app.core.config import settings
+from app.services.single_flight import SingleFlight
+from app.services.capacity import CapacityTracker
+from app.services.result_store import ResultStore
 
 
 class ConverterService:
@@ -21,23 +37,63 @@ class ConverterService:
     
     def __init__(self):
         """Инициализация сервиса"""
-        self.converter = DocumentConverter()
         self.logger = logging.getLogger(__name__)
+        self.single_flight = SingleFlight()
         
         # Создаем директории если их нет
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        
+        self.capacity = CapacityTracker(
+            slots=settings.MAX_CONCURRENT_CONVERSIONS,
+            max_queue_depth=settings.MAX_QUEUE_DEPTH,
+            spool_dir=settings.UPLOAD_DIR,
+            min_free_disk=settings.MIN_FREE_DISK
+        )
+        
+        self.results = ResultStore(
+            os.path.join(settings.OUTPUT_DIR, settings.RESULTS_DIR),
+            compression=settings.RESULT_COMPRESSION,
+            level=settings.RESULT_COMPRESSION_LEVEL,
+            dictionary=load_dictionary(settings.RESULT_COMPRESSION_DICTIONARY),
+            ttl=settings.RESULT_TTL
+        )
+        self.search_index = SearchIndex(os.path.join(settings.OUTPUT_DIR, settings.SEARCH_INDEX_FILE))
+        self.similarity_index_path = os.path.join(settings.OUTPUT_DIR, settings.SIMILARITY_INDEX_FILE)
+        self.converter = DocumentConverter(
+            config={
+                "block_cache_dir": os.path.join(settings.OUTPUT_DIR, settings.BLOCK_CACHE_DIR),
+                "low_memory": "auto",
+                "memory_budget": settings.MEMORY_BUDGET
+            },
+            near_duplicate_index=self._load_similarity_index()
+        )
+        # Конвертации из API выполняются в пуле асинхронного конвертера;
+        # запросы, ждущие свободного потока, входят в глубину очереди /ready
+        self.async_converter = AsyncDocumentConverter(
+            self.converter, max_workers=settings.MAX_CONCURRENT_CONVERSIONS
+        )
+        self.capacity.add_queue_source(lambda: self.async_converter.waiting)
     
-    def convert_file(self, file_path: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    def convert_file(self, file_path: str, options: Optional[Dict[str, Any]] = None,
+                     source_name: Optional[str] = None,
+                     document_key: Optional[str] = None) -> Union[str, Path, None]:
         """
-        Конвертирует файл в markdown
+        Конвертирует файл в markdown и добавляет результат в поисковый индекс
+        
+        Большие документы конвертируются по страницам (см. MEMORY_BUDGET), их
+        результат сразу пишется на диск.
         
         Args:
             file_path: Путь к файлу
             options: Опции конвертации
+            source_name: Имя документа для индекса (по умолчанию имя файла)
+            document_key: Ключ документа в индексе, обычно SHA-256 содержимого
+                (по умолчанию полный путь к файлу)
             
         Returns:
-            Markdown контент или None при ошибке
+            Markdown контент, Path к результату больше MAX_INLINE_RESULT_SIZE
+            или None при ошибке
         """
         try:
             # Проверяем поддерживается ли формат
@@ -45,11 +101,25 @@ class ConverterService:
                 self.logger.error(f"Неподдерживаемый формат файла: {file_path}")
                 return None
             
+            options = options or {}
+            source_name = source_name or Path(file_path).name
+            # Одинаковые имена у разных документов не должны затирать друг друга в индексе
+            document_key = document_key or str(Path(file_path).resolve())
+            if self.converter.is_low_memory(file_path):
+                return self._convert_file_to_disk(file_path, options, source_name, document_key)
+            
             # Конвертируем файл
-            markdown_content = self.converter.convert_to_string(file_path)
+            markdown_content = self.converter.convert_to_string(
+                file_path,
+                backend=options.get("backend"),
+                require=self.required_capabilities(options),
+                postprocess=self.postprocess_options(options)
+            )
             
             if markdown_content:
                 self.logger.info(f"Файл успешно конвертирован: {file_path}")
+                self.index_document(document_key, source_name, markdown_content)
+                self.converter.register_near_duplicate(document_key, file_path, markdown_content)
                 return markdown_content
             else:
                 self.logger.error(f"Не удалось конвертировать файл: {file_path}")
@@ -59,6 +129,578 @@ class ConverterService:
             self.logger.error(f"Ошибка при конвертации файла {file_path}: {e}")
             return None
     
+    def _convert_file_to_disk(self, file_path: str, options: Dict[str, Any],
+                              source_name: str, document_key: str) -> Union[str, Path, None]:
+        """
+        Конвертирует большой файл по страницам во временный файл хранилища
+        результатов
+        
+        Args:
+            file_path: Путь к файлу
+            options: Опции конвертации
+            source_name: Имя документа для индексов
+            document_key: Ключ документа в индексе
+            
+        Returns:
+            Markdown контент, если он не больше MAX_INLINE_RESULT_SIZE, иначе
+            Path к временному файлу (переносится в хранилище); None при ошибке
+        """
+        output_path = self.results.spool_path()
+        spilled = False
+        try:
+            # Поток с ключом документа: индекс сходства получает document_key, а не путь спула
+            with open(file_path, 'rb') as source:
+                converted = self.converter.convert(
+                    DocumentStream(source_name, source, key=document_key), output_path,
+                    backend=options.get("backend"),
+                    require=self.required_capabilities(options, low_memory=True),
+                    postprocess=self.postprocess_options(options)
+                )
+            if not converted:
+                self.logger.error(f"Не удалось конвертировать файл: {file_path}")
+                return None
+            if os.path.getsize(output_path) > settings.MAX_INLINE_RESULT_SIZE:
+                self.logger.info(f"Большой результат {source_name} записан на диск без индексации")
+                spilled = True
+                return Path(output_path)
+            with open(output_path, encoding='utf-8') as f:
+                markdown_content = f.read()
+            self.index_document(document_key, source_name, markdown_content)
+            return markdown_content
+        finally:
+            if not spilled:
+                self.cleanup_file(output_path)
+    
+    def convert_file_to_chunks(self, file_path: str,
+                               options: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Конвертирует файл в секции, ограниченные по размеру
+        
+        Args:
+            file_path: Путь к файлу
+            options: Опции конвертации (chunk_max_chars, chunk_max_tokens)
+            
+        Returns:
+            Список секций или None при ошибке
+        """
+        options = options or {}
+        try:
+            if not self.converter.is_supported_format(file_path):
+                self.logger.error(f"Неподдерживаемый формат файла: {file_path}")
+                return None
+            
+            chunks = list(self.converter.iter_chunks(
+                file_path,
+                max_chars=options.get("chunk_max_chars", 2000),
+                max_tokens=options.get("chunk_max_tokens"),
+                backend=options.get("backend"),
+                postprocess=self.postprocess_options(options)
+            ))
+            self.logger.info(f"Файл разбит на {len(chunks)} секций: {file_path}")
+            return chunks
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка при конвертации файла {file_path} в секции: {e}")
+            return None
+    
+    def convert_upload(self, file_content: Union[bytes, BinaryIO], filename: str,
+                       options: Optional[Dict[str, Any]] = None) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Конвертирует загруженный файл, объединяя одновременные запросы
+        с одинаковым содержимым и опциями в одну конвертацию
+
+        Если такой файл с такими же опциями уже конвертировался, результат
+        берется из хранилища без повторной конвертации.
+
+        Args:
+            file_content: Содержимое файла или бинарный поток (копируется на диск по частям)
+            filename: Имя файла
+            options: Опции конвертации
+
+        Returns:
+            Пара (markdown контент, список секций или Path к большому
+            результату, идентификатор сохраненного результата); (None, None)
+            при ошибке
+        """
+        spooled = self.spool_upload(file_content, filename)
+        if spooled is None:
+            return None, None
+        saved_file_path, digest = spooled
+        try:
+            key = self._coalescing_key(digest, filename, options)
+            return self._convert_stored(
+                key, filename, lambda: self.convert_saved_file(saved_file_path, filename, options, digest)
+            )
+        finally:
+            self.cleanup_file(saved_file_path)
+            self.cleanup_file(os.path.dirname(saved_file_path))
+
+    def convert_saved_upload(self, file_path: str, filename: str, digest: str,
+                             options: Optional[Dict[str, Any]] = None) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Конвертирует собранную загрузку по частям с сохранением результата
+
+        Args:
+            file_path: Путь к собранному файлу
+            filename: Исходное имя файла
+            digest: SHA-256 содержимого файла
+            options: Опции конвертации
+
+        Returns:
+            Пара (markdown контент или список секций, идентификатор результата)
+        """
+        key = self._coalescing_key(digest, filename, options)
+        return self._convert_stored(key, filename, lambda: self.convert_saved_file(file_path, filename, options, digest))
+
+    def _convert_stored(self, key: str, filename: str,
+                        convert) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Берет результат из хранилища или конвертирует и сохраняет его
+
+        Результаты больше MAX_INLINE_RESULT_SIZE не читаются в память:
+        вместо них возвращается Path к файлу в хранилище.
+
+        Args:
+            key: Ключ конвертации (см. _coalescing_key)
+            filename: Имя файла
+            convert: Функция конвертации без аргументов
+
+        Returns:
+            Пара (результат, идентификатор результата или None)
+        """
+        result_id = self.results.result_id(key)
+        stored = self.results.load(result_id, max_size=settings.MAX_INLINE_RESULT_SIZE)
+        if stored is not None:
+            self.logger.info(f"Результат взят из хранилища: {filename} ({result_id})")
+            return stored, result_id
+
+        (result, saved_id), shared = self.single_flight.do(
+            key, lambda: self._convert_and_save(result_id, filename, convert)
+        )
+        if shared:
+            self.logger.info(f"Запрос присоединен к выполняющейся конвертации: {filename}")
+        return result, saved_id
+
+    async def _convert_stored_async(self, key: str, filename: str,
+                                    convert) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Асинхронный вариант _convert_stored
+
+        Хранилище читается в пуле потоков по умолчанию, присоединение к
+        одинаковой конвертации происходит в event loop, и только ведущий
+        запрос занимает слот пула асинхронного конвертера. Ожидающие не
+        уменьшают число одновременных конвертаций и не входят в глубину
+        очереди /ready.
+
+        Args:
+            key: Ключ конвертации (см. _coalescing_key)
+            filename: Имя файла
+            convert: Синхронная функция конвертации без аргументов
+
+        Returns:
+            Пара (результат, идентификатор результата или None)
+        """
+        loop = asyncio.get_running_loop()
+        result_id = self.results.result_id(key)
+        stored = await loop.run_in_executor(
+            None, functools.partial(self.results.load, result_id, max_size=settings.MAX_INLINE_RESULT_SIZE)
+        )
+        if stored is not None:
+            self.logger.info(f"Результат взят из хранилища: {filename} ({result_id})")
+            return stored, result_id
+
+        (result, saved_id), shared = await self.single_flight.do_async(
+            key, lambda: self.async_converter.run(self._convert_and_save, result_id, filename, convert)
+        )
+        if shared:
+            self.logger.info(f"Запрос присоединен к выполняющейся конвертации: {filename}")
+        return result, saved_id
+
+    def _convert_and_save(self, result_id: str, filename: str,
+                          convert) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Конвертирует и сохраняет результат в хранилище
+
+        Args:
+            result_id: Идентификатор результата
+            filename: Имя файла
+            convert: Функция конвертации без аргументов
+
+        Returns:
+            Пара (результат, идентификатор результата или None если
+            результат не сохранен); (None, None) при ошибке
+        """
+        result = convert()
+        if isinstance(result, Path):
+            # Большой результат уже на диске: переносится в хранилище
+            # переименованием, без него ответ вернуть нельзя
+            try:
+                return Path(self.results.save(result_id, filename, result)["path"]), result_id
+            except Exception as e:
+                self.logger.error(f"Ошибка при сохранении результата {filename}: {e}")
+                return None, None
+            finally:
+                self.cleanup_file(str(result))
+        if not result:
+            return None, None
+        try:
+            self.results.save(result_id, filename, result)
+        except Exception as e:
+            # Результат все равно возвращается клиенту в ответе
+            self.logger.error(f"Ошибка при сохранении результата {filename}: {e}")
+            return result, None
+        return result, result_id
+
+    async def convert_upload_async(self, file_content: Union[bytes, BinaryIO], filename: str,
+                                   options: Optional[Dict[str, Any]] = None) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Асинхронный вариант convert_upload (см. _convert_stored_async)
+        
+        Отмена вызывающей задачи прерывает конвертацию между блоками документа;
+        присоединившиеся к ней запросы повторяют конвертацию сами.
+        
+        Args:
+            file_content: Содержимое файла или бинарный поток
+            filename: Имя файла
+            options: Опции конвертации
+            
+        Returns:
+            Пара (markdown контент, список секций или Path к большому
+            результату, идентификатор результата)
+        """
+        spool = asyncio.get_running_loop().run_in_executor(None, self.spool_upload, file_content, filename)
+        try:
+            spooled = await asyncio.shield(spool)
+        except asyncio.CancelledError:
+            # Копирование в потоке не прервать: файл удаляется, когда оно закончится
+            spool.add_done_callback(self._cleanup_spooled)
+            raise
+        if spooled is None:
+            return None, None
+        saved_file_path, digest = spooled
+        try:
+            key = self._coalescing_key(digest, filename, options)
+            return await self._convert_stored_async(
+                key, filename, lambda: self.convert_saved_file(saved_file_path, filename, options, digest)
+            )
+        finally:
+            self._cleanup_spooled(spool)
+    
+    async def convert_saved_upload_async(self, file_path: str, filename: str, digest: str,
+                                         options: Optional[Dict[str, Any]] = None) -> Tuple[Union[str, List[Dict[str, Any]], Path, None], Optional[str]]:
+        """
+        Асинхронный вариант convert_saved_upload (см. _convert_stored_async)
+        
+        Args:
+            file_path: Путь к собранному файлу
+            filename: Исходное имя файла
+            digest: SHA-256 содержимого файла
+            options: Опции конвертации
+            
+        Returns:
+            Пара (markdown контент или список секций, идентификатор результата)
+        """
+        key = self._coalescing_key(digest, filename, options)
+        return await self._convert_stored_async(
+            key, filename, lambda: self.convert_saved_file(file_path, filename, options, digest)
+        )
+    
+    def convert_saved_file(self, file_path: str, filename: str,
+                           options: Optional[Dict[str, Any]] = None,
+                           document_key: Optional[str] = None) -> Union[str, List[Dict[str, Any]], Path, None]:
+        """
+        Конвертирует уже сохраненный файл в режиме из опций
+        
+        Args:
+            file_path: Путь к сохраненному файлу
+            filename: Исходное имя файла
+            options: Опции конвертации
+            document_key: Ключ документа в индексах (SHA-256 содержимого)
+            
+        Returns:
+            Markdown контент, список секций в режиме chunks, Path к большому
+            результату или None при ошибке
+        """
+        with self.capacity.slot():
+            if (options or {}).get("output_mode") == "chunks":
+                return self.convert_file_to_chunks(file_path, options)
+            return self.convert_file(file_path, options, source_name=filename, document_key=document_key)
+    
+    def _coalescing_key(self, digest: str, filename: str,
+                        options: Optional[Dict[str, Any]]) -> str:
+        """
+        Строит ключ дедупликации из хеша содержимого и опций
+
+        Args:
+            digest: SHA-256 содержимого файла
+            filename: Имя файла
+            options: Опции конвертации
+
+        Returns:
+            Строковый ключ
+        """
+        # Расширение влияет на выбор формата, поэтому входит в ключ
+        suffix = Path(filename).suffix.lower()
+        options_key = json.dumps(options or {}, sort_keys=True)
+        return f"{digest}:{suffix}:{options_key}"
+
+    def get_result(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает метаданные сохраненного результата
+
+        Args:
+            result_id: Идентификатор результата
+
+        Returns:
+            Метаданные с путем к файлу или None если результата нет
+        """
+        return self.results.get(result_id)
+
+    def open_result(self, meta: Dict[str, Any]) -> BinaryIO:
+        """
+        Открывает сохраненный результат с распаковкой на лету
+
+        Args:
+            meta: Метаданные из get_result
+
+        Returns:
+            Бинарный поток несжатого содержимого
+        """
+        return self.results.open(meta)
+
+    def index_document(self, key: str, title: str, markdown_content: str) -> None:
+        """
+        Добавляет документ в полнотекстовый индекс
+        
+        Args:
+            key: Ключ документа (повторное добавление с тем же ключом заменяет запись)
+            title: Имя документа для результатов поиска
+            markdown_content: Markdown контент
+        """
+        try:
+            self.search_index.add_document(key, title, markdown_content)
+        except Exception as e:
+            # Ошибка индексации не должна ломать конвертацию
+            self.logger.error(f"Ошибка при индексации {title}: {e}")
+    
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Ищет по сконвертированным документам
+        
+        Args:
+            query: Строка запроса
+            limit: Максимальное количество результатов
+            
+        Returns:
+            Список результатов, отсортированных по релевантности
+        """
+        return self.search_index.search(query, limit=limit)
+    
+    def convert_archive(self, fileobj: BinaryIO, archive_name: str,
+                        output_name: str) -> Tuple[BinaryIO, Dict[str, Any]]:
+        """
+        Конвертирует документы из архива в выходной архив без распаковки на диск
+        
+        Args:
+            fileobj: Бинарный поток входного архива
+            archive_name: Имя входного архива
+            output_name: Имя выходного архива (определяет его формат)
+            
+        Returns:
+            Поток выходного архива, спозиционированный на начало, и статистика
+        """
+        # Небольшие результаты остаются в памяти, большие уходят во временный файл
+        output = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        # Каждый поток архива - отдельная конвертация и занимает свой слот
+        workers = max(1, min(settings.ARCHIVE_WORKERS, self.capacity.slots))
+        try:
+            with self.capacity.slot(workers):
+                stats = convert_archive(
+                    self.converter, fileobj, archive_name, output, output_name,
+                    workers=workers,
+                    max_member_size=settings.MAX_ARCHIVE_MEMBER_SIZE
+                )
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        self.logger.info(f"Архив сконвертирован: {archive_name} -> {output_name}")
+        return output, stats
+    
+    def find_similar_upload(self, file_content: Union[bytes, BinaryIO], filename: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Находит почти одинаковые ранее сконвертированные документы
+        
+        Args:
+            file_content: Содержимое файла или бинарный поток
+            filename: Имя файла
+            
+        Returns:
+            Список документов со сходством или None при ошибке
+        """
+        spooled = self.spool_upload(file_content, filename)
+        if spooled is None:
+            return None
+        saved_file_path, digest = spooled
+        try:
+            matches = self.converter.find_near_duplicates(saved_file_path, exclude=digest)
+            return [{"key": key, "similarity": similarity} for key, similarity in matches]
+        except Exception as e:
+            self.logger.error(f"Ошибка при поиске похожих документов для {filename}: {e}")
+            return None
+        finally:
+            self.cleanup_file(saved_file_path)
+            self.cleanup_file(os.path.dirname(saved_file_path))
+    
+    def inspect_upload(self, fileobj: BinaryIO, filename: str,
+                       options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Осматривает загруженный файл без конвертации и оценивает ее стоимость
+        
+        Args:
+            fileobj: Бинарный поток файла
+            filename: Имя файла
+            options: Опции конвертации (влияют на выбор бэкенда)
+            
+        Returns:
+            Описание документа с оценкой стоимости
+        """
+        options = options or {}
+        return self.converter.inspect(
+            fileobj, filename,
+            backend=options.get("backend"),
+            require=self.required_capabilities(options, self.converter.is_low_memory(fileobj, filename))
+        )
+    
+    def get_duplicate_clusters(self) -> List[List[str]]:
+        """
+        Возвращает кластеры почти одинаковых документов
+        
+        Returns:
+            Список кластеров ключей документов (SHA-256 содержимого, как в поиске)
+        """
+        return self.converter.near_duplicate_index.clusters()
+    
+    def save_similarity_index(self) -> None:
+        """Сохраняет индекс почти одинаковых документов на диск"""
+        try:
+            self.converter.near_duplicate_index.save(self.similarity_index_path)
+        except Exception as e:
+            self.logger.error(f"Ошибка при сохранении индекса сходства: {e}")
+    
+    def _load_similarity_index(self) -> NearDuplicateIndex:
+        """
+        Загружает индекс почти одинаковых документов или создает новый
+        
+        Returns:
+            Индекс почти одинаковых документов
+        """
+        if os.path.exists(self.similarity_index_path):
+            try:
+                return NearDuplicateIndex.load(self.similarity_index_path)
+            except Exception as e:
+                self.logger.error(f"Ошибка при загрузке индекса сходства: {e}")
+        return NearDuplicateIndex(threshold=settings.SIMILARITY_THRESHOLD)
+    
+    def required_capabilities(self, options: Optional[Dict[str, Any]], low_memory: bool = False) -> List[str]:
+        """
+        Возможности бэкенда, обязательные для опций конвертации
+        
+        В режиме low_memory сохранение форматирования не обязательно: из
+        бэкендов с formatting по страницам умеет работать только DOCX, и PDF
+        или TXT иначе конвертировались бы целиком в памяти.
+        
+        Args:
+            options: Опции конвертации
+            low_memory: Документ конвертируется по страницам
+            
+        Returns:
+            Список возможностей
+        """
+        options = options or {}
+        if low_memory:
+            return []
+        return ["formatting"] if options.get("preserve_formatting", True) else []
+    
+    def postprocess_options(self, options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Опции постобработки markdown из опций конвертации
+        
+        Args:
+            options: Опции конвертации
+            
+        Returns:
+            Опции для DocumentConverter
+        """
+        return {"table_format": (options or {}).get("table_format")}
+    
+    def check_options(self, filename: str, options: Optional[Dict[str, Any]]) -> None:
+        """
+        Проверяет опции конвертации до начала работы
+        
+        Args:
+            filename: Имя файла
+            options: Опции конвертации
+            
+        Raises:
+            ValueError: Если формат таблиц неизвестен или нет подходящего бэкенда
+        """
+        options = options or {}
+        table_format = options.get("table_format")
+        if table_format and table_format not in TABLE_FORMATS:
+            raise ValueError(f"table_format должен быть одним из: {', '.join(TABLE_FORMATS)}")
+        suffix = Path(filename).suffix
+        if not self.converter.selector.select(suffix, self.required_capabilities(options), options.get("backend")):
+            raise ValueError(f"Нет бэкенда для {suffix} с выбранными опциями")
+    
+    def get_backends(self) -> List[Dict[str, Any]]:
+        """
+        Возвращает бэкенды конвертации с профилем замеров
+        
+        Returns:
+            Список описаний бэкендов
+        """
+        return self.converter.get_backends()
+    
+    def warm_up(self) -> None:
+        """
+        Прогревает конвертер: загружает бэкенды и выполняет пробную конвертацию
+        
+        До окончания прогрева /ready отвечает, что сервис не готов.
+        """
+        try:
+            for backend in self.converter.get_backends():
+                self.logger.info(f"Бэкенд {backend['name']}: {'доступен' if backend['available'] else 'недоступен'}")
+            if not self.converter.convert_to_string(b"warm-up", filename="warm-up.txt"):
+                raise RuntimeError("пробная конвертация не удалась")
+            self.capacity.mark_warm()
+            self.logger.info("Прогрев конвертера завершен")
+        except Exception as e:
+            self.logger.error(f"Ошибка прогрева конвертера: {e}")
+            self.capacity.mark_warm(error=f"ошибка прогрева: {e}")
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """
+        Возвращает состояние готовности принимать конвертации
+        
+        Returns:
+            Словарь с готовностью, свободными слотами, очередью и местом на диске
+        """
+        return self.capacity.snapshot()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики дедупликации конвертаций
+
+        Returns:
+            Словарь со счетчиками
+        """
+        return {
+            "conversions": self.single_flight.executed,
+            "coalesced": self.single_flight.coalesced,
+            "in_flight": self.single_flight.in_flight()
+        }
+
     def get_supported_formats(self) -> list:
         """
         Возвращает список поддерживаемых форматов
@@ -112,6 +754,7 @@ class ConverterService:
         """
         try:
             file_path = os.path.join(settings.UPLOAD_DIR, filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
             
             with open(file_path, 'wb') as f:
                 f.write(file_content)
@@ -123,20 +766,70 @@ class ConverterService:
             self.logger.error(f"Ошибка при сохранении файла {filename}: {e}")
             return None
     
+    def spool_upload(self, file_content: Union[bytes, BinaryIO], filename: str) -> Optional[Tuple[str, str]]:
+        """
+        Сохраняет загрузку в отдельный каталог спула, считая SHA-256 по ходу записи
+        
+        Поток копируется частями, поэтому загрузка не читается в память целиком.
+        
+        Args:
+            file_content: Содержимое файла или бинарный поток
+            filename: Имя файла
+            
+        Returns:
+            Пара (путь к сохраненному файлу, hex SHA-256) или None при ошибке
+        """
+        # Отдельный каталог, чтобы параллельные конвертации не затирали файлы друг друга
+        file_path = os.path.join(settings.UPLOAD_DIR, uuid.uuid4().hex, Path(filename).name)
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            digest = hashlib.sha256()
+            with open(file_path, 'wb') as f:
+                if isinstance(file_content, (bytes, bytearray)):
+                    digest.update(file_content)
+                    f.write(file_content)
+                else:
+                    for block in iter(lambda: file_content.read(1024 * 1024), b''):
+                        digest.update(block)
+                        f.write(block)
+            self.logger.info(f"Файл сохранен: {file_path}")
+            return file_path, digest.hexdigest()
+        except Exception as e:
+            self.logger.error(f"Ошибка при сохранении файла {filename}: {e}")
+            self.cleanup_file(file_path)
+            self.cleanup_file(os.path.dirname(file_path))
+            return None
+    
     def cleanup_file(self, file_path: str) -> None:
         """
-        Удаляет временный файл
+        Удаляет временный файл или пустой каталог спула
         
         Args:
             file_path: Путь к файлу
         """
         try:
-            if os.path.exists(file_path):
+            if os.path.isdir(file_path):
+                os.rmdir(file_path)
+                self.logger.info(f"Каталог удален: {file_path}")
+            elif os.path.exists(file_path):
                 os.remove(file_path)
                 self.logger.info(f"Файл удален: {file_path}")
         except Exception as e:
             self.logger.error(f"Ошибка при удалении файла {file_path}: {e}")
 
+    def _cleanup_spooled(self, spool: "asyncio.Future") -> None:
+        """
+        Удаляет файл спула и его каталог по завершенному future spool_upload
+        
+        Args:
+            spool: Future с результатом spool_upload
+        """
+        if spool.cancelled() or spool.exception() is not None or spool.result() is None:
+            return
+        saved_file_path, _ = spool.result()
+        self.cleanup_file(saved_file_path)
+        self.cleanup_file(os.path.dirname(saved_file_path))
+
 
 # Создаем экземпляр сервиса
 converter_service = ConverterService()
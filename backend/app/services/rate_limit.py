@@ -0,0 +1,276 @@
+"""
+Ограничение частоты конвертаций по клиентам (token bucket)
+"""
+
+import math
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+from app.core.config import settings
+
+
+# Атомарное списание из корзины в Redis: время берется у сервера Redis,
+# поэтому воркеры на разных машинах видят одни и те же корзины
+_REDIS_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local required = math.min(cost, burst)
+local wait = 0
+if tokens < required then
+    wait = (required - tokens) / rate
+else
+    tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class MemoryBucketStore:
+    """
+    Корзины в памяти процесса.
+
+    Корзина - [токены, время обновления, время полного наполнения]. Полная
+    корзина ничем не отличается от отсутствующей, поэтому при превышении
+    max_keys сначала удаляются наполнившиеся корзины, затем те, что
+    наполнятся раньше остальных.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        """
+        Инициализация
+
+        Args:
+            max_keys: Максимальное число корзин в памяти
+            clock: Источник времени в секундах
+        """
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """
+        Списывает стоимость из корзины клиента
+
+        Стоимость больше емкости корзины списывается с полной корзины в долг:
+        большой документ не отклоняется навсегда, но следующие запросы клиента
+        ждут, пока долг не погасится.
+
+        Args:
+            key: Ключ клиента
+            cost: Стоимость запроса в единицах
+            rate: Пополнение корзины в единицах в секунду
+            burst: Емкость корзины
+
+        Returns:
+            0 если запрос разрешен, иначе сколько секунд ждать
+        """
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                bucket = self._buckets[key] = [burst, now, now]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            required = min(cost, burst)
+            if tokens < required:
+                bucket[0] = tokens
+                return (required - tokens) / rate
+            bucket[0] = tokens - cost
+            bucket[2] = now + (burst - bucket[0]) / rate
+            return 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        """Освобождает место для новых корзин (вызывается под блокировкой)"""
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        excess = len(self._buckets) - self.max_keys // 2
+        if excess > 0:
+            for key, _ in sorted(self._buckets.items(), key=lambda item: item[1][2])[:excess]:
+                del self._buckets[key]
+
+
+class RedisBucketStore:
+    """
+    Корзины в Redis, общие для всех воркеров.
+
+    Списание - один вызов Lua-скрипта. Если Redis недоступен, корзины
+    временно ведутся в памяти процесса: лимит продолжает действовать на
+    каждый воркер, а не снимается.
+    """
+
+    def __init__(self, url: str, prefix: str = "doc-converter:rate:"):
+        """
+        Инициализация
+
+        Args:
+            url: Адрес Redis (redis://host:6379/0)
+            prefix: Префикс ключей корзин
+        """
+        import redis
+
+        self.prefix = prefix
+        self._errors = (redis.RedisError, OSError)
+        self._script = redis.Redis.from_url(url, socket_timeout=0.5).register_script(_REDIS_TAKE_SCRIPT)
+        self._fallback = MemoryBucketStore()
+        self.logger = logging.getLogger(__name__)
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Списывает стоимость из корзины клиента (см. MemoryBucketStore.take)"""
+        try:
+            return float(self._script(keys=[self.prefix + key], args=[rate, burst, cost]))
+        except self._errors as e:
+            self.logger.warning(f"Redis недоступен, лимиты ведутся в памяти процесса: {e}")
+            return self._fallback.take(key, cost, rate, burst)
+
+
+class RateLimiter:
+    """
+    Лимиты конвертаций по клиентам.
+
+    Клиент - API-ключ из настроенных (у ключа могут быть свои rate и burst),
+    иначе IP-адрес. Запросы списывают из корзины оценку стоимости
+    конвертации по размеру (units_for_size), а не 1 за запрос: большой
+    документ стоит больше, чем короткий TXT.
+    """
+
+    def __init__(self, rate: float, burst: float, clients: Optional[Dict[str, Dict[str, float]]] = None,
+                 min_cost: float = 1.0, store: Optional[Any] = None, enabled: bool = True):
+        """
+        Инициализация
+
+        Args:
+            rate: Пополнение корзины клиента в единицах стоимости в секунду
+            burst: Емкость корзины
+            clients: Лимиты API-ключей: {ключ: {"rate": ..., "burst": ...}}
+            min_cost: Минимальная стоимость запроса
+            store: Хранилище корзин (по умолчанию в памяти процесса)
+            enabled: Включены ли лимиты
+        """
+        if enabled and (rate <= 0 or burst <= 0):
+            raise ValueError("rate и burst должны быть положительными")
+        self.rate = rate
+        self.burst = burst
+        # Ключи корзин - хеши API-ключей, чтобы ключи не попадали в Redis и логи
+        self._client_ids = {
+            api_key: hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16] for api_key in clients or {}
+        }
+        self._client_limits = {
+            self._client_ids[api_key]: (limits.get("rate", rate), limits.get("burst", burst))
+            for api_key, limits in (clients or {}).items()
+        }
+        self.min_cost = min_cost
+        self.store = store if store is not None else MemoryBucketStore()
+        self.enabled = enabled
+
+    def client_key(self, api_key: Optional[str], address: Optional[str]) -> str:
+        """
+        Ключ корзины клиента
+
+        Неизвестные API-ключи не дают отдельной корзины, иначе лимит по IP
+        обходился бы сменой ключа.
+
+        Args:
+            api_key: Значение X-API-Key или None
+            address: IP-адрес клиента
+
+        Returns:
+            Ключ корзины
+        """
+        client_id = self._client_ids.get(api_key) if api_key else None
+        if client_id is not None:
+            return f"key:{client_id}"
+        return f"ip:{address or 'unknown'}"
+
+    def limits(self, client: str) -> Tuple[float, float]:
+        """
+        Лимиты клиента
+
+        Args:
+            client: Ключ корзины из client_key
+
+        Returns:
+            Пара (rate, burst)
+        """
+        if client.startswith("key:"):
+            return self._client_limits.get(client[4:], (self.rate, self.burst))
+        return self.rate, self.burst
+
+    def acquire(self, client: str, cost: float) -> float:
+        """
+        Списывает стоимость запроса
+
+        Args:
+            client: Ключ корзины из client_key
+            cost: Оценка стоимости конвертации в единицах
+
+        Returns:
+            0 если запрос разрешен, иначе через сколько секунд повторить
+        """
+        if not self.enabled:
+            return 0.0
+        rate, burst = self.limits(client)
+        return self.store.take(client, max(cost, self.min_cost), rate, burst)
+
+
+def retry_after(wait: float) -> str:
+    """
+    Значение заголовка Retry-After
+
+    Args:
+        wait: Время ожидания в секундах
+
+    Returns:
+        Целое число секунд, округленное вверх
+    """
+    return str(max(1, math.ceil(wait)))
+
+
+def units_for_size(size: Optional[int]) -> float:
+    """
+    Оценка стоимости конвертации по размеру входа
+
+    Не требует чтения документа, поэтому проверка лимита не дороже
+    token bucket (см. benchmarks/bench_rate_limit.py).
+
+    Args:
+        size: Размер в байтах или None
+
+    Returns:
+        Стоимость в единицах
+    """
+    return (size or 0) / settings.RATE_LIMIT_BYTES_PER_UNIT
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Создает ограничитель по настройкам"""
+    store = RedisBucketStore(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else None
+    return RateLimiter(
+        rate=settings.RATE_LIMIT_RATE,
+        burst=settings.RATE_LIMIT_BURST,
+        clients=settings.RATE_LIMIT_CLIENTS,
+        min_cost=settings.RATE_LIMIT_MIN_COST,
+        store=store,
+        enabled=settings.RATE_LIMIT_ENABLED
+    )
+
+
+# Создаем экземпляр ограничителя
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,355 @@
+"""
+Хранилище результатов конвертации для отдачи файлами с HTTP-кэшированием
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import shutil
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union, BinaryIO
+
+from doc_converter.chunking import write_jsonl
+from doc_converter.compression import SUFFIXES, open_compressed, resolve_codec
+
+
+_RESULT_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+_SHARD_RE = re.compile(r'^[0-9a-f]{2}$')
+
+# Устаревшие результаты ищутся при сохранении не чаще раза за этот интервал
+_CLEANUP_INTERVAL = 60 * 60
+
+# Результат в режиме chunks хранится как JSONL, иначе как markdown
+_FORMATS = {
+    "markdown": (".md", "text/markdown; charset=utf-8"),
+    "chunks": (".jsonl", "application/x-ndjson"),
+}
+
+# Значение Content-Encoding для файлов хранилища (поток zlib - это HTTP deflate)
+HTTP_ENCODINGS = {"gzip": "gzip", "zstd": "zstd", "zlib": "deflate"}
+
+# Markdown, список секций или путь к markdown, уже записанному на диск
+Result = Union[str, List[Dict[str, Any]], os.PathLike]
+
+
+class ResultStore:
+    """
+    Хранит результаты в RESULTS_DIR/<id[:2]>/<id>.md|.jsonl с метаданными
+    рядом (<id>.json). Со сжатием к имени добавляется расширение кодека
+    (<id>.md.gz), кодек записывается в метаданные.
+
+    Идентификатор результата - SHA-256 от хеша исходного файла, расширения
+    и опций конвертации, поэтому повторная конвертация того же файла с теми
+    же опциями находит готовый результат. ETag считается по идентификатору
+    и хешу несжатого содержимого: он меняется только вместе с содержимым.
+
+    С ttl результаты старше ttl секунд удаляются (см. cleanup_expired):
+    повторная конвертация просто сохранит результат заново.
+    """
+
+    def __init__(self, root: str, compression: Optional[str] = None,
+                 level: Optional[int] = None, dictionary: Optional[bytes] = None,
+                 ttl: Optional[int] = None):
+        """
+        Инициализация
+
+        Args:
+            root: Каталог результатов
+            compression: Кодек сжатия результатов (gzip, zstd, zlib, auto) или None
+            level: Уровень сжатия
+            dictionary: Словарь сжатия для множества небольших похожих результатов
+            ttl: Время хранения результата в секундах (None или 0 - бессрочно)
+        """
+        self.root = root
+        self.codec = resolve_codec(compression, dictionary=dictionary is not None)
+        self.level = level
+        self.dictionary = dictionary if self.codec else None
+        # Результаты, сжатые другим словарем, прочитать нельзя: они считаются отсутствующими
+        self.dictionary_id = hashlib.sha256(dictionary).hexdigest()[:16] if self.dictionary else None
+        self.ttl = ttl or None
+        self._last_cleanup = 0.0
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def result_id(key: str) -> str:
+        """
+        Идентификатор результата по ключу конвертации
+
+        Args:
+            key: Ключ из хеша содержимого, расширения и опций
+
+        Returns:
+            Hex SHA-256 ключа
+        """
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает метаданные сохраненного результата
+
+        Args:
+            result_id: Идентификатор результата
+
+        Returns:
+            Метаданные с путем к файлу в поле path или None если результата нет
+        """
+        if not _RESULT_ID_RE.match(result_id):
+            return None
+        try:
+            with open(self._meta_path(result_id), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("dictionary") is not None and meta["dictionary"] != self.dictionary_id:
+            return None
+        path = self._data_path(result_id, meta["output_mode"], meta.get("encoding"))
+        if not os.path.isfile(path):
+            return None
+        return {**meta, "path": path}
+
+    def load(self, result_id: str, max_size: Optional[int] = None) -> Optional[Result]:
+        """
+        Читает сохраненный результат
+
+        Args:
+            result_id: Идентификатор результата
+            max_size: Результат больше этого размера в байтах (без сжатия) не
+                читается, вместо него возвращается путь к файлу
+
+        Returns:
+            Markdown, список секций, Path к большому результату или None если
+            результата нет
+        """
+        meta = self.get(result_id)
+        if meta is None:
+            return None
+        if max_size is not None and meta["size"] > max_size:
+            return Path(meta["path"])
+        try:
+            with open_compressed(meta["path"], 'rt', dictionary=self.dictionary) as f:
+                if meta["output_mode"] == "chunks":
+                    return [json.loads(line) for line in f if line.strip()]
+                return f.read()
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Ошибка при чтении результата {result_id}: {e}")
+            return None
+
+    def save(self, result_id: str, filename: str, result: Result) -> Dict[str, Any]:
+        """
+        Сохраняет результат атомарно (запись во временный файл и переименование)
+
+        Args:
+            result_id: Идентификатор результата
+            filename: Имя исходного файла
+            result: Markdown, список секций или путь к markdown файлу (файл
+                переносится в хранилище, поэтому должен лежать на той же
+                файловой системе - см. spool_path; при сжатии файл сжимается
+                потоково в хранилище и удаляется)
+
+        Returns:
+            Метаданные результата с путем к файлу в поле path
+        """
+        if self.ttl and time.time() - self._last_cleanup >= _CLEANUP_INTERVAL:
+            self.cleanup_expired()
+
+        output_mode = "chunks" if isinstance(result, list) else "markdown"
+        suffix, media_type = _FORMATS[output_mode]
+        data_path = self._data_path(result_id, output_mode, self.codec)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = f"{data_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if isinstance(result, os.PathLike) and self.codec is None:
+                os.replace(result, temp_path)
+            elif isinstance(result, os.PathLike):
+                with open(result, 'rb') as src, self._open_write(temp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.remove(result)
+            else:
+                with self._open_write(temp_path, 'wt') as f:
+                    if output_mode == "markdown":
+                        f.write(result)
+                    else:
+                        write_jsonl(result, f)
+            # Хеш и размер считаются по несжатому содержимому, повторным
+            # потоковым чтением записанного файла
+            with open_compressed(temp_path, 'rb', dictionary=self.dictionary) as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+                    size += len(block)
+            stored_size = os.path.getsize(temp_path)
+            os.replace(temp_path, data_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        etag = hashlib.sha256(f"{result_id}:{digest.hexdigest()}".encode('ascii')).hexdigest()[:32]
+        meta = {
+            "result_id": result_id,
+            "filename": f"{filename.rsplit('.', 1)[0]}{suffix}",
+            "output_mode": output_mode,
+            "media_type": media_type,
+            "size": size,
+            "etag": f'"{etag}"',
+            "encoding": self.codec,
+            "stored_size": stored_size,
+            "dictionary": self.dictionary_id,
+        }
+        meta_path = self._meta_path(result_id)
+        temp_meta = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_meta, meta_path)
+        return {**meta, "path": data_path}
+
+    def cleanup_expired(self) -> int:
+        """
+        Удаляет результаты старше ttl и брошенные временные файлы
+
+        Returns:
+            Количество удаленных результатов
+        """
+        self._last_cleanup = time.time()
+        if not self.ttl:
+            return 0
+        removed = 0
+        deadline = self._last_cleanup - self.ttl
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.name.endswith(".tmp"):
+                self._remove_if_older(entry.path, deadline)
+            elif entry.is_dir() and _SHARD_RE.match(entry.name):
+                removed += self._cleanup_shard(entry.path, deadline)
+        if removed:
+            self.logger.info(f"Удалено устаревших результатов: {removed}")
+        return removed
+
+    def _cleanup_shard(self, shard: str, deadline: float) -> int:
+        """Удаляет устаревшие результаты одного подкаталога хранилища"""
+        removed = 0
+        with os.scandir(shard) as entries:
+            names = [entry.name for entry in entries]
+        for name in names:
+            path = os.path.join(shard, name)
+            if name.endswith(".tmp"):
+                self._remove_if_older(path, deadline)
+                continue
+            result_id, _, suffix = name.partition(".")
+            if suffix != "json" or not _RESULT_ID_RE.match(result_id):
+                continue
+            # Сначала метаданные: без них результат считается отсутствующим.
+            # Файлы результата удаляются только старые - их могли пересохранить
+            if not self._remove_if_older(path, deadline):
+                continue
+            removed += 1
+            for other in names:
+                if other != name and other.startswith(result_id + "."):
+                    self._remove_if_older(os.path.join(shard, other), deadline)
+        return removed
+
+    @staticmethod
+    def _remove_if_older(path: str, deadline: float) -> bool:
+        """Удаляет файл, если он не изменялся с момента deadline"""
+        try:
+            if os.path.getmtime(path) >= deadline:
+                return False
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def open(self, meta: Dict[str, Any]) -> BinaryIO:
+        """
+        Открывает сохраненный результат на чтение с распаковкой на лету
+
+        Args:
+            meta: Метаданные из get
+
+        Returns:
+            Бинарный поток несжатого содержимого
+        """
+        return open_compressed(meta["path"], 'rb', dictionary=self.dictionary)
+
+    def spool_path(self) -> str:
+        """
+        Путь для временного markdown файла внутри хранилища
+
+        Результат, записанный по этому пути, сохраняется переименованием
+        без копирования.
+
+        Returns:
+            Путь к еще не существующему файлу
+        """
+        return os.path.join(self.root, f"{uuid.uuid4().hex}.md.tmp")
+
+    def _open_write(self, path: str, mode: str):
+        """Открывает временный файл результата на запись со сжатием хранилища"""
+        return open_compressed(path, mode, codec=self.codec, level=self.level,
+                               dictionary=self.dictionary, newline='')
+
+    def _data_path(self, result_id: str, output_mode: str, encoding: Optional[str] = None) -> str:
+        """Путь к файлу результата"""
+        suffix = _FORMATS[output_mode][0] + (SUFFIXES[encoding] if encoding else "")
+        return os.path.join(self.root, result_id[:2], result_id + suffix)
+
+    def _meta_path(self, result_id: str) -> str:
+        """Путь к метаданным результата"""
+        return os.path.join(self.root, result_id[:2], result_id + ".json")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение, как требует RFC 9110)
+
+    Args:
+        if_none_match: Значение заголовка или None
+        etag: Текущий ETag в кавычках
+
+    Returns:
+        True если клиенту можно ответить 304
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """
+    Проверяет принимает ли клиент содержимое, сжатое кодеком
+
+    Args:
+        accept_encoding: Значение заголовка Accept-Encoding или None
+        encoding: Значение Content-Encoding (gzip, zstd, deflate)
+
+    Returns:
+        True если файл можно отдать как есть с Content-Encoding
+    """
+    if not accept_encoding:
+        return False
+    names = {encoding, f"x-{encoding}"}
+    explicit = wildcard = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if name not in names and name != "*":
+            continue
+        quality = params.strip().replace(" ", "")
+        try:
+            accepted = float(quality[2:]) > 0 if quality.startswith("q=") else True
+        except ValueError:
+            accepted = False
+        # Явно названный кодек важнее "*" независимо от порядка
+        if name in names:
+            explicit = accepted
+        else:
+            wildcard = accepted
+    return explicit if explicit is not None else bool(wildcard)
@@ -0,0 +1,148 @@
+"""
+Дедупликация одновременных одинаковых конвертаций (single-flight)
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    """Выполняющийся вызов, к которому присоединяются ожидающие"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # False, если ведущий был отменен и результата нет
+        self.completed = False
+        self.waiters = 0
+
+
+class _AsyncCall:
+    """Выполняющийся вызов в event loop"""
+
+    def __init__(self, future: asyncio.Future):
+        # Результат - (completed, result, error): исключение в future не
+        # кладется, чтобы не было предупреждений о неполученном исключении
+        self.future = future
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Гарантирует, что для одного ключа одновременно выполняется не больше
+    одного вызова. Остальные вызовы с тем же ключом дожидаются его
+    завершения и получают тот же результат.
+
+    Ошибку ведущего (Exception) получают все ожидающие. Отмена ведущего
+    (BaseException: CancelledError, ConversionCancelled) к ожидающим не
+    переходит: один из них повторяет вызов как новый ведущий.
+    """
+
+    def __init__(self):
+        """Инициализация группы вызовов"""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[str, _AsyncCall] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Выполняет fn или присоединяется к уже выполняющемуся вызову
+
+        Args:
+            key: Ключ дедупликации
+            fn: Функция без аргументов
+
+        Returns:
+            Кортеж (результат, shared), где shared=True если результат
+            получен от чужого вызова
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    call.waiters += 1
+                    self.coalesced += 1
+                else:
+                    call = self._calls[key] = _Call()
+                    self.executed += 1
+                    break
+
+            call.done.wait()
+            if not call.completed:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            call.completed = True
+        except Exception as e:
+            call.error = e
+            call.completed = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, call.waiters > 0
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Вариант do для корутин: ожидающие ждут в event loop и не занимают
+        потоков и слотов пула
+
+        Args:
+            key: Ключ дедупликации
+            fn: Функция без аргументов, возвращающая awaitable
+
+        Returns:
+            Кортеж (результат, shared), см. do
+        """
+        while True:
+            with self._lock:
+                call = self._async_calls.get(key)
+                if call is not None:
+                    call.waiters += 1
+                    self.coalesced += 1
+                else:
+                    call = self._async_calls[key] = _AsyncCall(asyncio.get_running_loop().create_future())
+                    self.executed += 1
+                    break
+
+            # shield: отмена ожидающего не отменяет общий future
+            completed, result, error = await asyncio.shield(call.future)
+            if not completed:
+                continue
+            if error is not None:
+                raise error
+            return result, True
+
+        outcome = (False, None, None)
+        try:
+            result = await fn()
+            outcome = (True, result, None)
+        except Exception as e:
+            outcome = (True, None, e)
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[key]
+            call.future.set_result(outcome)
+
+        return result, call.waiters > 0
+
+    def in_flight(self) -> int:
+        """
+        Возвращает количество выполняющихся вызовов
+
+        Returns:
+            Количество уникальных ключей в работе
+        """
+        with self._lock:
+            return len(self._calls) + len(self._async_calls)
@@ -0,0 +1,301 @@
+"""
+Сервис возобновляемых загрузок файлов по частям
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator
+
+from app.core.config import settings
+
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_COPY_BUFFER = 1024 * 1024
+
+
+class UploadError(Exception):
+    """Ошибка загрузки по частям с HTTP статусом для ответа"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def manifest_checksum(chunk_digests: List[str]) -> str:
+    """
+    Контрольная сумма файла по списку SHA-256 его частей
+
+    SHA-256 от последовательно склеенных hex-дайджестов частей. Клиент
+    может посчитать ее, читая файл по одной части, без буферизации всего
+    файла в памяти.
+
+    Args:
+        chunk_digests: Hex-дайджесты частей по порядку
+
+    Returns:
+        Hex-дайджест манифеста
+    """
+    return hashlib.sha256(''.join(chunk_digests).encode('ascii')).hexdigest()
+
+
+class UploadService:
+    """
+    Хранит части загрузок в спуле UPLOAD_DIR/chunked/<upload_id>/.
+
+    Каждая часть пишется в отдельный файл атомарно, поэтому части можно
+    отправлять параллельно и повторно; статус загрузки вычисляется по
+    файлам на диске и переживает перезапуск сервера.
+    """
+
+    def __init__(self, spool_dir: Optional[str] = None):
+        """
+        Инициализация сервиса
+
+        Args:
+            spool_dir: Каталог спула (по умолчанию UPLOAD_DIR/chunked)
+        """
+        self.spool_dir = spool_dir or os.path.join(settings.UPLOAD_DIR, "chunked")
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._finalizing = set()
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def create(self, filename: str, size: int, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Создает новую загрузку
+
+        Args:
+            filename: Имя файла
+            size: Полный размер файла в байтах
+            chunk_size: Размер части (по умолчанию UPLOAD_CHUNK_SIZE)
+
+        Returns:
+            Описание загрузки
+        """
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        if size <= 0:
+            raise UploadError(400, "Размер файла должен быть положительным")
+        if size > settings.MAX_FILE_SIZE:
+            raise UploadError(
+                413, f"Файл слишком большой. Максимальный размер: {settings.MAX_FILE_SIZE} байт"
+            )
+        if not settings.MIN_UPLOAD_CHUNK_SIZE <= chunk_size <= settings.MAX_UPLOAD_CHUNK_SIZE:
+            raise UploadError(
+                400,
+                f"Размер части должен быть от {settings.MIN_UPLOAD_CHUNK_SIZE} "
+                f"до {settings.MAX_UPLOAD_CHUNK_SIZE} байт"
+            )
+
+        self.cleanup_expired()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "filename": os.path.basename(filename),
+            "size": size,
+            "chunk_size": chunk_size,
+            "total_chunks": (size + chunk_size - 1) // chunk_size,
+            "created_at": time.time()
+        }
+        upload_dir = self._upload_dir(upload_id)
+        os.makedirs(upload_dir)
+        with open(os.path.join(upload_dir, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        self.logger.info(f"Создана загрузка {upload_id}: {filename} ({size} байт)")
+        return meta
+
+    def append_chunk(self, upload_id: str, index: int, data: bytes,
+                     checksum: Optional[str] = None) -> str:
+        """
+        Сохраняет часть загрузки
+
+        Args:
+            upload_id: Идентификатор загрузки
+            index: Номер части с нуля
+            data: Содержимое части
+            checksum: Ожидаемый SHA-256 части (hex), если клиент его передал
+
+        Returns:
+            SHA-256 сохраненной части
+        """
+        meta = self._load_meta(upload_id)
+        if not 0 <= index < meta["total_chunks"]:
+            raise UploadError(400, f"Номер части вне диапазона 0..{meta['total_chunks'] - 1}")
+
+        expected_size = meta["chunk_size"]
+        if index == meta["total_chunks"] - 1:
+            expected_size = meta["size"] - meta["chunk_size"] * index
+        if len(data) != expected_size:
+            raise UploadError(400, f"Неверный размер части {index}: {len(data)}, ожидалось {expected_size}")
+
+        digest = hashlib.sha256(data).hexdigest()
+        if checksum and checksum.lower() != digest:
+            raise UploadError(400, f"Контрольная сумма части {index} не совпадает")
+
+        chunk_path = self._chunk_path(upload_id, index)
+        tmp_path = f"{chunk_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, chunk_path)
+        return digest
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Возвращает состояние загрузки
+
+        Args:
+            upload_id: Идентификатор загрузки
+
+        Returns:
+            Описание загрузки со списком полученных частей
+        """
+        meta = self._load_meta(upload_id)
+        received = self._received_chunks(upload_id)
+        return {
+            **meta,
+            "received": received,
+            "complete": len(received) == meta["total_chunks"]
+        }
+
+    def assemble(self, upload_id: str, checksum: str) -> Dict[str, Any]:
+        """
+        Собирает файл из частей и проверяет контрольную сумму манифеста
+
+        Args:
+            upload_id: Идентификатор загрузки
+            checksum: Ожидаемая контрольная сумма (см. manifest_checksum)
+
+        Returns:
+            Описание загрузки с путем к собранному файлу в поле path
+            и SHA-256 его содержимого в поле sha256
+        """
+        meta = self._load_meta(upload_id)
+        received = set(self._received_chunks(upload_id))
+        missing = [i for i in range(meta["total_chunks"]) if i not in received]
+        if missing:
+            raise UploadError(409, f"Не получены части: {missing[:20]}")
+
+        # Отдельный каталог: имя файла не должно совпасть с meta.json или частями
+        assembled_path = os.path.join(self._upload_dir(upload_id), "assembled", meta["filename"])
+        os.makedirs(os.path.dirname(assembled_path), exist_ok=True)
+        # Сборка во временный файл: параллельная сборка не испортит готовый файл
+        tmp_path = f"{assembled_path}.{uuid.uuid4().hex}.tmp"
+        digests = []
+        file_hash = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as output:
+                for index in range(meta["total_chunks"]):
+                    chunk_hash = hashlib.sha256()
+                    with open(self._chunk_path(upload_id, index), 'rb') as chunk:
+                        while True:
+                            block = chunk.read(_COPY_BUFFER)
+                            if not block:
+                                break
+                            chunk_hash.update(block)
+                            file_hash.update(block)
+                            output.write(block)
+                    digests.append(chunk_hash.hexdigest())
+
+            if manifest_checksum(digests) != checksum.lower():
+                raise UploadError(422, "Контрольная сумма файла не совпадает")
+            os.replace(tmp_path, assembled_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # Части больше не нужны, в спуле остается только собранный файл
+        for index in range(meta["total_chunks"]):
+            os.remove(self._chunk_path(upload_id, index))
+
+        return {**meta, "path": assembled_path, "sha256": file_hash.hexdigest()}
+
+    @contextmanager
+    def finalizing(self, upload_id: str) -> Iterator[None]:
+        """
+        Не дает одновременно собирать и конвертировать одну загрузку
+
+        Повторный finalize, пока первый не завершился, получает 409, а не
+        ждет: первый запрос удалит загрузку после конвертации.
+
+        Args:
+            upload_id: Идентификатор загрузки
+        """
+        self._check_id(upload_id)
+        with self._lock:
+            if upload_id in self._finalizing:
+                raise UploadError(409, "Загрузка уже собирается")
+            self._finalizing.add(upload_id)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._finalizing.discard(upload_id)
+
+    def delete(self, upload_id: str) -> None:
+        """
+        Удаляет загрузку со всеми частями
+
+        Args:
+            upload_id: Идентификатор загрузки
+        """
+        self._check_id(upload_id)
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+    def cleanup_expired(self) -> int:
+        """
+        Удаляет брошенные загрузки старше UPLOAD_TTL
+
+        Returns:
+            Количество удаленных загрузок
+        """
+        removed = 0
+        deadline = time.time() - settings.UPLOAD_TTL
+        for entry in os.scandir(self.spool_dir):
+            if entry.is_dir() and _UPLOAD_ID_RE.match(entry.name) and entry.stat().st_mtime < deadline:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        if removed:
+            self.logger.info(f"Удалено брошенных загрузок: {removed}")
+        return removed
+
+    def _check_id(self, upload_id: str) -> None:
+        """Проверяет формат идентификатора, чтобы он не выходил за спул"""
+        if not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadError(404, "Загрузка не найдена")
+
+    def _upload_dir(self, upload_id: str) -> str:
+        return os.path.join(self.spool_dir, upload_id)
+
+    def _chunk_path(self, upload_id: str, index: int) -> str:
+        return os.path.join(self._upload_dir(upload_id), f"{index:08d}.part")
+
+    def _load_meta(self, upload_id: str) -> Dict[str, Any]:
+        """Читает метаданные загрузки"""
+        self._check_id(upload_id)
+        try:
+            with open(os.path.join(self._upload_dir(upload_id), "meta.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError(404, "Загрузка не найдена")
+
+    def _received_chunks(self, upload_id: str) -> List[int]:
+        """Возвращает номера сохраненных частей"""
+        received = []
+        for name in os.listdir(self._upload_dir(upload_id)):
+            if name.endswith(".part"):
+                received.append(int(name[:-len(".part")]))
+        return sorted(received)
+
+
+# Создаем экземпляр сервиса
+upload_service = UploadService()
@@ -0,0 +1,16 @@
+"""
+Общие настройки тестов бэкенда
+"""
+
+import os
+import sys
+import tempfile
+
+# Модули бэкенда импортируются как пакет app, как при запуске uvicorn из backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Пакет doc_converter лежит в корне репозитория: тесты запускаются и из backend/
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Сервисы модулей app.services создают каталоги спула при импорте: не в рабочем каталоге
+os.environ.setdefault('UPLOAD_DIR', tempfile.mkdtemp(prefix='doc-converter-uploads-'))
+os.environ.setdefault('OUTPUT_DIR', tempfile.mkdtemp(prefix='doc-converter-output-'))
@@ -0,0 +1,155 @@
+"""
+Тесты для учета слотов конвертации и проверки готовности
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.capacity import CapacityTracker
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    """Ждет выполнения условия"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "условие не выполнилось"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    """Прогретый трекер на два слота с очередью до трех запросов"""
+    tracker = CapacityTracker(slots=2, max_queue_depth=3, spool_dir=str(tmp_path), min_free_disk=0)
+    tracker.mark_warm()
+    return tracker
+
+
+def hold_slot(tracker: CapacityTracker, entered: threading.Event, release: threading.Event,
+              count: int = 1) -> threading.Thread:
+    """Запускает поток, который занимает count слотов до release"""
+    def worker():
+        with tracker.slot(count):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    return thread
+
+
+class TestSlot:
+    """Тесты CapacityTracker.slot"""
+
+    def test_accounting(self, tracker):
+        """Тест счетчиков занятых слотов и ожидающих"""
+        release = threading.Event()
+        entered = [threading.Event() for _ in range(3)]
+        threads = [hold_slot(tracker, entered[i], release) for i in range(2)]
+        for event in entered[:2]:
+            assert event.wait(5)
+        assert tracker.snapshot()["slots_free"] == 0
+
+        # Третий запрос ждет в очереди
+        threads.append(hold_slot(tracker, entered[2], release))
+        wait_until(lambda: tracker.snapshot()["queue_depth"] == 1)
+        assert not entered[2].is_set()
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        snapshot = tracker.snapshot()
+        assert entered[2].is_set()
+        assert snapshot["slots_free"] == 2 and snapshot["queue_depth"] == 0
+
+    def test_released_on_error(self, tracker):
+        """Тест что слот освобождается при исключении"""
+        with pytest.raises(ValueError):
+            with tracker.slot():
+                assert tracker.snapshot()["slots_free"] == 1
+                raise ValueError("ошибка конвертации")
+        assert tracker.snapshot()["slots_free"] == 2
+
+    def test_multiple_slots(self, tracker):
+        """Тест что конвертация в несколько потоков ждет все свои слоты"""
+        release_single, release_multi = threading.Event(), threading.Event()
+        single_entered, multi_entered = threading.Event(), threading.Event()
+        single = hold_slot(tracker, single_entered, release_single)
+        assert single_entered.wait(5)
+
+        multi = hold_slot(tracker, multi_entered, release_multi, count=2)
+        wait_until(lambda: tracker.snapshot()["queue_depth"] == 1)
+        assert not multi_entered.is_set()
+
+        release_single.set()
+        single.join(5)
+        assert multi_entered.wait(5)
+        assert tracker.snapshot()["slots_free"] == 0
+
+        release_multi.set()
+        multi.join(5)
+        assert tracker.snapshot()["slots_free"] == 2
+
+    def test_invalid_count(self, tracker):
+        """Тест что нельзя занять больше слотов, чем есть"""
+        with pytest.raises(ValueError):
+            with tracker.slot(3):
+                pass
+        assert tracker.snapshot()["slots_free"] == 2
+
+
+class TestSnapshot:
+    """Тесты причин неготовности в CapacityTracker.snapshot"""
+
+    def test_ready(self, tracker):
+        """Тест готового сервиса"""
+        snapshot = tracker.snapshot()
+        assert snapshot["ready"] is True and snapshot["reasons"] == []
+
+    def test_not_warm(self, tmp_path):
+        """Тест что до прогрева и после ошибки прогрева сервис не готов"""
+        tracker = CapacityTracker(slots=2, max_queue_depth=3, spool_dir=str(tmp_path), min_free_disk=0)
+        assert tracker.snapshot()["reasons"] == ["прогрев не завершен"]
+        tracker.mark_warm("бэкенд не загрузился")
+        assert tracker.snapshot()["reasons"] == ["бэкенд не загрузился"]
+        tracker.mark_warm()
+        assert tracker.snapshot()["ready"] is True
+
+    def test_queue_full(self, tracker):
+        """Тест что сервис не готов, только когда заняты все слоты и очередь заполнена"""
+        queued = [0]
+        tracker.add_queue_source(lambda: queued[0])
+        release = threading.Event()
+        entered = [threading.Event(), threading.Event()]
+        threads = [hold_slot(tracker, event, release) for event in entered]
+        try:
+            for event in entered:
+                assert event.wait(5)
+            # Слоты заняты, но очередь короче MAX_QUEUE_DEPTH
+            queued[0] = 2
+            assert tracker.snapshot()["ready"] is True
+
+            queued[0] = 3
+            snapshot = tracker.snapshot()
+            assert snapshot["queue_depth"] == 3
+            assert snapshot["reasons"] == ["все слоты заняты, очередь заполнена"]
+        finally:
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        # Длинная очередь при свободных слотах не мешает готовности
+        assert tracker.snapshot()["ready"] is True
+
+    def test_low_disk(self, tmp_path):
+        """Тест нехватки места и недоступного каталога спула"""
+        tracker = CapacityTracker(slots=2, max_queue_depth=3, spool_dir=str(tmp_path), min_free_disk=2 ** 62)
+        tracker.mark_warm()
+        assert tracker.snapshot()["reasons"] == ["мало места в каталоге загрузок"]
+
+        tracker = CapacityTracker(slots=2, max_queue_depth=3, spool_dir=str(tmp_path / "missing"), min_free_disk=0)
+        tracker.mark_warm()
+        snapshot = tracker.snapshot()
+        assert snapshot["disk_free"] is None
+        assert snapshot["reasons"] == ["мало места в каталоге загрузок"]
@@ -0,0 +1,44 @@
+"""
+Тесты для сервиса конвертации
+"""
+
+import pytest
+
+from app.services.converter_service import converter_service
+
+
+class TestLowMemory:
+    """Тесты конвертации больших загрузок по страницам"""
+
+    def test_required_capabilities(self):
+        """Тест что в режиме low_memory форматирование не обязательно"""
+        assert converter_service.required_capabilities({}) == ["formatting"]
+        assert converter_service.required_capabilities({"preserve_formatting": False}) == []
+        assert converter_service.required_capabilities({"preserve_formatting": True}, low_memory=True) == []
+
+    def test_large_upload_streams(self, tmp_path, monkeypatch):
+        """Тест что большой TXT с опциями по умолчанию конвертируется по страницам, а не целиком"""
+        converter = converter_service.converter
+        monkeypatch.setattr(converter, "memory_budget", 64 * 1024)
+        path = tmp_path / "big.txt"
+        path.write_text("Строка большого документа.\n" * 4000, encoding="utf-8")
+
+        streamed = []
+        iter_pages = converter.selector.iter_pages
+
+        def spy(*args, **kwargs):
+            pages = iter_pages(*args, **kwargs)
+            streamed.append(pages is not None)
+            return pages
+
+        def convert_whole(*args, **kwargs):
+            pytest.fail("документ конвертирован целиком")
+
+        monkeypatch.setattr(converter.selector, "iter_pages", spy)
+        monkeypatch.setattr(converter, "_convert_document", convert_whole)
+
+        options = {"preserve_formatting": True}
+        assert converter.is_low_memory(str(path))
+        result = converter_service.convert_file(str(path), options, document_key="big")
+        assert streamed == [True]
+        assert isinstance(result, str) and "Строка большого документа." in result
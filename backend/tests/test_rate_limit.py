@@ -0,0 +1,182 @@
+"""
+Тесты для ограничения частоты конвертаций
+"""
+
+import sys
+import types
+
+import pytest
+
+from app.services.rate_limit import (
+    MemoryBucketStore, RateLimiter, RedisBucketStore, retry_after, units_for_size
+)
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Часы, стоящие на нуле, пока тест их не сдвинет"""
+    return FakeClock()
+
+
+class TestMemoryBucketStore:
+    """Тесты MemoryBucketStore.take (rate=1, burst=10)"""
+
+    def test_refill(self, clock):
+        """Тест пополнения корзины со временем и ограничения емкостью"""
+        store = MemoryBucketStore(clock=clock)
+        assert store.take("a", 10, 1.0, 10) == 0
+        assert store.take("a", 1, 1.0, 10) == pytest.approx(1.0)
+        clock.now = 0.5
+        assert store.take("a", 1, 1.0, 10) == pytest.approx(0.5)
+        clock.now = 1.0
+        assert store.take("a", 1, 1.0, 10) == 0
+
+        # Долгий простой не копит токенов больше емкости
+        clock.now = 100.0
+        assert store.take("a", 10, 1.0, 10) == 0
+        assert store.take("a", 1, 1.0, 10) == pytest.approx(1.0)
+
+    def test_debt(self, clock):
+        """Тест что стоимость больше емкости списывается в долг с полной корзины"""
+        store = MemoryBucketStore(clock=clock)
+        assert store.take("a", 25, 1.0, 10) == 0
+        # Долг 15 единиц: следующий запрос ждет его погашения и единицу на себя
+        assert store.take("a", 1, 1.0, 10) == pytest.approx(16.0)
+        # Большой запрос не может ждать больше емкости корзины
+        clock.now = 6.0
+        assert store.take("a", 25, 1.0, 10) == pytest.approx(19.0)
+        clock.now = 25.0
+        assert store.take("a", 25, 1.0, 10) == 0
+
+    def test_clients_independent(self, clock):
+        """Тест что у клиентов отдельные корзины"""
+        store = MemoryBucketStore(clock=clock)
+        assert store.take("a", 10, 1.0, 10) == 0
+        assert store.take("b", 10, 1.0, 10) == 0
+        assert store.take("a", 1, 1.0, 10) > 0
+
+    def test_evicts_full_buckets_first(self, clock):
+        """Тест что при переполнении сначала удаляются наполнившиеся корзины"""
+        store = MemoryBucketStore(max_keys=4, clock=clock)
+        # Корзины наполнятся к моментам 1, 5, 8 и 2
+        for key, cost in (("a", 1), ("b", 5), ("c", 8), ("d", 2)):
+            store.take(key, cost, 1.0, 10)
+        clock.now = 3.0
+        store.take("e", 1, 1.0, 10)
+
+        assert len(store) == 3
+        # Долг b и c сохранился
+        assert store.take("b", 10, 1.0, 10) == pytest.approx(2.0)
+        assert store.take("c", 10, 1.0, 10) == pytest.approx(5.0)
+
+    def test_evicts_soonest_full(self, clock):
+        """Тест что без наполнившихся корзин удаляются те, что наполнятся раньше"""
+        store = MemoryBucketStore(max_keys=4, clock=clock)
+        for key, cost in (("a", 1), ("b", 5), ("c", 8), ("d", 2)):
+            store.take(key, cost, 1.0, 10)
+        clock.now = 0.5
+        store.take("e", 1, 1.0, 10)
+
+        assert len(store) == 3
+        # b и c ждут, удаленная a снова полная
+        assert store.take("b", 10, 1.0, 10) > 0
+        assert store.take("c", 10, 1.0, 10) > 0
+        assert store.take("a", 10, 1.0, 10) == 0
+
+
+class TestRateLimiter:
+    """Тесты RateLimiter"""
+
+    def test_client_key(self):
+        """Тест что только известный API-ключ дает отдельную корзину"""
+        limiter = RateLimiter(rate=1.0, burst=10.0, clients={"secret": {"rate": 5.0, "burst": 100.0}})
+        client = limiter.client_key("secret", "10.0.0.1")
+        assert client.startswith("key:") and "secret" not in client
+        assert limiter.client_key("secret", "10.0.0.2") == client
+        assert limiter.limits(client) == (5.0, 100.0)
+
+        assert limiter.client_key("unknown", "10.0.0.1") == "ip:10.0.0.1"
+        assert limiter.client_key(None, "10.0.0.1") == "ip:10.0.0.1"
+        assert limiter.client_key(None, None) == "ip:unknown"
+        assert limiter.limits("ip:10.0.0.1") == (1.0, 10.0)
+
+    def test_acquire(self, clock):
+        """Тест лимитов ключа, минимальной стоимости и выключенного ограничителя"""
+        limiter = RateLimiter(rate=1.0, burst=10.0, clients={"secret": {"burst": 100.0}},
+                              min_cost=2.0, store=MemoryBucketStore(clock=clock))
+        ip = limiter.client_key(None, "10.0.0.1")
+        for _ in range(5):
+            assert limiter.acquire(ip, 0) == 0
+        assert limiter.acquire(ip, 0) == pytest.approx(2.0)
+        assert limiter.acquire(limiter.client_key("secret", "10.0.0.1"), 50) == 0
+
+        disabled = RateLimiter(rate=0, burst=0, enabled=False)
+        assert disabled.acquire("ip:10.0.0.1", 1e9) == 0
+
+    def test_invalid_limits(self):
+        """Тест некорректных rate и burst"""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0, burst=10.0)
+
+
+class TestRedisBucketStore:
+    """Тесты RedisBucketStore без сервера Redis"""
+
+    @pytest.fixture
+    def fake_redis(self, monkeypatch):
+        """Модуль redis, скрипт которого падает, пока failing=True"""
+        module = types.ModuleType("redis")
+        state = {"failing": True, "calls": 0}
+
+        class RedisError(Exception):
+            pass
+
+        def script(keys, args):
+            state["calls"] += 1
+            if state["failing"]:
+                raise RedisError("Connection refused")
+            return b"0"
+
+        class Redis:
+            @classmethod
+            def from_url(cls, url, **kwargs):
+                return cls()
+
+            def register_script(self, source):
+                return script
+
+        module.RedisError = RedisError
+        module.Redis = Redis
+        monkeypatch.setitem(sys.modules, "redis", module)
+        return state
+
+    def test_fallback_to_memory(self, fake_redis):
+        """Тест что при недоступном Redis лимит ведется в памяти, а не снимается"""
+        store = RedisBucketStore("redis://localhost:6379/0")
+        assert store.take("ip:a", 10, 1.0, 10) == 0
+        assert store.take("ip:a", 10, 1.0, 10) > 0
+        assert fake_redis["calls"] == 2
+
+        fake_redis["failing"] = False
+        assert store.take("ip:a", 10, 1.0, 10) == 0
+        assert fake_redis["calls"] == 3
+
+
+def test_retry_after_and_units(monkeypatch):
+    """Тест Retry-After и оценки стоимости по размеру"""
+    assert retry_after(0.01) == "1"
+    assert retry_after(2.1) == "3"
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "RATE_LIMIT_BYTES_PER_UNIT", 1024)
+    assert units_for_size(10 * 1024) == 10
+    assert units_for_size(None) == 0
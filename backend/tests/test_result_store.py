@@ -0,0 +1,145 @@
+"""
+Тесты для хранилища результатов конвертации
+"""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.result_store import ResultStore, accepts_encoding, etag_matches
+
+
+MARKDOWN = "# Отчет\n\n" + "Строка результата конвертации.\n" * 500
+CHUNKS = [{"index": 0, "text": "# Отчет"}, {"index": 1, "text": "Текст секции"}]
+
+
+class TestEtagMatches:
+    """Тесты etag_matches"""
+
+    def test_matches(self):
+        """Тест точного, слабого и спискового сравнения"""
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('W/"abc"', '"abc"')
+        assert etag_matches('"x", W/"abc" , "y"', '"abc"')
+        assert etag_matches(' * ', '"abc"')
+
+    def test_no_match(self):
+        """Тест несовпадающих и пустых значений"""
+        assert not etag_matches(None, '"abc"')
+        assert not etag_matches('', '"abc"')
+        assert not etag_matches('"abd", W/"x"', '"abc"')
+        assert not etag_matches('abc', '"abc"')
+
+
+class TestAcceptsEncoding:
+    """Тесты accepts_encoding"""
+
+    @pytest.mark.parametrize("header", [
+        "gzip", "GZIP", "deflate, gzip;q=0.5", "x-gzip", "*", "gzip; q=1", "*;q=0, gzip",
+    ])
+    def test_accepted(self, header):
+        """Тест принимаемых кодеков"""
+        assert accepts_encoding(header, "gzip")
+
+    @pytest.mark.parametrize("header", [
+        None, "", "br, deflate", "gzip;q=0", "gzip; q=0.0", "x-gzip;q=0", "*;q=0", "gzip;q=0, *",
+        "gzip;q=abc", "gzipx",
+    ])
+    def test_rejected(self, header):
+        """Тест отклоненных кодеков, включая q=0"""
+        assert not accepts_encoding(header, "gzip")
+
+
+class TestResultStore:
+    """Тесты ResultStore"""
+
+    @pytest.mark.parametrize("compression", [None, "gzip"])
+    def test_roundtrip(self, tmp_path, compression):
+        """Тест сохранения и чтения markdown, секций и файла с диска"""
+        store = ResultStore(str(tmp_path), compression=compression)
+        markdown_id, chunks_id, file_id = (store.result_id(key) for key in ("md", "chunks", "file"))
+
+        meta = store.save(markdown_id, "отчет.docx", MARKDOWN)
+        assert meta["filename"] == "отчет.md"
+        assert meta["encoding"] == compression
+        assert meta["size"] == len(MARKDOWN.encode('utf-8'))
+        assert meta["path"].endswith(".md.gz" if compression else ".md")
+        if compression:
+            assert meta["stored_size"] < meta["size"]
+        assert store.load(markdown_id) == MARKDOWN
+        with store.open(store.get(markdown_id)) as f:
+            assert f.read() == MARKDOWN.encode('utf-8')
+
+        store.save(chunks_id, "отчет.docx", CHUNKS)
+        assert store.get(chunks_id)["media_type"] == "application/x-ndjson"
+        assert store.load(chunks_id) == CHUNKS
+
+        spooled = store.spool_path()
+        with open(spooled, 'w', encoding='utf-8', newline='') as f:
+            f.write(MARKDOWN)
+        store.save(file_id, "большой.pdf", Path(spooled))
+        assert not os.path.exists(spooled)
+        assert store.load(file_id, max_size=100) == Path(store.get(file_id)["path"])
+        assert store.load(file_id) == MARKDOWN
+
+    def test_missing(self, tmp_path):
+        """Тест отсутствующего и некорректного идентификатора"""
+        store = ResultStore(str(tmp_path))
+        assert store.get(store.result_id("нет")) is None
+        assert store.load(store.result_id("нет")) is None
+        assert store.get("../etc/passwd") is None
+
+    def test_dictionary_mismatch(self, tmp_path):
+        """Тест что результат, сжатый другим словарем, считается отсутствующим"""
+        first = ResultStore(str(tmp_path), compression="zlib", dictionary=("# Отчет Строка результата " * 10).encode('utf-8'))
+        result_id = first.result_id("md")
+        first.save(result_id, "отчет.docx", MARKDOWN)
+        assert first.load(result_id) == MARKDOWN
+
+        other = ResultStore(str(tmp_path), compression="zlib", dictionary=("другой словарь " * 10).encode('utf-8'))
+        assert other.get(result_id) is None
+        assert other.load(result_id) is None
+        assert ResultStore(str(tmp_path)).get(result_id) is None
+
+    def test_etag_stable(self, tmp_path):
+        """Тест что ETag зависит только от идентификатора и несжатого содержимого"""
+        plain = ResultStore(str(tmp_path / "plain"))
+        packed = ResultStore(str(tmp_path / "packed"), compression="gzip")
+        result_id = plain.result_id("md")
+
+        etag = plain.save(result_id, "отчет.docx", MARKDOWN)["etag"]
+        assert plain.save(result_id, "отчет.docx", MARKDOWN)["etag"] == etag
+        assert packed.save(result_id, "отчет.docx", MARKDOWN)["etag"] == etag
+        assert plain.get(result_id)["etag"] == etag
+        assert plain.save(result_id, "отчет.docx", MARKDOWN + "x")["etag"] != etag
+        assert plain.save(plain.result_id("другой"), "отчет.docx", MARKDOWN)["etag"] != etag
+
+    def test_cleanup_expired(self, tmp_path):
+        """Тест что удаляются только результаты старше ttl и брошенные временные файлы"""
+        store = ResultStore(str(tmp_path), compression="gzip", ttl=60)
+        old_id, fresh_id = store.result_id("old"), store.result_id("fresh")
+        old = store.save(old_id, "old.docx", MARKDOWN)
+        store.save(fresh_id, "fresh.docx", MARKDOWN)
+        spooled = store.spool_path()
+        Path(spooled).write_text("брошенный", encoding='utf-8')
+
+        expired = time.time() - 120
+        for path in (old["path"], os.path.join(os.path.dirname(old["path"]), old_id + ".json"), spooled):
+            os.utime(path, (expired, expired))
+
+        assert store.cleanup_expired() == 1
+        assert store.get(old_id) is None
+        assert not os.path.exists(old["path"])
+        assert not os.path.exists(spooled)
+        assert store.load(fresh_id) == MARKDOWN
+
+    def test_no_ttl_keeps_results(self, tmp_path):
+        """Тест что без ttl результаты хранятся бессрочно"""
+        store = ResultStore(str(tmp_path))
+        meta = store.save(store.result_id("md"), "отчет.docx", MARKDOWN)
+        expired = time.time() - 10 ** 6
+        os.utime(meta["path"], (expired, expired))
+        assert store.cleanup_expired() == 0
+        assert store.load(meta["result_id"]) == MARKDOWN
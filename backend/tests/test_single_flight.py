@@ -0,0 +1,258 @@
+"""
+Тесты для дедупликации одновременных конвертаций
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    """Ждет выполнения условия"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "условие не выполнилось"
+        time.sleep(0.001)
+
+
+def run_concurrently(flight: SingleFlight, fn, count: int, started: threading.Event):
+    """
+    Запускает count вызовов do с одним ключом: сначала ведущий, затем
+    остальные, когда ведущий уже выполняет fn
+
+    Returns:
+        Потоки и список результатов (результат или исключение) по потокам
+    """
+    outcomes = [None] * count
+
+    def worker(index):
+        try:
+            outcomes[index] = flight.do("ключ", fn)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flight.coalesced == count - 1)
+    return threads, outcomes
+
+
+class TestSingleFlight:
+    """Тесты SingleFlight.do"""
+
+    def test_concurrent_calls_run_once(self):
+        """Тест что одновременные вызовы выполняют fn один раз и получают общий результат"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "результат"
+
+        threads, outcomes = run_concurrently(flight, fn, 8, started)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == [1]
+        # У ведущего были ожидающие, поэтому shared=True у всех
+        assert outcomes == [("результат", True)] * 8
+        assert flight.executed == 1 and flight.coalesced == 7
+
+    def test_single_call_not_shared(self):
+        """Тест что вызов без ожидающих не помечается как общий"""
+        flight = SingleFlight()
+        assert flight.do("ключ", lambda: 42) == (42, False)
+
+    def test_error_reaches_waiters(self):
+        """Тест что исключение ведущего получают все ожидающие"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fn():
+            started.set()
+            release.wait(5)
+            raise ValueError("поврежденный документ")
+
+        threads, outcomes = run_concurrently(flight, fn, 4, started)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        assert flight.in_flight() == 0
+
+    def test_key_released_after_completion(self):
+        """Тест что после завершения следующий вызов выполняется заново"""
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return len(calls)
+
+        assert flight.do("ключ", fn) == (1, False)
+        assert flight.in_flight() == 0
+        assert flight.do("ключ", fn) == (2, False)
+
+        def fail():
+            raise ValueError("ошибка")
+
+        with pytest.raises(ValueError):
+            flight.do("ключ", fail)
+        assert flight.do("ключ", fn) == (3, False)
+
+    def test_leader_cancellation_not_shared(self):
+        """Тест что отмена ведущего не передается ожидающим: один из них повторяет вызов"""
+        class Cancelled(BaseException):
+            pass
+
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                started.set()
+                release.wait(5)
+                raise Cancelled()
+            # Второй ожидающий присоединяется к повторному вызову
+            wait_until(lambda: flight.coalesced == 3)
+            return "результат"
+
+        outcomes = [None] * 3
+
+        def worker(index):
+            try:
+                outcomes[index] = flight.do("ключ", fn)
+            except BaseException as e:
+                outcomes[index] = e
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+        threads[0].start()
+        assert started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        wait_until(lambda: flight.coalesced == 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert isinstance(outcomes[0], Cancelled)
+        assert outcomes[1:] == [("результат", True)] * 2
+        assert len(calls) == 2
+        assert flight.in_flight() == 0
+
+
+class TestSingleFlightAsync:
+    """Тесты SingleFlight.do_async"""
+
+    def test_concurrent_calls_run_once(self):
+        """Тест что одновременные корутины выполняют fn один раз"""
+        flight = SingleFlight()
+        calls = []
+
+        async def main():
+            release = asyncio.Event()
+
+            async def fn():
+                calls.append(1)
+                await release.wait()
+                return "результат"
+
+            tasks = [asyncio.ensure_future(flight.do_async("ключ", fn)) for _ in range(8)]
+            while flight.coalesced < 7:
+                await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        assert asyncio.run(main()) == [("результат", True)] * 8
+        assert calls == [1]
+        assert flight.in_flight() == 0
+
+    def test_error_reaches_waiters(self):
+        """Тест что исключение ведущего получают все ожидающие"""
+        flight = SingleFlight()
+
+        async def main():
+            release = asyncio.Event()
+
+            async def fn():
+                await release.wait()
+                raise ValueError("поврежденный документ")
+
+            tasks = [asyncio.ensure_future(flight.do_async("ключ", fn)) for _ in range(3)]
+            while flight.coalesced < 2:
+                await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(outcome, ValueError) for outcome in asyncio.run(main()))
+        assert flight.in_flight() == 0
+
+    def test_leader_cancellation_retried(self):
+        """Тест что при отмене ведущего один из ожидающих выполняет fn заново"""
+        flight = SingleFlight()
+        calls = []
+
+        async def main():
+            release = asyncio.Event()
+
+            async def fn():
+                calls.append(1)
+                await release.wait()
+                return len(calls)
+
+            leader = asyncio.ensure_future(flight.do_async("ключ", fn))
+            while not calls:
+                await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(flight.do_async("ключ", fn)) for _ in range(2)]
+            while flight.coalesced < 2:
+                await asyncio.sleep(0)
+            leader.cancel()
+            while len(calls) < 2:
+                await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*followers)
+            return leader.cancelled(), results
+
+        cancelled, results = asyncio.run(main())
+        assert cancelled
+        assert results == [(2, True)] * 2
+        assert len(calls) == 2
+
+    def test_waiter_cancellation(self):
+        """Тест что отмена ожидающего не прерывает ведущего"""
+        flight = SingleFlight()
+
+        async def main():
+            release = asyncio.Event()
+
+            async def fn():
+                await release.wait()
+                return "результат"
+
+            leader = asyncio.ensure_future(flight.do_async("ключ", fn))
+            follower = asyncio.ensure_future(flight.do_async("ключ", fn))
+            while flight.coalesced < 1:
+                await asyncio.sleep(0)
+            follower.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            return await leader, follower.cancelled()
+
+        assert asyncio.run(main()) == (("результат", True), True)
@@ -0,0 +1,198 @@
+"""
+Тесты для загрузок по частям
+"""
+
+import os
+import time
+import hashlib
+
+import pytest
+
+from app.core.config import settings
+from app.services.upload_service import UploadError, UploadService, manifest_checksum
+
+
+DATA = bytes(range(256)) * 10  # 2560 байт: части по 1024, 1024 и 512
+
+
+def split(data: bytes, size: int):
+    """Делит данные на части"""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """Сервис со спулом во временном каталоге и маленькими частями"""
+    monkeypatch.setattr(settings, "MIN_UPLOAD_CHUNK_SIZE", 16)
+    return UploadService(spool_dir=str(tmp_path))
+
+
+def upload_all(service: UploadService, filename: str = "doc.txt", data: bytes = DATA):
+    """Создает загрузку и отправляет все части"""
+    meta = service.create(filename, len(data), chunk_size=1024)
+    for index, chunk in enumerate(split(data, 1024)):
+        service.append_chunk(meta["upload_id"], index, chunk)
+    return meta
+
+
+def status_code(excinfo) -> int:
+    """HTTP статус пойманной UploadError"""
+    return excinfo.value.status_code
+
+
+class TestCreate:
+    """Тесты создания загрузки"""
+
+    def test_create(self, service):
+        """Тест числа частей"""
+        meta = service.create("../doc.txt", len(DATA), chunk_size=1024)
+        assert meta["total_chunks"] == 3
+        assert meta["filename"] == "doc.txt"
+
+    def test_invalid_sizes(self, service):
+        """Тест проверки размера файла и части"""
+        with pytest.raises(UploadError) as excinfo:
+            service.create("doc.txt", 0, chunk_size=1024)
+        assert status_code(excinfo) == 400
+        with pytest.raises(UploadError) as excinfo:
+            service.create("doc.txt", settings.MAX_FILE_SIZE + 1, chunk_size=1024)
+        assert status_code(excinfo) == 413
+        with pytest.raises(UploadError) as excinfo:
+            service.create("doc.txt", len(DATA), chunk_size=8)
+        assert status_code(excinfo) == 400
+
+
+class TestAppendChunk:
+    """Тесты приема частей"""
+
+    def test_index_out_of_range(self, service):
+        """Тест номера части вне диапазона"""
+        meta = service.create("doc.txt", len(DATA), chunk_size=1024)
+        for index in (-1, 3):
+            with pytest.raises(UploadError) as excinfo:
+                service.append_chunk(meta["upload_id"], index, DATA[:1024])
+            assert status_code(excinfo) == 400
+
+    def test_chunk_size(self, service):
+        """Тест что часть, кроме последней, должна быть ровно chunk_size"""
+        meta = service.create("doc.txt", len(DATA), chunk_size=1024)
+        with pytest.raises(UploadError):
+            service.append_chunk(meta["upload_id"], 0, DATA[:1000])
+        with pytest.raises(UploadError):
+            service.append_chunk(meta["upload_id"], 2, DATA[:1024])
+        service.append_chunk(meta["upload_id"], 2, DATA[2048:])
+
+    def test_chunk_checksum(self, service):
+        """Тест проверки SHA-256 части"""
+        meta = service.create("doc.txt", len(DATA), chunk_size=1024)
+        chunk = DATA[:1024]
+        with pytest.raises(UploadError):
+            service.append_chunk(meta["upload_id"], 0, chunk, checksum="0" * 64)
+        digest = hashlib.sha256(chunk).hexdigest()
+        assert service.append_chunk(meta["upload_id"], 0, chunk, checksum=digest.upper()) == digest
+
+    def test_unknown_upload(self, service):
+        """Тест неизвестного и некорректного идентификатора"""
+        for upload_id in ("0" * 32, "../etc"):
+            with pytest.raises(UploadError) as excinfo:
+                service.append_chunk(upload_id, 0, b"x")
+            assert status_code(excinfo) == 404
+
+
+class TestStatus:
+    """Тесты состояния загрузки"""
+
+    def test_resume(self, service, tmp_path):
+        """Тест что полученные части видны после перезапуска сервиса"""
+        meta = service.create("doc.txt", len(DATA), chunk_size=1024)
+        chunks = split(DATA, 1024)
+        service.append_chunk(meta["upload_id"], 2, chunks[2])
+        service.append_chunk(meta["upload_id"], 0, chunks[0])
+        # Повторная отправка части не ломает состояние
+        service.append_chunk(meta["upload_id"], 0, chunks[0])
+
+        status = UploadService(spool_dir=str(tmp_path)).status(meta["upload_id"])
+        assert status["received"] == [0, 2]
+        assert status["complete"] is False
+
+        service.append_chunk(meta["upload_id"], 1, chunks[1])
+        assert service.status(meta["upload_id"])["complete"] is True
+
+
+class TestAssemble:
+    """Тесты сборки файла"""
+
+    def test_assemble(self, service):
+        """Тест сборки и контрольной суммы манифеста"""
+        meta = upload_all(service)
+        checksum = manifest_checksum([hashlib.sha256(c).hexdigest() for c in split(DATA, 1024)])
+        upload = service.assemble(meta["upload_id"], checksum)
+
+        with open(upload["path"], 'rb') as f:
+            assert f.read() == DATA
+        assert upload["sha256"] == hashlib.sha256(DATA).hexdigest()
+        assert os.path.basename(upload["path"]) == "doc.txt"
+        assert service.status(meta["upload_id"])["received"] == []
+
+    def test_wrong_checksum(self, service):
+        """Тест что при неверной контрольной сумме части остаются для повтора"""
+        meta = upload_all(service)
+        with pytest.raises(UploadError) as excinfo:
+            service.assemble(meta["upload_id"], "0" * 64)
+        assert status_code(excinfo) == 422
+        assembled_dir = os.path.join(service.spool_dir, meta["upload_id"], "assembled")
+        assert os.listdir(assembled_dir) == []
+        assert service.status(meta["upload_id"])["complete"] is True
+
+    def test_missing_chunks(self, service):
+        """Тест сборки без всех частей"""
+        meta = service.create("doc.txt", len(DATA), chunk_size=1024)
+        service.append_chunk(meta["upload_id"], 0, DATA[:1024])
+        with pytest.raises(UploadError) as excinfo:
+            service.assemble(meta["upload_id"], "0" * 64)
+        assert status_code(excinfo) == 409
+
+    @pytest.mark.parametrize("filename", ["meta.json", "00000000.part"])
+    def test_filename_does_not_clobber_spool(self, service, filename):
+        """Тест что имя файла не совпадает с файлами спула"""
+        meta = upload_all(service, filename)
+        checksum = manifest_checksum([hashlib.sha256(c).hexdigest() for c in split(DATA, 1024)])
+        upload = service.assemble(meta["upload_id"], checksum)
+        with open(upload["path"], 'rb') as f:
+            assert f.read() == DATA
+        assert service.status(meta["upload_id"])["filename"] == filename
+
+    def test_finalizing_is_exclusive(self, service):
+        """Тест что второй finalize той же загрузки получает 409"""
+        first = upload_all(service)
+        second = upload_all(service)
+        with service.finalizing(first["upload_id"]):
+            with pytest.raises(UploadError) as excinfo:
+                with service.finalizing(first["upload_id"]):
+                    pass
+            assert status_code(excinfo) == 409
+            with service.finalizing(second["upload_id"]):
+                pass
+        with service.finalizing(first["upload_id"]):
+            pass
+
+
+class TestCleanup:
+    """Тесты удаления брошенных загрузок"""
+
+    def test_cleanup_expired(self, service, monkeypatch):
+        """Тест что удаляются только загрузки старше UPLOAD_TTL"""
+        monkeypatch.setattr(settings, "UPLOAD_TTL", 60)
+        old = service.create("old.txt", len(DATA), chunk_size=1024)
+        fresh = service.create("fresh.txt", len(DATA), chunk_size=1024)
+        other = os.path.join(service.spool_dir, "not-an-upload")
+        os.makedirs(other)
+        expired = time.time() - 120
+        for path in (os.path.join(service.spool_dir, old["upload_id"]), other):
+            os.utime(path, (expired, expired))
+
+        assert service.cleanup_expired() == 1
+        with pytest.raises(UploadError):
+            service.status(old["upload_id"])
+        assert service.status(fresh["upload_id"])["received"] == []
+        assert os.path.isdir(other)
@@ -0,0 +1,146 @@
+"""
+Бенчмарк сжатия результатов на диске: скорость записи и чтения против
+степени сжатия для большого документа и множества небольших похожих
+
+Запуск: python benchmarks/bench_compression.py [--size-mb 16] [--documents 2000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_postprocess import make_document  # noqa: E402
+from doc_converter.compression import (  # noqa: E402
+    compressed_path, open_compressed, train_dictionary, zstd_available
+)
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def variants():
+    """Кодеки и уровни для сравнения"""
+    result = [('без сжатия', None, None), ('gzip 1', 'gzip', 1), ('gzip 6', 'gzip', 6)]
+    if zstd_available():
+        result += [('zstd 1', 'zstd', 1), ('zstd 3', 'zstd', 3), ('zstd 9', 'zstd', 9)]
+    return result
+
+
+def make_small_documents(count: int, seed: int = 1):
+    """Небольшие однотипные документы: акты проверки по одному шаблону"""
+    rng = random.Random(seed)
+    statuses = ['выполнено', 'не выполнено', 'перенесено']
+    documents = []
+    for i in range(count):
+        rows = '\n'.join(
+            f"| {rng.choice(['Насос', 'Клапан', 'Датчик', 'Щит'])} {rng.randint(1, 99)} "
+            f"| {rng.choice(statuses)} | {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2024 |"
+            for _ in range(rng.randint(3, 8))
+        )
+        documents.append(
+            f"# Акт проверки оборудования № {i}\n\n"
+            f"Проверка проведена комиссией в соответствии с регламентом технического обслуживания.\n\n"
+            f"| Оборудование | Статус | Дата |\n|---|---|---|\n{rows}\n\n"
+            f"## Заключение\n\nОборудование допущено к эксплуатации. Замечания устранить до следующей проверки.\n"
+        )
+    return documents
+
+
+def write_file(path: str, text: str, codec, level, dictionary=None):
+    """Пишет документ фрагментами, как DocumentConverter в режиме low_memory"""
+    with open_compressed(path, 'wt', codec=codec, level=level, dictionary=dictionary) as f:
+        for i in range(0, len(text), CHUNK_SIZE):
+            f.write(text[i:i + CHUNK_SIZE])
+
+
+def read_file(path: str, dictionary=None) -> int:
+    """Читает документ блоками, возвращает размер"""
+    size = 0
+    with open_compressed(path, 'rb', dictionary=dictionary) as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            size += len(block)
+    return size
+
+
+def best_of(func, repeat: int) -> float:
+    """Лучшее время из repeat запусков"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_large(temp_dir: str, size_mb: float, repeat: int):
+    """Один большой документ"""
+    text = make_document(int(size_mb * 1024 * 1024))
+    size = len(text.encode('utf-8'))
+    print(f"Большой документ: {size / 1024 / 1024:.1f} МБ")
+    print(f"{'вариант':<12}{'запись, МБ/с':>14}{'чтение, МБ/с':>14}{'сжатие':>10}")
+    for name, codec, level in variants():
+        path = str(compressed_path(os.path.join(temp_dir, 'large.md'), codec))
+        write_time = best_of(lambda: write_file(path, text, codec, level), repeat)
+        read_time = best_of(lambda: read_file(path), repeat)
+        assert read_file(path) == size
+        ratio = size / os.path.getsize(path)
+        print(f"{name:<12}{size / 1024 / 1024 / write_time:>14.1f}"
+              f"{size / 1024 / 1024 / read_time:>14.1f}{ratio:>10.2f}")
+
+
+def bench_small(temp_dir: str, count: int, repeat: int):
+    """Множество небольших похожих документов со словарем и без"""
+    documents = make_small_documents(count)
+    size = sum(len(document.encode('utf-8')) for document in documents)
+    # Словарь обучается на десятой части документов, сравнение - на всех
+    samples = [document.encode('utf-8') for document in documents[::10]]
+    print(f"\nНебольшие документы: {count} шт., в среднем {size // count} байт")
+    print(f"{'вариант':<16}{'запись, док/с':>15}{'чтение, док/с':>15}{'сжатие':>10}")
+
+    cases = [(name, codec, level, None) for name, codec, level in variants()]
+    cases.append(('zlib 6 словарь', 'zlib', 6, train_dictionary(samples, codec='zlib')))
+    if zstd_available():
+        cases.append(('zstd 3 словарь', 'zstd', 3, train_dictionary(samples, codec='zstd')))
+
+    for name, codec, level, dictionary in cases:
+        directory = os.path.join(temp_dir, 'small')
+        paths = [str(compressed_path(os.path.join(directory, f'{i}.md'), codec)) for i in range(count)]
+
+        def write_all():
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+            for path, document in zip(paths, documents):
+                write_file(path, document, codec, level, dictionary)
+
+        def read_all():
+            for path in paths:
+                read_file(path, dictionary)
+
+        write_time = best_of(write_all, repeat)
+        read_time = best_of(read_all, repeat)
+        stored = sum(os.path.getsize(path) for path in paths)
+        print(f"{name:<16}{count / write_time:>15.0f}{count / read_time:>15.0f}{size / stored:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=16)
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not zstd_available():
+        print("zstandard не установлен: zstd пропущен")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bench_large(temp_dir, args.size_mb, args.repeat)
+        bench_small(temp_dir, args.documents, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
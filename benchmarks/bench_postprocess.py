@@ -0,0 +1,102 @@
+"""
+Микробенчмарк постобработки markdown: один потоковый проход против
+последовательных проходов по всему документу
+
+Запуск: python benchmarks/bench_postprocess.py [--size-mb 8] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from doc_converter.postprocess import PostProcessor, build_postprocessor  # noqa: E402
+
+
+OPTIONS = {'table_format': 'grid', 'link_base': 'https://cdn.example.com/docs/'}
+CHUNK_SIZE = 64 * 1024
+
+
+def make_document(size: int, seed: int = 1) -> str:
+    """Генерирует markdown с заголовками, таблицами, ссылками и кодом"""
+    rng = random.Random(seed)
+    words = [f"слово{i}" for i in range(500)]
+    parts = []
+    total = 0
+    while total < size:
+        kind = rng.random()
+        if kind < 0.1:
+            block = f"{'#' * rng.randint(1, 4)}  Заголовок {rng.randint(1, 999)}  \n\n\n"
+        elif kind < 0.2:
+            rows = [f"| {' | '.join(rng.choice(words) for _ in range(4))} |" for _ in range(rng.randint(2, 8))]
+            block = '\n'.join([rows[0], '|---|---|---|---|'] + rows[1:]) + '\n\n'
+        elif kind < 0.25:
+            block = "```\ncode   \n\n\n| x |\n```\n"
+        else:
+            text = ' '.join(rng.choice(words) for _ in range(rng.randint(20, 80)))
+            block = f"{text} [ссылка](img/{rng.randint(1, 99)}.png)   \n\n\n\n"
+        parts.append(block)
+        total += len(block)
+    return ''.join(parts)
+
+
+def single_pass(text: str) -> str:
+    """Все преобразования за один потоковый проход по фрагментам"""
+    processor = build_postprocessor(OPTIONS)
+    pieces = (text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE))
+    return ''.join(processor.process(pieces))
+
+
+def multi_pass(text: str) -> str:
+    """Те же преобразования, каждое отдельным проходом по всему документу"""
+    for transform in build_postprocessor(OPTIONS).transforms:
+        text = PostProcessor([transform]).process_text(text)
+    return text
+
+
+def measure(func, text: str, repeat: int):
+    """Возвращает лучшее время и пиковую память функции"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    result = func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_document(int(args.size_mb * 1024 * 1024))
+    size_mb = len(text.encode('utf-8')) / 1024 / 1024
+    print(f"Документ: {size_mb:.1f} МБ, {text.count(chr(10))} строк")
+
+    single_time, single_peak, single_result = measure(single_pass, text, args.repeat)
+    multi_time, multi_peak, multi_result = measure(multi_pass, text, args.repeat)
+    assert single_result == multi_result, "Результаты проходов не совпадают"
+
+    print(f"{'вариант':<12}{'время, с':>10}{'МБ/с':>10}{'пик памяти, МБ':>18}")
+    for name, seconds, peak in (('один проход', single_time, single_peak),
+                                ('по проходу', multi_time, multi_peak)):
+        print(f"{name:<12}{seconds:>10.3f}{size_mb / seconds:>10.1f}{peak / 1024 / 1024:>18.1f}")
+
+    processor = build_postprocessor(OPTIONS)
+    processor.process_text(text)
+    print("Время преобразований в одном проходе:")
+    for name, seconds in processor.timings.items():
+        print(f"  {name:<12}{seconds:.3f} с")
+
+
+if __name__ == '__main__':
+    main()
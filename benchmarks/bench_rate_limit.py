@@ -0,0 +1,83 @@
+"""
+Микробенчмарк лимитов конвертаций: накладные расходы проверки лимита на запрос
+(ключ клиента, оценка стоимости по размеру и списание из корзины - как в /convert)
+
+Запуск: python benchmarks/bench_rate_limit.py [--requests 200000] [--clients 1000] [--threads 4] [--redis-url URL]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.rate_limit import (  # noqa: E402
+    MemoryBucketStore, RateLimiter, RedisBucketStore, units_for_size
+)
+
+
+def make_requests(count: int, clients: int, seed: int = 1):
+    """Адреса клиентов и размеры загрузок"""
+    rng = random.Random(seed)
+    addresses = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(clients)]
+    sizes = (20 * 1024, 80 * 1024, 300 * 1024, 1200 * 1024, 4 * 1024 * 1024)
+    return [(rng.choice(addresses), rng.choice(sizes)) for _ in range(count)]
+
+
+def run(limiter: RateLimiter, requests) -> int:
+    """Проводит запросы через ограничитель, возвращает число отказов"""
+    rejected = 0
+    for address, size in requests:
+        if limiter.acquire(limiter.client_key(None, address), units_for_size(size)):
+            rejected += 1
+    return rejected
+
+
+def bench(name: str, limiter: RateLimiter, requests, threads: int) -> None:
+    """Печатает время на запрос в одном и нескольких потоках"""
+    started = time.perf_counter()
+    rejected = run(limiter, requests)
+    single = time.perf_counter() - started
+
+    parts = [requests[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=run, args=(limiter, part)) for part in parts]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    parallel = time.perf_counter() - started
+
+    print(f"{name:<22}{single / len(requests) * 1e6:>12.2f}{parallel / len(requests) * 1e6:>14.2f}"
+          f"{rejected / len(requests) * 100:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--redis-url', default=None, help='Замерить и корзины в Redis')
+    args = parser.parse_args()
+
+    requests = make_requests(args.requests, args.clients)
+    print(f"Запросов: {args.requests}, клиентов: {args.clients}, потоков: {args.threads}")
+    print(f"{'хранилище':<22}{'мкс/запрос':>12}{'мкс (потоки)':>14}{'отказы, %':>10}")
+
+    bench('память', RateLimiter(rate=50.0, burst=300.0), requests, args.threads)
+    # Вытеснение: корзин в 10 раз больше, чем помещается в хранилище
+    crowded = make_requests(args.requests, args.clients * 10, seed=2)
+    bench('память, вытеснение', RateLimiter(rate=50.0, burst=300.0,
+                                            store=MemoryBucketStore(max_keys=args.clients)),
+          crowded, args.threads)
+    if args.redis_url:
+        store = RedisBucketStore(args.redis_url, prefix=f"bench:{os.getpid()}:")
+        bench('redis', RateLimiter(rate=50.0, burst=300.0, store=store),
+              requests[:args.requests // 20], args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,8 @@ __version__ = "0.1.0"
 __author__ = "Document Converter Team"
 
 from .converter import DocumentConverter
+from .async_converter import AsyncDocumentConverter
+from .cancellation import ConversionCancelled
 from .cli import main
 
-__all__ = ["DocumentConverter", "main"]
+__all__ = ["DocumentConverter", "AsyncDocumentConverter", "ConversionCancelled", "main"]
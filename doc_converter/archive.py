@@ -0,0 +1,267 @@
+"""
+Потоковая конвертация документов из ZIP/TAR архивов без распаковки на диск
+"""
+
+import io
+import logging
+import tarfile
+import zipfile
+import posixpath
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Dict, Any, Iterator, Tuple, BinaryIO, Callable, Set
+
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ZIP_SUFFIXES = ('.zip',)
+
+logger = logging.getLogger(__name__)
+
+
+def is_archive(filename: str) -> bool:
+    """
+    Проверяет является ли файл поддерживаемым архивом
+
+    Args:
+        filename: Имя файла
+
+    Returns:
+        True для ZIP и TAR архивов
+    """
+    return filename.lower().endswith(ZIP_SUFFIXES + TAR_SUFFIXES)
+
+
+def safe_member_name(name: str) -> Optional[str]:
+    """
+    Нормализует имя члена архива, отбрасывая абсолютные пути и выход за корень
+
+    Args:
+        name: Имя внутри архива
+
+    Returns:
+        Безопасное относительное имя или None
+    """
+    parts = [p for p in posixpath.normpath(name.replace('\\', '/')).split('/')
+             if p not in ('', '.', '..')]
+    return '/'.join(parts) or None
+
+
+def iter_archive_members(fileobj: BinaryIO, archive_name: str,
+                         max_member_size: Optional[int] = None,
+                         accept: Optional[Callable[[str], bool]] = None
+                         ) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    Последовательно читает файлы из архива, не распаковывая его на диск
+
+    TAR читается в потоковом режиме и подходит для несикабельных потоков,
+    ZIP требует сикабельный поток (оглавление находится в конце файла).
+    Содержимое пропущенных членов не читается, вместо него отдается None.
+
+    Args:
+        fileobj: Бинарный поток архива
+        archive_name: Имя архива (по расширению определяется формат)
+        max_member_size: Максимальный размер члена архива в байтах
+        accept: Фильтр имен; отклоненные члены не читаются
+
+    Returns:
+        Итератор пар (имя, содержимое или None для пропущенных)
+    """
+    lower = archive_name.lower()
+
+    if lower.endswith(ZIP_SUFFIXES):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                name = safe_member_name(info.filename)
+                if name is None:
+                    continue
+                if (accept and not accept(name)) or \
+                        (max_member_size is not None and info.file_size > max_member_size):
+                    yield name, None
+                    continue
+                with archive.open(info) as member:
+                    yield name, member.read()
+
+    elif lower.endswith(TAR_SUFFIXES):
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                name = safe_member_name(info.name)
+                if name is None:
+                    continue
+                if (accept and not accept(name)) or \
+                        (max_member_size is not None and info.size > max_member_size):
+                    yield name, None
+                    continue
+                member = archive.extractfile(info)
+                yield name, member.read()
+
+    else:
+        raise ValueError(f"Неподдерживаемый формат архива: {archive_name}")
+
+
+class ArchiveWriter:
+    """
+    Запись результатов в выходной ZIP или TAR архив
+    """
+
+    def __init__(self, fileobj: BinaryIO, archive_name: str):
+        """
+        Инициализация
+
+        Args:
+            fileobj: Бинарный поток для записи архива
+            archive_name: Имя выходного архива (по расширению определяется формат)
+        """
+        lower = archive_name.lower()
+        if lower.endswith(ZIP_SUFFIXES):
+            self._zip = zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED)
+            self._tar = None
+        elif lower.endswith(TAR_SUFFIXES):
+            mode = 'w|'
+            if lower.endswith(('.gz', '.tgz')):
+                mode = 'w|gz'
+            elif lower.endswith(('.bz2', '.tbz2')):
+                mode = 'w|bz2'
+            elif lower.endswith(('.xz', '.txz')):
+                mode = 'w|xz'
+            self._zip = None
+            self._tar = tarfile.open(fileobj=fileobj, mode=mode)
+        else:
+            raise ValueError(f"Неподдерживаемый формат архива: {archive_name}")
+
+    def write(self, name: str, content: str) -> None:
+        """
+        Добавляет текстовый файл в архив
+
+        Args:
+            name: Имя файла внутри архива
+            content: Текст файла
+        """
+        data = content.encode('utf-8')
+        if self._zip is not None:
+            self._zip.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        """Завершает запись архива"""
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def output_member_name(name: str, used: Optional[Set[str]] = None) -> str:
+    """
+    Строит имя markdown файла для члена архива
+
+    Документы, различающиеся только расширением (a.txt и a.rtf), не должны
+    получить одно имя: при совпадении сохраняется исходное расширение
+    (a.rtf.md), затем добавляется номер.
+
+    Args:
+        name: Имя документа внутри архива
+        used: Уже занятые имена (пополняется выбранным именем)
+
+    Returns:
+        Имя с расширением .md
+    """
+    base, _ = posixpath.splitext(name)
+    candidate = f"{base}.md"
+    if used is None:
+        return candidate
+    if candidate in used:
+        candidate = f"{name}.md"
+    number = 2
+    while candidate in used:
+        candidate = f"{name}-{number}.md"
+        number += 1
+    used.add(candidate)
+    return candidate
+
+
+def convert_archive(converter, input_fileobj: BinaryIO, input_name: str,
+                    output_fileobj: BinaryIO, output_name: str, workers: int = 4,
+                    max_in_flight: Optional[int] = None,
+                    max_member_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Конвертирует все поддерживаемые документы архива в выходной архив
+
+    Члены архива читаются по одному и раздаются пулу потоков; число
+    одновременно прочитанных, но не записанных документов ограничено
+    max_in_flight, поэтому память не растет с размером архива. Запись
+    в выходной архив идет из вызывающего потока по мере готовности.
+
+    Args:
+        converter: Экземпляр DocumentConverter
+        input_fileobj: Бинарный поток входного архива
+        input_name: Имя входного архива
+        output_fileobj: Бинарный поток для выходного архива
+        output_name: Имя выходного архива
+        workers: Количество потоков конвертации
+        max_in_flight: Максимум документов в работе (по умолчанию 2 * workers)
+        max_member_size: Максимальный размер документа в архиве
+
+    Returns:
+        Статистика: converted, failed, skipped и список ошибок
+    """
+    max_in_flight = max_in_flight or 2 * workers
+    stats: Dict[str, Any] = {"converted": 0, "failed": 0, "skipped": 0, "errors": []}
+
+    # Имена выходных файлов выдаются в порядке архива при отправке в пул,
+    # поэтому не зависят от того, какая конвертация закончится раньше
+    used_names: Set[str] = set()
+    submitted: Dict[Future, Tuple[str, str]] = {}
+
+    def convert_member(name: str, data: bytes) -> Optional[str]:
+        return converter.convert_to_string(data, filename=posixpath.basename(name))
+
+    def collect(futures, writer: ArchiveWriter) -> None:
+        for future in futures:
+            name, output_member = submitted.pop(future)
+            try:
+                markdown_content = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                stats["errors"].append(f"{name}: {e}")
+                continue
+            if markdown_content:
+                writer.write(output_member, markdown_content)
+                stats["converted"] += 1
+            else:
+                stats["failed"] += 1
+                stats["errors"].append(name)
+
+    members = iter_archive_members(input_fileobj, input_name, max_member_size,
+                                   accept=converter.is_supported_format)
+
+    with ArchiveWriter(output_fileobj, output_name) as writer, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for name, data in members:
+            if data is None:
+                stats["skipped"] += 1
+                continue
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, writer)
+            future = pool.submit(convert_member, name, data)
+            submitted[future] = (name, output_member_name(name, used_names))
+            pending.add(future)
+        collect(pending, writer)
+
+    logger.info(
+        f"Архив {input_name}: конвертировано {stats['converted']}, "
+        f"ошибок {stats['failed']}, пропущено {stats['skipped']}"
+    )
+    return stats
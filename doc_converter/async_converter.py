@@ -0,0 +1,370 @@
+"""
+Асинхронный интерфейс конвертера для встраивания в asyncio-сервисы
+"""
+
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable, Iterator, AsyncIterator, Callable, Tuple, Union, TypeVar
+
+from .cancellation import ConversionCancelled, cancel_scope
+from .converter import DocumentConverter, InputSource
+
+
+T = TypeVar('T')
+
+# Документ для пакетных функций: путь/байты/поток или пара (источник, имя файла)
+BatchItem = Union[InputSource, Tuple[InputSource, str]]
+
+_DONE = object()
+
+# Как часто рабочий поток проверяет отмену, пока ждет места в очереди потока
+_PUT_POLL_INTERVAL = 0.1
+
+
+class AsyncDocumentConverter:
+    """
+    Асинхронная обертка над DocumentConverter
+
+    Конвертации выполняются в собственном пуле из max_workers потоков.
+    Запросы сверх этого числа ждут в event loop, не занимая потоков и не
+    накапливаясь в очереди пула, поэтому отмена ожидающего запроса ничего
+    не стоит. Отмена задачи во время конвертации устанавливает событие,
+    которое конвертер проверяет между блоками, страницами и фрагментами, -
+    рабочий поток прекращает работу, а слот освобождается только после этого.
+
+    Пример:
+        async with AsyncDocumentConverter(max_workers=4) as converter:
+            markdown = await converter.convert_to_string('report.docx')
+            async for piece in converter.iter_markdown('big.pdf'):
+                ...
+    """
+
+    def __init__(self, converter: Optional[DocumentConverter] = None,
+                 max_workers: int = 4, config: Optional[Dict[str, Any]] = None):
+        """
+        Инициализация
+
+        Args:
+            converter: Синхронный конвертер (по умолчанию создается из config)
+            max_workers: Число одновременных конвертаций
+            config: Конфигурация DocumentConverter, если converter не передан
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers должен быть положительным")
+        self.converter = converter or DocumentConverter(config)
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='doc-converter')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._events: set = set()
+        self._active = 0
+        self._waiting = 0
+        self._closed = False
+
+    @property
+    def active(self) -> int:
+        """Число выполняющихся конвертаций"""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """Число запросов, ожидающих свободного потока"""
+        return self._waiting
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Выполняет синхронную функцию в пуле конвертера с поддержкой отмены
+
+        Args:
+            func: Функция (обычно метод DocumentConverter или сервиса над ним)
+            *args: Позиционные аргументы
+            **kwargs: Именованные аргументы
+
+        Returns:
+            Результат функции
+        """
+        loop = asyncio.get_running_loop()
+        async with _Slot(self) as event:
+            future = loop.run_in_executor(self._executor, _call_in_scope, event, func, args, kwargs)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                event.set()
+                await _wait_worker(future)
+                raise
+
+    async def convert(self, input_path: InputSource, output_path: str,
+                      filename: Optional[str] = None, **kwargs) -> bool:
+        """
+        Конвертирует документ в markdown файл (см. DocumentConverter.convert)
+
+        Args:
+            input_path: Путь к входному файлу, байты или бинарный поток
+            output_path: Путь к выходному markdown файлу
+            filename: Имя документа, если на вход переданы байты или поток
+            **kwargs: backend, require, postprocess
+
+        Returns:
+            True если конвертация прошла успешно, False иначе
+        """
+        return await self.run(self.converter.convert, input_path, output_path, filename, **kwargs)
+
+    async def convert_to_string(self, input_path: InputSource, filename: Optional[str] = None,
+                                **kwargs) -> Optional[str]:
+        """
+        Конвертирует документ в markdown строку (см. DocumentConverter.convert_to_string)
+
+        Args:
+            input_path: Путь к входному файлу, байты или бинарный поток
+            filename: Имя документа, если на вход переданы байты или поток
+            **kwargs: backend, require, postprocess
+
+        Returns:
+            Markdown контент или None при ошибке
+        """
+        return await self.run(self.converter.convert_to_string, input_path, filename, **kwargs)
+
+    def iter_markdown(self, input_path: InputSource, filename: Optional[str] = None,
+                      buffer: int = 8, **kwargs) -> AsyncIterator[str]:
+        """
+        Конвертирует документ и отдает markdown по фрагментам
+
+        Рабочий поток останавливается, если потребитель не успевает забрать
+        buffer фрагментов, и прекращает конвертацию при закрытии итератора.
+
+        Args:
+            input_path: Путь к входному файлу, байты или бинарный поток
+            filename: Имя документа, если на вход переданы байты или поток
+            buffer: Сколько фрагментов может ждать потребителя
+            **kwargs: backend, postprocess
+
+        Returns:
+            Асинхронный итератор фрагментов markdown
+        """
+        return self._stream(lambda: self.converter.iter_markdown(input_path, filename, **kwargs), buffer)
+
+    def iter_chunks(self, input_path: str, max_chars: int = 2000,
+                    max_tokens: Optional[int] = None, buffer: int = 8,
+                    **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Конвертирует документ и отдает секции по мере готовности (см. DocumentConverter.iter_chunks)
+
+        Args:
+            input_path: Путь к входному файлу
+            max_chars: Максимальный размер секции в символах
+            max_tokens: Максимальный размер секции в токенах
+            buffer: Сколько секций может ждать потребителя
+            **kwargs: backend, postprocess
+
+        Returns:
+            Асинхронный итератор секций
+        """
+        return self._stream(
+            lambda: self.converter.iter_chunks(input_path, max_chars, max_tokens, **kwargs), buffer
+        )
+
+    async def convert_many(self, items: Iterable[BatchItem], return_exceptions: bool = False,
+                           **kwargs) -> List[Optional[str]]:
+        """
+        Конвертирует несколько документов в строки, как asyncio.gather
+
+        Одновременно выполняется не больше max_workers конвертаций. Если
+        return_exceptions=False и одна из конвертаций упала или вызов отменен,
+        остальные конвертации отменяются.
+
+        Args:
+            items: Документы (источник или пара источник, имя файла)
+            return_exceptions: Возвращать исключения в списке результатов
+            **kwargs: backend, require, postprocess
+
+        Returns:
+            Результаты в порядке документов
+        """
+        tasks = [asyncio.ensure_future(self._convert_item(item, kwargs)) for item in items]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        except BaseException:
+            await _cancel_all(tasks)
+            raise
+
+    async def as_completed(self, items: Iterable[BatchItem],
+                           **kwargs) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Конвертирует несколько документов и отдает результаты по готовности
+
+        При закрытии итератора незавершенные конвертации отменяются.
+
+        Args:
+            items: Документы (источник или пара источник, имя файла)
+            **kwargs: backend, require, postprocess
+
+        Returns:
+            Асинхронный итератор пар (индекс документа, markdown или None)
+        """
+        tasks = [asyncio.ensure_future(self._indexed(index, item, kwargs))
+                 for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            await _cancel_all(tasks)
+
+    def cancel_all(self) -> None:
+        """Отменяет все выполняющиеся конвертации"""
+        for event in list(self._events):
+            event.set()
+
+    def close(self, cancel: bool = True) -> None:
+        """
+        Останавливает пул конвертера
+
+        Args:
+            cancel: Прервать выполняющиеся конвертации, а не ждать их окончания
+        """
+        self._closed = True
+        if cancel:
+            self.cancel_all()
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self, cancel: bool = True) -> None:
+        """Останавливает пул, не блокируя event loop"""
+        await asyncio.get_running_loop().run_in_executor(None, self.close, cancel)
+
+    async def __aenter__(self) -> 'AsyncDocumentConverter':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose(cancel=exc[0] is not None)
+
+    async def _stream(self, factory: Callable[[], Iterator[T]], buffer: int) -> AsyncIterator[T]:
+        """
+        Переносит синхронный итератор из рабочего потока в event loop
+
+        Args:
+            factory: Создает итератор (вызывается в рабочем потоке)
+            buffer: Размер очереди между потоком и потребителем
+
+        Returns:
+            Асинхронный итератор элементов
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(buffer)
+
+        def produce(event: threading.Event) -> None:
+            try:
+                for item in factory():
+                    _put(queue, item, event, loop)
+            finally:
+                if not event.is_set():
+                    _put(queue, _DONE, event, loop)
+
+        async with _Slot(self) as event:
+            future = loop.run_in_executor(self._executor, _call_in_scope, event, produce, (event,), {})
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        break
+                    yield item
+                # Ошибки конвертации поднимаются здесь
+                await asyncio.shield(future)
+            finally:
+                if not future.done():
+                    event.set()
+                    await _wait_worker(future)
+
+    async def _convert_item(self, item: BatchItem, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Конвертирует элемент пакета в строку"""
+        if isinstance(item, tuple):
+            source, filename = item
+            return await self.convert_to_string(source, filename, **kwargs)
+        return await self.convert_to_string(item, **kwargs)
+
+    async def _indexed(self, index: int, item: BatchItem,
+                       kwargs: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        """Конвертирует элемент пакета и возвращает его индекс вместе с результатом"""
+        return index, await self._convert_item(item, kwargs)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Семафор свободных потоков для текущего event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+
+class _Slot:
+    """Занимает поток пула на время конвертации и выдает ее событие отмены"""
+
+    def __init__(self, owner: AsyncDocumentConverter):
+        self.owner = owner
+        self.event = threading.Event()
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> threading.Event:
+        owner = self.owner
+        if owner._closed:
+            raise RuntimeError("Конвертер закрыт")
+        self.semaphore = owner._get_semaphore()
+        owner._waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            owner._waiting -= 1
+        owner._active += 1
+        owner._events.add(self.event)
+        return self.event
+
+    async def __aexit__(self, *exc) -> None:
+        owner = self.owner
+        owner._events.discard(self.event)
+        owner._active -= 1
+        self.semaphore.release()
+
+
+def _call_in_scope(event: threading.Event, func: Callable[..., T], args: tuple,
+                   kwargs: Dict[str, Any]) -> T:
+    """Вызывает функцию в рабочем потоке с событием отмены"""
+    with cancel_scope(event):
+        if event.is_set():
+            raise ConversionCancelled()
+        return func(*args, **kwargs)
+
+
+def _put(queue: asyncio.Queue, item: Any, event: threading.Event,
+         loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Кладет элемент в очередь event loop из рабочего потока
+
+    Ожидание места в очереди прерывается отменой, иначе поток остался бы
+    висеть, если потребитель перестал читать.
+    """
+    future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+    while True:
+        try:
+            future.result(timeout=_PUT_POLL_INTERVAL)
+            return
+        except concurrent.futures.TimeoutError:
+            if event.is_set():
+                future.cancel()
+                raise ConversionCancelled()
+
+
+async def _wait_worker(future: asyncio.Future) -> None:
+    """Дожидается остановки рабочего потока после отмены"""
+    await asyncio.wait([future])
+    if not future.cancelled():
+        # Забираем исключение (обычно ConversionCancelled), чтобы оно не попало в лог
+        future.exception()
+
+
+async def _cancel_all(tasks: List[asyncio.Future]) -> None:
+    """Отменяет задачи и дожидается их завершения"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
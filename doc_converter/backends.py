@@ -0,0 +1,646 @@
+"""
+Бэкенды конвертации и выбор самого быстрого из подходящих по замерам
+"""
+
+import io
+import re
+import time
+import logging
+import codecs
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterable, Iterator, FrozenSet, Tuple, BinaryIO
+
+from .cancellation import check_cancelled
+from .docx_blocks import convert_docx, iter_docx_markdown, load_block_cache, save_block_cache
+
+
+# Возможности, которые может заявить бэкенд (streaming - конвертация по
+# страницам через iter_pages без загрузки документа в память целиком)
+CAPABILITIES = ('formatting', 'tables', 'images', 'pages', 'incremental', 'streaming')
+
+_RTF_CONTROL_RE = re.compile(r'\\[a-zA-Z]+-?\d* ?|[{}]')
+# Управляющее слово RTF не длиннее 32 букв с параметром
+_RTF_CONTROL_MAX = 48
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def _read_bytes(input_file) -> bytes:
+    """Читает содержимое файла или потока документа"""
+    if isinstance(input_file, Path):
+        return input_file.read_bytes()
+    return input_file.stream.read()
+
+
+def _decode_text(data: bytes) -> str:
+    """Декодирует текст в UTF-8 с запасным вариантом cp1251"""
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp1251', errors='replace')
+
+
+@contextmanager
+def _open_binary(input_file):
+    """Открывает файл документа или отдает поток документа (поток не закрывается)"""
+    if isinstance(input_file, Path):
+        with open(input_file, 'rb') as f:
+            yield f
+    else:
+        yield input_file.stream
+
+
+def _read_segments(stream: BinaryIO, segment_size: int) -> Iterator[bytes]:
+    """
+    Читает поток частями примерно по segment_size байт
+
+    Часть дочитывается до конца строки (но не больше чем еще на segment_size),
+    чтобы разметка и переводы строк \\r\\n не разрывались между частями.
+    """
+    while True:
+        data = stream.read(segment_size)
+        if not data:
+            return
+        if not data.endswith(b'\n'):
+            data += stream.readline(segment_size)
+            if data.endswith(b'\r'):
+                data += stream.read(1)
+        yield data
+
+
+def _is_utf8(stream: BinaryIO, segment_size: int) -> bool:
+    """Проверяет по частям, что поток целиком в UTF-8, и перематывает его обратно"""
+    start = stream.tell()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for data in iter(lambda: stream.read(segment_size), b''):
+            decoder.decode(data)
+        decoder.decode(b'', final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+    finally:
+        stream.seek(start)
+
+
+def _iter_clean_text(texts: Iterable[str]) -> Iterator[str]:
+    """
+    Потоковый вариант очистки текста PlainTextBackend
+
+    Нормализует переводы строк, схлопывает пустые строки и обрезает пробелы
+    по краям всего текста. Пробелы в конце части придерживаются до следующей,
+    поэтому результат совпадает с обработкой текста целиком.
+    """
+    pending = ''
+    started = False
+    for text in texts:
+        text = pending + text.replace('\r\n', '\n')
+        if not started:
+            text = text.lstrip()
+        body = text.rstrip()
+        pending = text[len(body):]
+        if body:
+            started = True
+            yield _BLANK_LINES_RE.sub('\n\n', body)
+    if started:
+        yield '\n'
+
+
+class ConverterBackend:
+    """
+    Базовый класс бэкенда конвертации
+
+    Бэкенд заявляет поддерживаемые форматы с ожидаемым качеством результата
+    (0..1), набор возможностей и априорную скорость, которая используется
+    до первых замеров.
+    """
+
+    name = ''
+    formats: Dict[str, float] = {}
+    capabilities: FrozenSet[str] = frozenset()
+    throughput = 1e6
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def is_available(self) -> bool:
+        """
+        Проверяет установлены ли зависимости бэкенда
+
+        Returns:
+            True если бэкенд можно использовать
+        """
+        return True
+
+    def supports(self, suffix: str, require: Iterable[str] = ()) -> bool:
+        """
+        Проверяет подходит ли бэкенд для формата и требуемых возможностей
+
+        Args:
+            suffix: Расширение файла
+            require: Обязательные возможности
+
+        Returns:
+            True если бэкенд подходит
+        """
+        return suffix in self.formats and self.capabilities.issuperset(require)
+
+    def convert(self, input_file, block_cache_path: Optional[Path] = None) -> Optional[str]:
+        """
+        Конвертирует документ в markdown
+
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            block_cache_path: Путь к карте отпечатков блоков (для инкрементальных бэкендов)
+
+        Returns:
+            Markdown контент или None при ошибке
+        """
+        raise NotImplementedError
+
+    def iter_pages(self, input_file, segment_size: int) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Конвертирует документ по страницам (для бэкендов с возможностью streaming)
+
+        В памяти одновременно находится только текущая страница или часть
+        документа; склеенные фрагменты совпадают с результатом convert.
+        Ошибки не перехватываются.
+
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            segment_size: Размер части в байтах для форматов без страниц
+
+        Returns:
+            Итератор пар (фрагмент markdown, номер страницы или None)
+        """
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Описание бэкенда для вывода пользователю
+
+        Returns:
+            Словарь с именем, доступностью, форматами и возможностями
+        """
+        return {
+            "name": self.name,
+            "available": self.is_available(),
+            "formats": dict(self.formats),
+            "capabilities": sorted(self.capabilities),
+        }
+
+
+class DoclingBackend(ConverterBackend):
+    """Конвертация с помощью docling с разбором макета документа"""
+
+    name = 'docling'
+    formats = {'.docx': 0.9, '.pdf': 0.9, '.txt': 0.9, '.rtf': 0.9}
+    capabilities = frozenset({'formatting', 'tables', 'images', 'pages'})
+    throughput = 2e5
+
+    def is_available(self) -> bool:
+        try:
+            import docling  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def convert(self, input_file, block_cache_path: Optional[Path] = None) -> Optional[str]:
+        try:
+            # Здесь будет интеграция с docling
+            # Пока что возвращаем заглушку
+            return f"# Конвертированный документ\n\nФайл: {input_file.name}\n\n"
+        except Exception as e:
+            self.logger.error(f"Ошибка при работе с docling: {e}")
+            return None
+
+
+class DocxBackend(ConverterBackend):
+    """
+    Поблочная конвертация DOCX по разметке WordprocessingML
+
+    Повторно использует markdown неизмененных блоков из карты отпечатков
+    предыдущей конвертации (см. docx_blocks).
+    """
+
+    name = 'docx'
+    formats = {'.docx': 1.0}
+    capabilities = frozenset({'formatting', 'tables', 'incremental', 'streaming'})
+    throughput = 2e7
+
+    def convert(self, input_file, block_cache_path: Optional[Path] = None) -> Optional[str]:
+        try:
+            cache = load_block_cache(block_cache_path) if block_cache_path else None
+            source = input_file if isinstance(input_file, Path) else input_file.stream
+            markdown_content, new_cache, stats = convert_docx(source, cache)
+            if block_cache_path:
+                save_block_cache(block_cache_path, new_cache)
+            self.logger.info(
+                f"Блоки {input_file.name}: повторно использовано {stats['reused']}, "
+                f"сконвертировано {stats['rendered']}"
+            )
+            return markdown_content
+        except Exception as e:
+            self.logger.error(f"Ошибка при конвертации DOCX {input_file.name}: {e}")
+            return None
+
+    def iter_pages(self, input_file, segment_size: int) -> Iterator[Tuple[str, Optional[int]]]:
+        # Страниц в DOCX нет: фрагменты идут по блокам, карта отпечатков не ведется
+        with _open_binary(input_file) as source:
+            for piece in iter_docx_markdown(source):
+                yield piece, None
+
+
+class PlainTextBackend(ConverterBackend):
+    """Перенос текста без разбора структуры (TXT, RTF без форматирования)"""
+
+    name = 'text'
+    formats = {'.txt': 0.7, '.rtf': 0.4}
+    capabilities = frozenset({'streaming'})
+    throughput = 1e8
+
+    def convert(self, input_file, block_cache_path: Optional[Path] = None) -> Optional[str]:
+        try:
+            data = _read_bytes(input_file)
+            if input_file.suffix.lower() == '.rtf':
+                text = _RTF_CONTROL_RE.sub(' ', data.decode('latin-1'))
+            else:
+                text = _decode_text(data)
+            text = _BLANK_LINES_RE.sub('\n\n', text.replace('\r\n', '\n')).strip()
+            return f"{text}\n" if text else None
+        except Exception as e:
+            self.logger.error(f"Ошибка при чтении текста {input_file.name}: {e}")
+            return None
+
+    def iter_pages(self, input_file, segment_size: int) -> Iterator[Tuple[str, Optional[int]]]:
+        rtf = input_file.suffix.lower() == '.rtf'
+        with _open_binary(input_file) as stream:
+            if rtf:
+                decoder = codecs.getincrementaldecoder('latin-1')()
+            elif not stream.seekable() or _is_utf8(stream, segment_size):
+                decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+            else:
+                decoder = codecs.getincrementaldecoder('cp1251')(errors='replace')
+
+            def texts() -> Iterator[str]:
+                carry = ''
+                for data in _read_segments(stream, segment_size):
+                    check_cancelled()
+                    text = carry + decoder.decode(data)
+                    carry = ''
+                    if rtf:
+                        # Управляющее слово в конце части может продолжаться в следующей
+                        cut = text.rfind('\\', max(len(text) - _RTF_CONTROL_MAX, 0))
+                        if cut != -1:
+                            text, carry = text[:cut], text[cut:]
+                        text = _RTF_CONTROL_RE.sub(' ', text)
+                    yield text
+                tail = carry + decoder.decode(b'', final=True)
+                yield _RTF_CONTROL_RE.sub(' ', tail) if rtf else tail
+
+            for piece in _iter_clean_text(texts()):
+                yield piece, None
+
+
+class PdfTextBackend(ConverterBackend):
+    """Извлечение текстового слоя PDF с помощью PyPDF2 (без OCR и таблиц)"""
+
+    name = 'pypdf'
+    formats = {'.pdf': 0.6}
+    capabilities = frozenset({'pages', 'streaming'})
+    throughput = 2e6
+
+    def is_available(self) -> bool:
+        try:
+            import PyPDF2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def convert(self, input_file, block_cache_path: Optional[Path] = None) -> Optional[str]:
+        try:
+            from PyPDF2 import PdfReader
+
+            source = str(input_file) if isinstance(input_file, Path) else io.BytesIO(_read_bytes(input_file))
+            reader = PdfReader(source)
+            pages = []
+            for page in reader.pages:
+                check_cancelled()
+                pages.append((page.extract_text() or '').strip())
+            text = '\n\n'.join(page for page in pages if page)
+            return f"{text}\n" if text else None
+        except Exception as e:
+            self.logger.error(f"Ошибка при извлечении текста PDF {input_file.name}: {e}")
+            return None
+
+    def iter_pages(self, input_file, segment_size: int) -> Iterator[Tuple[str, Optional[int]]]:
+        from PyPDF2 import PdfReader
+
+        with _open_binary(input_file) as stream:
+            if not stream.seekable():
+                stream = io.BytesIO(stream.read())
+            # Из открытого файла PyPDF2 читает объекты по смещениям, а не весь файл
+            reader = PdfReader(stream)
+            resolved = getattr(reader, 'resolved_objects', None)
+            started = False
+            for number, page in enumerate(reader.pages, start=1):
+                check_cancelled()
+                text = (page.extract_text() or '').strip()
+                # Разобранные объекты страницы больше не нужны, иначе кэш
+                # PyPDF2 растет вместе с документом
+                if resolved is not None:
+                    resolved.clear()
+                if text:
+                    # Перевод строки в конце страницы: постобработка выдает строку
+                    # вместе с ее страницей, а не со следующей
+                    yield (f"\n{text}\n" if started else f"{text}\n"), number
+                    started = True
+
+
+def default_backends() -> List[ConverterBackend]:
+    """
+    Создает набор встроенных бэкендов
+
+    Returns:
+        Список бэкендов
+    """
+    return [DoclingBackend(), DocxBackend(), PlainTextBackend(), PdfTextBackend()]
+
+
+class BackendProfile:
+    """
+    Скользящий профиль бэкендов по форматам: экспоненциальное среднее
+    скорости (байт в секунду) и доли успешных конвертаций.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        """
+        Инициализация
+
+        Args:
+            alpha: Вес нового замера в скользящем среднем
+        """
+        self.alpha = alpha
+        self._stats: Dict[tuple, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, backend: str, suffix: str, size: Optional[int],
+               seconds: float, success: bool) -> None:
+        """
+        Добавляет замер конвертации
+
+        Args:
+            backend: Имя бэкенда
+            suffix: Расширение файла
+            size: Размер входа в байтах (None если неизвестен)
+            seconds: Длительность конвертации
+            success: Успешна ли конвертация
+        """
+        with self._lock:
+            stats = self._stats.get((backend, suffix))
+            if stats is None:
+                stats = {"count": 0, "success": 1.0, "throughput": None}
+                self._stats[(backend, suffix)] = stats
+            stats["count"] += 1
+            stats["success"] += self.alpha * (float(success) - stats["success"])
+            if success and size:
+                measured = size / max(seconds, 1e-6)
+                if stats["throughput"] is None:
+                    stats["throughput"] = measured
+                else:
+                    stats["throughput"] += self.alpha * (measured - stats["throughput"])
+
+    def throughput(self, backend: str, suffix: str) -> Optional[float]:
+        """Измеренная скорость бэкенда на формате или None"""
+        stats = self._stats.get((backend, suffix))
+        return stats["throughput"] if stats else None
+
+    def success_rate(self, backend: str, suffix: str) -> float:
+        """Доля успешных конвертаций (1.0 до первых замеров)"""
+        stats = self._stats.get((backend, suffix))
+        return stats["success"] if stats else 1.0
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Копия профиля для вывода
+
+        Returns:
+            Словарь бэкенд -> формат -> count, success, throughput
+        """
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (backend, suffix), stats in self._stats.items():
+                result.setdefault(backend, {})[suffix] = dict(stats)
+            return result
+
+
+class BackendSelector:
+    """
+    Выбирает бэкенд для документа
+
+    Из доступных бэкендов, поддерживающих формат и требуемые возможности,
+    берутся те, чье качество (заявленное, умноженное на долю успешных
+    конвертаций) не ниже min_quality, и сортируются по измеренной скорости.
+    Остальные подходящие бэкенды идут следом как запасные по убыванию качества.
+    """
+
+    def __init__(self, backends: Optional[List[ConverterBackend]] = None,
+                 min_quality: float = 0.9, profile: Optional[BackendProfile] = None):
+        """
+        Инициализация
+
+        Args:
+            backends: Список бэкендов (по умолчанию встроенные)
+            min_quality: Минимальное качество для автоматического выбора
+            profile: Профиль замеров
+        """
+        self.backends = backends if backends is not None else default_backends()
+        self.min_quality = min_quality
+        self.profile = profile or BackendProfile()
+
+    def get(self, name: str) -> ConverterBackend:
+        """
+        Возвращает бэкенд по имени
+
+        Args:
+            name: Имя бэкенда
+
+        Returns:
+            Бэкенд
+        """
+        for backend in self.backends:
+            if backend.name == name:
+                return backend
+        raise ValueError(f"Неизвестный бэкенд: {name}")
+
+    def quality(self, backend: ConverterBackend, suffix: str) -> float:
+        """Ожидаемое качество бэкенда на формате с учетом ошибок"""
+        return backend.formats.get(suffix, 0.0) * self.profile.success_rate(backend.name, suffix)
+
+    def speed(self, backend: ConverterBackend, suffix: str) -> float:
+        """Измеренная скорость бэкенда на формате или априорная"""
+        measured = self.profile.throughput(backend.name, suffix)
+        return measured if measured is not None else backend.throughput
+
+    def select(self, suffix: str, require: Iterable[str] = (),
+               backend: Optional[str] = None) -> List[ConverterBackend]:
+        """
+        Упорядочивает бэкенды для конвертации документа
+
+        Args:
+            suffix: Расширение файла
+            require: Обязательные возможности
+            backend: Имя бэкенда, выбранного явно (отменяет автоматический выбор)
+
+        Returns:
+            Бэкенды в порядке попыток (пустой список если подходящих нет)
+        """
+        suffix = suffix.lower()
+        require = frozenset(require)
+
+        if backend is not None:
+            chosen = self.get(backend)
+            if not chosen.is_available():
+                raise ValueError(f"Бэкенд {backend} недоступен: не установлены зависимости")
+            # Явный выбор важнее требуемых возможностей, проверяется только формат
+            if not chosen.supports(suffix):
+                raise ValueError(f"Бэкенд {backend} не поддерживает формат {suffix}")
+            return [chosen]
+
+        candidates = [b for b in self.backends if b.supports(suffix, require) and b.is_available()]
+        eligible = [b for b in candidates if self.quality(b, suffix) >= self.min_quality]
+        eligible.sort(key=lambda b: self.speed(b, suffix), reverse=True)
+        fallback = [b for b in candidates if b not in eligible]
+        fallback.sort(key=lambda b: self.quality(b, suffix), reverse=True)
+        return eligible + fallback
+
+    def run(self, input_file, require: Iterable[str] = (), backend: Optional[str] = None,
+            block_cache_path: Optional[Path] = None) -> Optional[str]:
+        """
+        Конвертирует документ, переходя к следующему бэкенду при ошибке
+
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            require: Обязательные возможности
+            backend: Имя бэкенда, выбранного явно
+            block_cache_path: Путь к карте отпечатков блоков
+
+        Returns:
+            Markdown контент или None если ни один бэкенд не справился
+        """
+        suffix = input_file.suffix.lower()
+        size = _input_size(input_file)
+        start_position = _stream_position(input_file)
+
+        for candidate in self.select(suffix, require, backend):
+            check_cancelled()
+            started = time.perf_counter()
+            markdown_content = candidate.convert(input_file, block_cache_path)
+            elapsed = time.perf_counter() - started
+            self.profile.record(candidate.name, suffix, size, elapsed, bool(markdown_content))
+            if markdown_content:
+                return markdown_content
+
+            if isinstance(input_file, Path):
+                continue
+            # Поток уже прочитан: повторить можно только если его можно перемотать
+            if start_position is None:
+                break
+            input_file.stream.seek(start_position)
+        return None
+
+    def iter_pages(self, input_file, segment_size: int, require: Iterable[str] = (),
+                   backend: Optional[str] = None) -> Optional[Iterator[Tuple[str, Optional[int]]]]:
+        """
+        Конвертирует документ по страницам бэкендом с возможностью streaming
+
+        Если бэкенд упал или ничего не вернул до первого фрагмента, берется
+        следующий; ошибка после первого фрагмента прерывает конвертацию.
+
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            segment_size: Размер части в байтах для форматов без страниц
+            require: Обязательные возможности
+            backend: Имя бэкенда, выбранного явно
+
+        Returns:
+            Итератор пар (фрагмент markdown, номер страницы или None) или None,
+            если подходящего бэкенда с возможностью streaming нет
+        """
+        suffix = input_file.suffix.lower()
+        candidates = [b for b in self.select(suffix, require, backend) if 'streaming' in b.capabilities]
+        if not candidates:
+            return None
+        return self._iter_pages(candidates, input_file, segment_size)
+
+    def _iter_pages(self, candidates: List[ConverterBackend], input_file,
+                    segment_size: int) -> Iterator[Tuple[str, Optional[int]]]:
+        """Перебирает бэкенды iter_pages и пишет замеры в профиль"""
+        suffix = input_file.suffix.lower()
+        size = _input_size(input_file)
+        start_position = _stream_position(input_file)
+
+        for candidate in candidates:
+            check_cancelled()
+            started = time.perf_counter()
+            produced = False
+            try:
+                for piece, page in candidate.iter_pages(input_file, segment_size):
+                    produced = True
+                    yield piece, page
+            except Exception as e:
+                self.profile.record(candidate.name, suffix, size, time.perf_counter() - started, False)
+                if produced:
+                    raise
+                logging.getLogger(__name__).error(
+                    f"Ошибка бэкенда {candidate.name} при конвертации {input_file.name} по страницам: {e}"
+                )
+            else:
+                # Время включает обработку фрагментов потребителем
+                self.profile.record(candidate.name, suffix, size, time.perf_counter() - started, produced)
+                if produced:
+                    return
+
+            if isinstance(input_file, Path):
+                continue
+            if start_position is None:
+                break
+            input_file.stream.seek(start_position)
+        raise RuntimeError(f"Не удалось конвертировать файл: {input_file.name}")
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """
+        Описание бэкендов вместе с профилем замеров
+
+        Returns:
+            Список описаний бэкендов
+        """
+        profile = self.profile.snapshot()
+        return [{**b.describe(), "profile": profile.get(b.name, {})} for b in self.backends]
+
+
+def _stream_position(input_file) -> Optional[int]:
+    """Позиция перемотки потока документа или None"""
+    if isinstance(input_file, Path):
+        return None
+    try:
+        return input_file.stream.tell() if input_file.stream.seekable() else None
+    except (AttributeError, OSError):
+        return None
+
+
+def _input_size(input_file) -> Optional[int]:
+    """Размер входа в байтах, если его можно узнать без чтения"""
+    if isinstance(input_file, Path):
+        try:
+            return input_file.stat().st_size
+        except OSError:
+            return None
+    position = _stream_position(input_file)
+    if position is None:
+        return None
+    stream = input_file.stream
+    size = stream.seek(0, io.SEEK_END) - position
+    stream.seek(position)
+    return size
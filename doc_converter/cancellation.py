@@ -0,0 +1,59 @@
+"""
+Кооперативная отмена конвертации, выполняющейся в рабочем потоке
+"""
+
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ConversionCancelled(BaseException):
+    """
+    Конвертация отменена вызывающим кодом
+
+    Наследуется от BaseException (как asyncio.CancelledError), чтобы не
+    перехватываться обработчиками `except Exception` в бэкендах и конвертере,
+    которые превращают ошибки в None и переходят к следующему бэкенду.
+    """
+
+
+# Событие отмены текущей конвертации (None вне cancel_scope)
+_cancel_event = contextvars.ContextVar('doc_converter_cancel_event', default=None)
+
+
+@contextmanager
+def cancel_scope(event: threading.Event) -> Iterator[threading.Event]:
+    """
+    Связывает событие отмены с текущим потоком выполнения
+
+    Внутри блока check_cancelled() прерывает конвертацию, как только событие
+    установлено. Область видимости - контекст (contextvars), поэтому
+    параллельные конвертации в разных потоках не мешают друг другу.
+
+    Args:
+        event: Событие, установка которого отменяет конвертацию
+
+    Returns:
+        То же событие
+    """
+    token = _cancel_event.set(event)
+    try:
+        yield event
+    finally:
+        _cancel_event.reset(token)
+
+
+def check_cancelled() -> None:
+    """
+    Прерывает конвертацию, если она отменена
+
+    Вызывается между блоками, страницами и фрагментами; вне cancel_scope
+    ничего не делает.
+
+    Raises:
+        ConversionCancelled: Если событие отмены установлено
+    """
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise ConversionCancelled()
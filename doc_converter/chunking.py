@@ -0,0 +1,225 @@
+"""
+Разбиение markdown на секции по заголовкам с ограничением размера
+"""
+
+import re
+import json
+from typing import Optional, Dict, Any, List, Iterator, Iterable, Tuple, Callable, IO
+
+
+HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t#]*$')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Грубая оценка количества токенов (около 4 символов на токен)
+
+    Args:
+        text: Текст
+
+    Returns:
+        Оценка количества токенов
+    """
+    return (len(text) + 3) // 4
+
+
+class MarkdownChunker:
+    """
+    Потоковый разбиватель markdown на секции.
+
+    Текст подается кусками через feed() по мере конвертации, готовые
+    секции возвращаются сразу, поэтому весь документ целиком в памяти
+    не держится. Текст каждой секции - непрерывный фрагмент итогового
+    markdown, а byte_start/byte_end указывают его позицию в UTF-8.
+    """
+
+    def __init__(self, max_chars: int = 2000, max_tokens: Optional[int] = None,
+                 token_counter: Callable[[str], int] = estimate_tokens):
+        """
+        Инициализация разбивателя
+
+        Args:
+            max_chars: Максимальный размер секции в символах
+            max_tokens: Максимальный размер секции в токенах (None - без ограничения)
+            token_counter: Функция подсчета токенов
+        """
+        if max_chars <= 0:
+            raise ValueError("max_chars должен быть положительным")
+        if max_tokens is not None and max_tokens <= 0:
+            raise ValueError("max_tokens должен быть положительным")
+
+        self.max_chars = max_chars
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+
+        self._headings: List[Tuple[int, str]] = []
+        self._in_fence = False
+        self._partial = ""
+        self._partial_page: Optional[int] = None
+        self._offset = 0
+        self._index = 0
+
+        # Текущая накапливаемая секция
+        self._lines: List[str] = []
+        self._chars = 0
+        self._tokens = 0
+        self._pages: List[int] = []
+        self._start = 0
+
+    def feed(self, text: str, page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Добавляет очередной фрагмент markdown
+
+        Args:
+            text: Фрагмент markdown
+            page: Номер страницы, к которой относится фрагмент
+
+        Returns:
+            Итератор готовых секций
+        """
+        if self._partial:
+            text = self._partial + text
+            page = self._partial_page if self._partial_page is not None else page
+
+        lines = text.splitlines(keepends=True)
+        if lines and not lines[-1].endswith(('\n', '\r')):
+            self._partial = lines.pop()
+            self._partial_page = page
+        else:
+            self._partial = ""
+            self._partial_page = None
+
+        for line in lines:
+            yield from self._add_line(line, page)
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        """
+        Завершает поток и возвращает оставшиеся секции
+
+        Returns:
+            Итератор последних секций
+        """
+        if self._partial:
+            line, page = self._partial, self._partial_page
+            self._partial = ""
+            self._partial_page = None
+            yield from self._add_line(line, page)
+        yield from self._flush()
+
+    def _add_line(self, line: str, page: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """Обрабатывает одну строку markdown"""
+        if FENCE_RE.match(line):
+            self._in_fence = not self._in_fence
+        elif not self._in_fence:
+            match = HEADING_RE.match(line.rstrip('\r\n'))
+            if match:
+                # Новый заголовок закрывает текущую секцию
+                yield from self._flush()
+                level = len(match.group(1))
+                self._headings = [h for h in self._headings if h[0] < level]
+                self._headings.append((level, match.group(2).strip()))
+
+        line_chars = len(line)
+        line_tokens = self.token_counter(line) if self.max_tokens else 0
+
+        if self._lines and self._exceeds(self._chars + line_chars, self._tokens + line_tokens):
+            yield from self._flush()
+
+        if self._exceeds(line_chars, line_tokens):
+            # Строка сама по себе больше бюджета - режем ее на части
+            for piece in self._split_line(line):
+                self._append(piece, page)
+                yield from self._flush()
+            return
+
+        self._append(line, page)
+
+    def _exceeds(self, chars: int, tokens: int) -> bool:
+        """Проверяет превышение бюджета секции"""
+        if chars > self.max_chars:
+            return True
+        return self.max_tokens is not None and tokens > self.max_tokens
+
+    def _split_line(self, line: str) -> Iterator[str]:
+        """Режет слишком длинную строку на части в пределах бюджета"""
+        step = self.max_chars
+        if self.max_tokens is not None:
+            # Подбираем шаг так, чтобы каждая часть укладывалась и в токены
+            while step > 1 and self.token_counter(line[:step]) > self.max_tokens:
+                step //= 2
+        for start in range(0, len(line), step):
+            yield line[start:start + step]
+
+    def _append(self, text: str, page: Optional[int]) -> None:
+        """Добавляет текст в текущую секцию"""
+        if not self._lines:
+            self._start = self._offset
+        self._lines.append(text)
+        self._chars += len(text)
+        if self.max_tokens:
+            self._tokens += self.token_counter(text)
+        if page is not None:
+            self._pages.append(page)
+        self._offset += len(text.encode('utf-8'))
+
+    def _flush(self) -> Iterator[Dict[str, Any]]:
+        """Возвращает текущую секцию, если она не пуста"""
+        if not self._lines:
+            return
+        text = "".join(self._lines)
+        chunk = {
+            "index": self._index,
+            "heading_path": [title for _, title in self._headings],
+            "text": text,
+            "page_start": min(self._pages) if self._pages else None,
+            "page_end": max(self._pages) if self._pages else None,
+            "byte_start": self._start,
+            "byte_end": self._offset,
+            "chars": len(text),
+            "tokens": self.token_counter(text),
+        }
+        self._index += 1
+        self._lines = []
+        self._chars = 0
+        self._tokens = 0
+        self._pages = []
+        yield chunk
+
+
+def chunk_markdown(pieces: Iterable[Tuple[str, Optional[int]]], max_chars: int = 2000,
+                   max_tokens: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Разбивает поток фрагментов markdown на секции
+
+    Args:
+        pieces: Итератор пар (фрагмент, номер страницы)
+        max_chars: Максимальный размер секции в символах
+        max_tokens: Максимальный размер секции в токенах
+
+    Returns:
+        Итератор секций
+    """
+    chunker = MarkdownChunker(max_chars=max_chars, max_tokens=max_tokens)
+    for text, page in pieces:
+        yield from chunker.feed(text, page)
+    yield from chunker.close()
+
+
+def write_jsonl(chunks: Iterable[Dict[str, Any]], stream: IO[str]) -> int:
+    """
+    Записывает секции в формате JSONL
+
+    Args:
+        chunks: Итератор секций
+        stream: Текстовый поток для записи
+
+    Returns:
+        Количество записанных секций
+    """
+    count = 0
+    for chunk in chunks:
+        stream.write(json.dumps(chunk, ensure_ascii=False))
+        stream.write('\n')
+        count += 1
+    return count
@@ -2,10 +2,22 @@
 CLI интерфейс для конвертера документов
 """
 
+import json
 import click
 import logging
 from pathlib import Path
 from .converter import DocumentConverter
+from .search_index import SearchIndex, DEFAULT_INDEX_NAME
+from .similarity import NearDuplicateIndex
+from .archive import convert_archive, is_archive
+from .backends import default_backends
+from .postprocess import TABLE_FORMATS
+from .compression import (
+    CODECS, DEFAULT_DICTIONARY_SIZE, codec_for_path, compressed_path, open_compressed, resolve_codec, train_dictionary
+)
+
+
+BACKEND_NAMES = [backend.name for backend in default_backends()]
 
 
 def setup_logging(verbose: bool):
@@ -17,6 +29,43 @@ def setup_logging(verbose: bool):
     )
 
 
+def converter_config(backend, table_format, low_memory=False, memory_budget=None,
+                     compression_level=None, dictionary=None):
+    """Собирает конфигурацию DocumentConverter из опций командной строки"""
+    config = {}
+    if compression_level is not None:
+        config['compression_level'] = compression_level
+    if dictionary:
+        config['compression_dictionary'] = dictionary
+    if backend:
+        config['backend'] = backend
+    if table_format:
+        config['table_format'] = table_format
+    if memory_budget:
+        config['memory_budget'] = memory_budget * 1024 * 1024
+        config['low_memory'] = 'auto'
+    if low_memory:
+        config['low_memory'] = True
+    return config or None
+
+
+def memory_options(command):
+    """Опции режима конвертации по страницам"""
+    command = click.option('--memory-budget', type=int, default=None,
+                           help='Бюджет памяти в МБ: документы больше четверти бюджета '
+                                'конвертируются по страницам')(command)
+    return click.option('--low-memory', is_flag=True,
+                        help='Конвертировать по страницам с записью результата сразу на диск')(command)
+
+
+def compression_options(command):
+    """Опции сжатия выходных файлов (.gz, .zst, .zz)"""
+    command = click.option('--dictionary', type=click.Path(exists=True, dir_okay=False), default=None,
+                           help='Словарь сжатия zstd/zlib (см. train-dictionary)')(command)
+    return click.option('--compression-level', type=int, default=None,
+                        help='Уровень сжатия (по умолчанию 6 для gzip/zlib и 3 для zstd)')(command)
+
+
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='Подробный вывод')
 @click.pass_context
@@ -30,9 +79,25 @@ def cli(ctx, verbose):
 @click.argument('input_file', type=click.Path(exists=True))
 @click.argument('output_file', type=click.Path())
 @click.option('--config', '-c', type=click.Path(), help='Файл конфигурации')
-def convert(input_file, output_file, config):
-    """Конвертирует документ в markdown"""
-    converter = DocumentConverter()
+@click.option('--output-format', '-f', type=click.Choice(['markdown', 'chunks']), default='markdown',
+              help='Формат вывода: markdown или JSONL секции по заголовкам')
+@click.option('--max-chars', type=int, default=2000, show_default=True, help='Максимальный размер секции в символах')
+@click.option('--max-tokens', type=int, default=None, help='Максимальный размер секции в токенах')
+@click.option('--index', 'index_path', type=click.Path(), default=None,
+              help='Добавить результат в полнотекстовый индекс (файл SQLite)')
+@click.option('--backend', '-b', type=click.Choice(BACKEND_NAMES), default=None,
+              help='Бэкенд конвертации (по умолчанию самый быстрый из подходящих)')
+@click.option('--table-format', type=click.Choice(TABLE_FORMATS), default=None,
+              help='Перерисовать таблицы в выбранном формате')
+@memory_options
+@compression_options
+def convert(input_file, output_file, config, output_format, max_chars, max_tokens, index_path,
+            backend, table_format, low_memory, memory_budget, compression_level, dictionary):
+    """Конвертирует документ в markdown (OUTPUT_FILE с .gz/.zst/.zz сжимается)"""
+    search_index = SearchIndex(index_path) if index_path else None
+    converter = DocumentConverter(converter_config(backend, table_format, low_memory, memory_budget,
+                                                   compression_level, dictionary),
+                                  search_index=search_index)
     
     # Проверяем поддерживается ли формат
     if not converter.is_supported_format(input_file):
@@ -41,7 +106,10 @@ def convert(input_file, output_file, config):
         return 1
     
     # Конвертируем документ
-    success = converter.convert(input_file, output_file)
+    if output_format == 'chunks':
+        success = converter.convert_to_chunks(input_file, output_file, max_chars, max_tokens)
+    else:
+        success = converter.convert(input_file, output_file)
     
     if success:
         click.echo(f"✅ Конвертация завершена: {output_file}")
@@ -51,6 +119,174 @@ def convert(input_file, output_file, config):
         return 1
 
 
+@cli.command()
+@click.argument('input_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('output_dir', type=click.Path(file_okay=False))
+@click.option('--recursive', '-r', is_flag=True, help='Обходить вложенные каталоги')
+@click.option('--index', 'index_path', type=click.Path(), default=None,
+              help=f'Файл полнотекстового индекса (по умолчанию OUTPUT_DIR/{DEFAULT_INDEX_NAME})')
+@click.option('--no-index', is_flag=True, help='Не индексировать результаты')
+@click.option('--near-duplicates', type=click.Choice(['off', 'flag', 'skip']), default='off',
+              show_default=True, help='Отмечать или пропускать почти одинаковые документы')
+@click.option('--similarity-threshold', type=float, default=None,
+              help='Порог сходства почти одинаковых документов (по умолчанию 0.8 '
+                   'или порог из --similarity-index)')
+@click.option('--similarity-index', type=click.Path(), default=None,
+              help='JSON файл индекса сходства для повторных запусков')
+@click.option('--backend', '-b', type=click.Choice(BACKEND_NAMES), default=None,
+              help='Бэкенд конвертации (по умолчанию самый быстрый из подходящих)')
+@click.option('--table-format', type=click.Choice(TABLE_FORMATS), default=None,
+              help='Перерисовать таблицы в выбранном формате')
+@click.option('--compress', type=click.Choice(('none', 'auto') + CODECS), default='none', show_default=True,
+              help='Сжимать результаты (auto - zstd если установлен, иначе gzip)')
+@memory_options
+@compression_options
+def batch(input_dir, output_dir, recursive, index_path, no_index,
+          near_duplicates, similarity_threshold, similarity_index, backend, table_format,
+          compress, low_memory, memory_budget, compression_level, dictionary):
+    """Конвертирует все поддерживаемые документы каталога"""
+    input_root = Path(input_dir)
+    output_root = Path(output_dir)
+    
+    try:
+        codec = resolve_codec(compress, dictionary=bool(dictionary))
+    except ValueError as e:
+        click.echo(f"❌ {e}")
+        return 1
+    
+    search_index = None
+    if not no_index:
+        search_index = SearchIndex(index_path or str(output_root / DEFAULT_INDEX_NAME))
+    
+    near_duplicate_index = None
+    if near_duplicates != 'off':
+        if similarity_index and Path(similarity_index).exists():
+            near_duplicate_index = NearDuplicateIndex.load(similarity_index, threshold=similarity_threshold)
+        else:
+            near_duplicate_index = NearDuplicateIndex(threshold=0.8 if similarity_threshold is None else similarity_threshold)
+    
+    converter = DocumentConverter(converter_config(backend, table_format, low_memory, memory_budget,
+                                                   compression_level, dictionary),
+                                  search_index=search_index, near_duplicate_index=near_duplicate_index)
+    
+    pattern = '**/*' if recursive else '*'
+    files = sorted(p for p in input_root.glob(pattern)
+                   if p.is_file() and converter.is_supported_format(str(p)))
+    
+    converted = 0
+    skipped = 0
+    for input_file in files:
+        matches = converter.find_near_duplicates(str(input_file), exclude=str(input_file.resolve()))
+        if matches:
+            original, similarity = matches[0]
+            click.echo(f"≈ {input_file} похож на {original} ({similarity:.2f})")
+            if near_duplicates == 'skip':
+                skipped += 1
+                continue
+        
+        output_file = compressed_path(output_root / input_file.relative_to(input_root).with_suffix('.md'), codec)
+        if converter.convert(str(input_file), str(output_file)):
+            converted += 1
+        else:
+            click.echo(f"❌ Ошибка при конвертации: {input_file}")
+    
+    click.echo(f"✅ Конвертировано {converted} из {len(files)} файлов в {output_root}")
+    if skipped:
+        click.echo(f"Пропущено почти одинаковых: {skipped}")
+    if search_index is not None:
+        click.echo(f"Документов в индексе: {search_index.count()}")
+        search_index.close()
+    if near_duplicate_index is not None:
+        clusters = near_duplicate_index.clusters()
+        click.echo(f"Кластеров почти одинаковых документов: {len(clusters)}")
+        if similarity_index:
+            near_duplicate_index.save(similarity_index)
+    return 0 if converted + skipped == len(files) else 1
+
+
+@cli.command('convert-archive')
+@click.argument('input_archive', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_archive', type=click.Path(dir_okay=False))
+@click.option('--workers', '-w', type=int, default=4, show_default=True, help='Количество потоков конвертации')
+@click.option('--max-member-size', type=int, default=None, help='Пропускать документы больше указанного размера (байт)')
+def convert_archive_command(input_archive, output_archive, workers, max_member_size):
+    """Конвертирует документы из ZIP/TAR архива в архив markdown без распаковки на диск"""
+    for name in (input_archive, output_archive):
+        if not is_archive(name):
+            click.echo(f"Неподдерживаемый формат архива: {name}. Поддерживаются .zip и .tar[.gz|.bz2|.xz]")
+            return 1
+    
+    converter = DocumentConverter()
+    Path(output_archive).parent.mkdir(parents=True, exist_ok=True)
+    with open(input_archive, 'rb') as src, open(output_archive, 'wb') as dst:
+        stats = convert_archive(converter, src, input_archive, dst, output_archive,
+                                workers=workers, max_member_size=max_member_size)
+    
+    click.echo(f"✅ Конвертировано {stats['converted']} документов в {output_archive}")
+    if stats['skipped']:
+        click.echo(f"Пропущено (формат или размер): {stats['skipped']}")
+    if stats['failed']:
+        click.echo(f"❌ Ошибок: {stats['failed']}")
+        return 1
+    return 0
+
+
+@cli.command('train-dictionary')
+@click.argument('samples_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('dictionary_file', type=click.Path(dir_okay=False))
+@click.option('--size', type=int, default=DEFAULT_DICTIONARY_SIZE // 1024, show_default=True,
+              help='Размер словаря в КБ (словарь zlib не больше 32 КБ)')
+@click.option('--codec', type=click.Choice(['auto', 'zstd', 'zlib']), default='auto', show_default=True,
+              help='Кодек, для которого обучается словарь')
+@click.option('--max-samples', type=int, default=10000, show_default=True, help='Максимальное число примеров')
+def train_dictionary_command(samples_dir, dictionary_file, size, codec, max_samples):
+    """Обучает словарь сжатия на сконвертированных markdown файлах каталога"""
+    paths = sorted(p for p in Path(samples_dir).rglob('*')
+                   if p.is_file() and Path(p.stem if codec_for_path(p) else p.name).suffix == '.md')[:max_samples]
+    samples = []
+    for path in paths:
+        with open_compressed(path, 'rb') as f:
+            samples.append(f.read())
+    
+    try:
+        dictionary = train_dictionary(samples, size * 1024, codec)
+    except ValueError as e:
+        click.echo(f"❌ {e}")
+        return 1
+    
+    Path(dictionary_file).parent.mkdir(parents=True, exist_ok=True)
+    Path(dictionary_file).write_bytes(dictionary)
+    click.echo(f"✅ Словарь {resolve_codec(codec, dictionary=True)} ({len(dictionary)} байт) "
+               f"по {len(samples)} документам: {dictionary_file}")
+    return 0
+
+
+@cli.command()
+@click.argument('query')
+@click.option('--index', 'index_path', type=click.Path(), default=f'output/{DEFAULT_INDEX_NAME}',
+              show_default=True, help='Файл полнотекстового индекса')
+@click.option('--limit', '-n', type=int, default=10, show_default=True, help='Количество результатов')
+def search(query, index_path, limit):
+    """Ищет по сконвертированным документам"""
+    if not Path(index_path).exists():
+        click.echo(f"Индекс не найден: {index_path}")
+        return 1
+    
+    search_index = SearchIndex(index_path)
+    results = search_index.search(query, limit=limit)
+    search_index.close()
+    
+    if not results:
+        click.echo("Ничего не найдено")
+        return 0
+    
+    for result in results:
+        click.echo(f"{result['title']} ({result['score']:.2f})")
+        click.echo(f"  {result['key']}")
+        click.echo(f"  {result['snippet']}")
+    return 0
+
+
 @cli.command()
 def formats():
     """Показывает поддерживаемые форматы"""
@@ -61,17 +297,50 @@ def formats():
         click.echo(f"  - {fmt}")
 
 
+@cli.command()
+def backends():
+    """Показывает бэкенды конвертации и их возможности"""
+    converter = DocumentConverter()
+    for backend in converter.get_backends():
+        status = '✅' if backend['available'] else '❌'
+        formats = ', '.join(f"{fmt} ({quality:.1f})" for fmt, quality in backend['formats'].items())
+        click.echo(f"{status} {backend['name']}: {formats}")
+        if backend['capabilities']:
+            click.echo(f"    возможности: {', '.join(backend['capabilities'])}")
+
+
 @cli.command()
 @click.argument('input_file', type=click.Path(exists=True))
-def info(input_file):
-    """Показывает информацию о файле"""
-    file_path = Path(input_file)
+@click.option('--json', 'as_json', is_flag=True, help='Вывести результат в JSON')
+def info(input_file, as_json):
+    """Показывает информацию о файле и оценку стоимости конвертации"""
     converter = DocumentConverter()
+    details = converter.inspect(input_file)
+    
+    if as_json:
+        click.echo(json.dumps(details, ensure_ascii=False, indent=2))
+        return
     
-    click.echo(f"Файл: {file_path.name}")
-    click.echo(f"Размер: {file_path.stat().st_size} байт")
-    click.echo(f"Формат: {file_path.suffix}")
-    click.echo(f"Поддерживается: {'✅' if converter.is_supported_format(input_file) else '❌'}")
+    click.echo(f"Файл: {details['name']}")
+    click.echo(f"Размер: {details['size']} байт")
+    click.echo(f"Формат: {details['extension']}")
+    click.echo(f"Поддерживается: {'✅' if details['supported'] else '❌'}")
+    if details['error']:
+        click.echo(f"Ошибка: {details['error']}")
+    if details['encrypted']:
+        click.echo("Документ зашифрован")
+    if details['pages'] is not None:
+        click.echo(f"Страниц: {details['pages']}")
+    if details['text_pages'] is not None and details['extension'] == '.pdf':
+        layer = 'нет (скан)' if details['scanned'] else f"{details['text_pages']} стр."
+        click.echo(f"Текстовый слой: {layer}")
+    if details['paragraphs'] is not None:
+        click.echo(f"Абзацев: {details['paragraphs']}, таблиц: {details['tables']}")
+    if details['images']:
+        click.echo(f"Изображений: {details['images']} ({details['images_size']} байт)")
+    cost = details['cost']
+    estimate = f", ~{cost['seconds']:.2f} с" if cost['seconds'] is not None else ''
+    click.echo(f"Стоимость: {cost['units']} ед.{estimate} (бэкенд: {details['backend'] or '-'})")
 
 
 def main():
@@ -0,0 +1,365 @@
+"""
+Сжатие результатов конвертации на диске: gzip, zstd (если установлен
+zstandard) и словарный режим для множества небольших похожих документов
+"""
+
+import io
+import os
+import gzip
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Union, Iterable, BinaryIO, IO
+
+
+# Кодеки и расширения сжатых файлов; zlib - поток zlib с предустановленным
+# словарем, встроенная замена zstd для словарного режима
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst', 'zlib': '.zz'}
+CODECS = tuple(SUFFIXES)
+
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3, 'zlib': 6}
+DEFAULT_DICTIONARY_SIZE = 64 * 1024
+# Словарь zlib полезен только в пределах окна deflate
+ZLIB_DICTIONARY_MAX = 32 * 1024
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_READ_SIZE = 64 * 1024
+
+DictionarySource = Union[None, bytes, str, os.PathLike]
+
+
+def zstd_available() -> bool:
+    """Проверяет установлен ли zstandard"""
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_codec(codec: Optional[str], dictionary: bool = False) -> Optional[str]:
+    """
+    Приводит имя кодека из настроек к имени из CODECS
+
+    Args:
+        codec: Имя кодека, 'auto' (zstd если установлен, иначе gzip, а для
+            словарного режима zlib) или None/'none' без сжатия
+        dictionary: Нужен ли кодек со словарем
+
+    Returns:
+        Имя кодека или None
+
+    Raises:
+        ValueError: Если кодек неизвестен, недоступен или не поддерживает словарь
+    """
+    if codec in (None, '', 'none'):
+        return None
+    if codec == 'auto':
+        if zstd_available():
+            return 'zstd'
+        return 'zlib' if dictionary else 'gzip'
+    if codec not in SUFFIXES:
+        raise ValueError(f"Неизвестный кодек сжатия: {codec}. Доступны: {', '.join(CODECS)}")
+    if codec == 'zstd' and not zstd_available():
+        raise ValueError("Для сжатия zstd нужен пакет zstandard")
+    if codec == 'gzip' and dictionary:
+        raise ValueError("gzip не поддерживает словарь: используйте zstd или zlib")
+    return codec
+
+
+def codec_for_path(path: Union[str, os.PathLike]) -> Optional[str]:
+    """Кодек по расширению файла или None для несжатых файлов"""
+    suffix = Path(path).suffix.lower()
+    for codec, codec_suffix in SUFFIXES.items():
+        if suffix == codec_suffix:
+            return codec
+    return None
+
+
+def compressed_path(path: Union[str, os.PathLike], codec: Optional[str]) -> Path:
+    """
+    Добавляет к пути расширение кодека
+
+    Args:
+        path: Путь к несжатому файлу (report.md)
+        codec: Имя кодека или None
+
+    Returns:
+        Путь к сжатому файлу (report.md.gz) или исходный путь без сжатия
+    """
+    path = Path(path)
+    return path.with_name(path.name + SUFFIXES[codec]) if codec else path
+
+
+def detect_codec(header: bytes, path: Union[str, os.PathLike, None] = None) -> Optional[str]:
+    """
+    Определяет кодек по первым байтам файла
+
+    У потока zlib нет надежной сигнатуры, поэтому он распознается только
+    вместе с расширением .zz.
+
+    Args:
+        header: Первые байты файла (не меньше 4)
+        path: Путь к файлу
+
+    Returns:
+        Имя кодека или None для несжатых данных
+    """
+    if header.startswith(_GZIP_MAGIC):
+        return 'gzip'
+    if header.startswith(_ZSTD_MAGIC):
+        return 'zstd'
+    if path is not None and codec_for_path(path) == 'zlib' and len(header) >= 2 \
+            and header[0] & 0x0f == 8 and (header[0] << 8 | header[1]) % 31 == 0:
+        return 'zlib'
+    return None
+
+
+def load_dictionary(source: DictionarySource) -> Optional[bytes]:
+    """
+    Загружает словарь сжатия
+
+    Args:
+        source: Байты словаря, путь к файлу словаря или None
+
+    Returns:
+        Байты словаря или None
+    """
+    if source is None or isinstance(source, bytes):
+        return source
+    return Path(source).read_bytes()
+
+
+def open_compressed(path: Union[str, os.PathLike], mode: str = 'rt', codec: Optional[str] = None,
+                    level: Optional[int] = None, dictionary: Optional[bytes] = None,
+                    encoding: str = 'utf-8', newline: Optional[str] = None) -> IO:
+    """
+    Открывает файл с потоковым сжатием или распаковкой
+
+    Данные сжимаются и распаковываются блоками по мере записи и чтения,
+    файл целиком в памяти не находится.
+
+    Args:
+        path: Путь к файлу
+        mode: 'r', 'rt', 'rb', 'w', 'wt' или 'wb'
+        codec: Кодек записи (по умолчанию по расширению файла, без
+            расширения кодека - без сжатия). При чтении кодек определяется
+            по сигнатуре файла, несжатые файлы читаются как есть
+        level: Уровень сжатия (по умолчанию DEFAULT_LEVELS)
+        dictionary: Словарь zstd или zlib (нужен и для чтения)
+        encoding: Кодировка текстового режима
+        newline: Обработка переводов строк текстового режима (как в open)
+
+    Returns:
+        Бинарный или текстовый файловый объект
+    """
+    if mode not in ('r', 'rt', 'rb', 'w', 'wt', 'wb'):
+        raise ValueError(f"Неподдерживаемый режим: {mode}")
+    if mode[0] == 'r':
+        with open(path, 'rb') as f:
+            codec = detect_codec(f.read(4), path)
+        stream = _open_reader(path, codec, dictionary)
+    else:
+        if codec is None:
+            codec = codec_for_path(path)
+        stream = _open_writer(path, codec, level, dictionary)
+    if 'b' in mode:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = DEFAULT_DICTIONARY_SIZE,
+                     codec: Optional[str] = 'auto') -> bytes:
+    """
+    Обучает словарь сжатия на примерах документов
+
+    Словарь содержит фрагменты, общие для многих документов (шаблонные
+    заголовки, шапки таблиц, колонтитулы), поэтому небольшие похожие
+    документы сжимаются заметно лучше, чем по отдельности.
+
+    Args:
+        samples: Содержимое документов-примеров
+        size: Максимальный размер словаря в байтах
+        codec: 'zstd', 'zlib' или 'auto'
+
+    Returns:
+        Байты словаря
+    """
+    codec = resolve_codec(codec, dictionary=True)
+    samples = [sample for sample in samples if sample]
+    if not samples:
+        raise ValueError("Нет примеров для обучения словаря")
+    if codec == 'zstd':
+        import zstandard
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Не удалось обучить словарь zstd: {e}")
+    return _train_zlib_dictionary(samples, min(size, ZLIB_DICTIONARY_MAX))
+
+
+def _train_zlib_dictionary(samples: Iterable[bytes], size: int) -> bytes:
+    """
+    Словарь zlib из строк, встречающихся в нескольких документах
+
+    Строки упорядочены по выгоде (число документов на длину): deflate
+    дешевле кодирует короткие расстояния, поэтому самые выгодные строки
+    ставятся в конец словаря.
+    """
+    frequency: Counter = Counter()
+    count = 0
+    for sample in samples:
+        count += 1
+        frequency.update({line for line in sample.splitlines(keepends=True) if len(line) > 3})
+    threshold = 2 if count > 1 else 1
+    ranked = sorted(
+        (line for line, documents in frequency.items() if documents >= threshold),
+        key=lambda line: frequency[line] * len(line), reverse=True
+    )
+    chosen = []
+    total = 0
+    for line in ranked:
+        if total + len(line) > size:
+            continue
+        chosen.append(line)
+        total += len(line)
+    return b''.join(reversed(chosen))
+
+
+def _open_writer(path, codec: Optional[str], level: Optional[int],
+                 dictionary: Optional[bytes]) -> BinaryIO:
+    """Открывает бинарный поток записи для кодека"""
+    if codec is not None and codec not in SUFFIXES:
+        raise ValueError(f"Неизвестный кодек сжатия: {codec}")
+    if dictionary is not None and codec not in ('zstd', 'zlib'):
+        raise ValueError("Словарь поддерживается только кодеками zstd и zlib")
+    if level is None and codec is not None:
+        level = DEFAULT_LEVELS[codec]
+
+    raw = open(path, 'wb')
+    try:
+        if codec is None:
+            return raw
+        if codec == 'gzip':
+            return _GzipWriter(raw, level)
+        if codec == 'zstd':
+            import zstandard
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+            compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+            return io.BufferedWriter(compressor.stream_writer(raw, closefd=True))
+        return io.BufferedWriter(_ZlibWriter(raw, level, dictionary))
+    except BaseException:
+        raw.close()
+        raise
+
+
+def _open_reader(path, codec: Optional[str], dictionary: Optional[bytes]) -> BinaryIO:
+    """Открывает бинарный поток чтения для кодека"""
+    raw = open(path, 'rb')
+    try:
+        if codec is None:
+            return raw
+        if codec == 'gzip':
+            return _GzipReader(raw)
+        if codec == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError(f"Для чтения {path} нужен пакет zstandard")
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            return io.BufferedReader(decompressor.stream_reader(raw, closefd=True))
+        return io.BufferedReader(_ZlibReader(raw, dictionary))
+    except BaseException:
+        raw.close()
+        raise
+
+
+class _GzipWriter(gzip.GzipFile):
+    """
+    GzipFile без имени файла и времени в заголовке (одинаковое содержимое
+    дает одинаковые байты), закрывающий файл вместе с собой
+    """
+
+    def __init__(self, raw: BinaryIO, level: int):
+        super().__init__(filename='', mode='wb', compresslevel=level, fileobj=raw, mtime=0)
+        self._raw = raw
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+class _GzipReader(gzip.GzipFile):
+    """GzipFile для чтения, закрывающий файл вместе с собой"""
+
+    def __init__(self, raw: BinaryIO):
+        super().__init__(filename='', mode='rb', fileobj=raw)
+        self._raw = raw
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+class _ZlibWriter(io.RawIOBase):
+    """Потоковое сжатие zlib с предустановленным словарем"""
+
+    def __init__(self, raw: BinaryIO, level: int, dictionary: Optional[bytes]):
+        self._raw = raw
+        if dictionary:
+            self._compressor = zlib.compressobj(level, zdict=dictionary)
+        else:
+            self._compressor = zlib.compressobj(level)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._raw.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._raw.write(self._compressor.flush())
+        finally:
+            self._raw.close()
+            super().close()
+
+
+class _ZlibReader(io.RawIOBase):
+    """Потоковая распаковка zlib с предустановленным словарем"""
+
+    def __init__(self, raw: BinaryIO, dictionary: Optional[bytes]):
+        self._raw = raw
+        header = raw.read(2)
+        raw.seek(0)
+        if len(header) == 2 and header[1] & 0x20 and not dictionary:
+            raise ValueError("Файл сжат со словарем: для чтения нужен словарь")
+        self._decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._decompressor.eof:
+            data = self._decompressor.unconsumed_tail or self._raw.read(_READ_SIZE)
+            if not data:
+                raise EOFError("Сжатый поток оборван")
+            chunk = self._decompressor.decompress(data, len(buffer))
+            if chunk:
+                buffer[:len(chunk)] = chunk
+                return len(chunk)
+        return 0
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+            super().close()
@@ -2,11 +2,51 @@
 Основной модуль для конвертации документов в markdown
 """
 
+import io
 import os
+import uuid
+import hashlib
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
-import docling
+from typing import Optional, Dict, Any, Iterator, Iterable, Tuple, List, Union, BinaryIO
+
+from .cancellation import check_cancelled
+from .chunking import chunk_markdown, write_jsonl
+from .compression import open_compressed, codec_for_path, load_dictionary
+from .docx_blocks import default_block_cache_dir
+from .inspection import inspect_document, estimate_cost
+from .backends import BackendSelector, ConverterBackend, _input_size, _stream_position
+from .postprocess import PostProcessor, build_postprocessor
+from .search_index import SearchIndex
+from .similarity import NearDuplicateIndex, extract_text
+
+
+InputSource = Union[str, os.PathLike, bytes, bytearray, BinaryIO, 'DocumentStream']
+
+# Бюджет памяти режима low_memory по умолчанию
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Минимальный размер части документа без страниц (TXT, RTF)
+MIN_SEGMENT_SIZE = 64 * 1024
+
+
+class DocumentStream:
+    """
+    Документ в памяти или в потоке (например, член архива или загрузка)
+    """
+    
+    def __init__(self, name: str, stream: BinaryIO, key: Optional[str] = None):
+        """
+        Инициализация
+        
+        Args:
+            name: Имя документа с расширением
+            stream: Бинарный поток с содержимым
+            key: Ключ документа в индексах (по умолчанию имя)
+        """
+        self.name = name
+        self.stream = stream
+        self.key = key or name
+        self.suffix = Path(name).suffix
 
 
 class DocumentConverter:
@@ -14,49 +54,80 @@ class DocumentConverter:
     Класс для конвертации документов различных форматов в markdown
     """
     
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 search_index: Optional[SearchIndex] = None,
+                 near_duplicate_index: Optional[NearDuplicateIndex] = None,
+                 backends: Optional[List[ConverterBackend]] = None):
         """
         Инициализация конвертера
         
         Args:
-            config: Конфигурация для docling
+            config: Конфигурация (backend - бэкенд по умолчанию, min_quality -
+                минимальное качество при автоматическом выборе бэкенда,
+                low_memory - конвертация по страницам: True, False или 'auto'
+                (для входов больше четверти memory_budget), memory_budget -
+                бюджет памяти в байтах, compression_level и compression_dictionary -
+                уровень и словарь (байты или путь) сжатия выходных файлов
+                .gz/.zst/.zz, опции постобработки - см. build_postprocessor)
+            search_index: Полнотекстовый индекс, пополняемый после каждой конвертации
+            near_duplicate_index: Индекс почти одинаковых документов
+            backends: Бэкенды конвертации (по умолчанию встроенные)
         """
         self.config = config or {}
+        self.search_index = search_index
+        self.near_duplicate_index = near_duplicate_index
+        # Последняя сигнатура по извлеченному тексту: ((путь, mtime, размер), сигнатура)
+        self._last_text_signature = None
+        self.selector = BackendSelector(backends, min_quality=self.config.get('min_quality', 0.9))
+        self.memory_budget = self.config.get('memory_budget', DEFAULT_MEMORY_BUDGET)
+        self.compression_dictionary = load_dictionary(self.config.get('compression_dictionary'))
         self.logger = logging.getLogger(__name__)
         
-    def convert(self, input_path: str, output_path: str) -> bool:
+    def convert(self, input_path: InputSource, output_path: str,
+                filename: Optional[str] = None, backend: Optional[str] = None,
+                require: Iterable[str] = (),
+                postprocess: Optional[Dict[str, Any]] = None) -> bool:
         """
         Конвертирует документ в markdown
         
         Args:
-            input_path: Путь к входному файлу
-            output_path: Путь к выходному markdown файлу
+            input_path: Путь к входному файлу, байты или бинарный поток
+            output_path: Путь к выходному markdown файлу (с расширением .gz,
+                .zst или .zz результат сжимается потоково)
+            filename: Имя документа, если на вход переданы байты или поток
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            require: Возможности, обязательные для бэкенда
+            postprocess: Опции постобработки поверх конфигурации
             
         Returns:
             True если конвертация прошла успешно, False иначе
         """
         try:
-            input_file = Path(input_path)
+            input_file = self._resolve_input(input_path, filename)
             output_file = Path(output_path)
             
-            if not input_file.exists():
+            if isinstance(input_file, Path) and not input_file.exists():
                 self.logger.error(f"Входной файл не найден: {input_path}")
                 return False
                 
             # Создаем директорию для выходного файла если её нет
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Используем docling для конвертации
-            self.logger.info(f"Конвертируем {input_path} в {output_path}")
+            self.logger.info(f"Конвертируем {input_file} в {output_path}")
             
-            # Здесь будет основная логика конвертации с docling
-            # Пока что создаем заглушку
-            markdown_content = self._convert_with_docling(input_file)
+            if self._use_low_memory(input_file):
+                return self._convert_low_memory(input_file, output_file, backend, require, postprocess)
+            
+            markdown_content = self._postprocess(self._convert_document(
+                input_file, self._block_cache_path(input_file, output_file), backend, require
+            ), postprocess)
             
             if markdown_content:
-                with open(output_file, 'w', encoding='utf-8') as f:
+                with self._open_output(output_file) as f:
                     f.write(markdown_content)
                 self.logger.info(f"Конвертация завершена: {output_path}")
+                self._index_document(input_file, markdown_content)
+                self._register_converted(input_file, markdown_content)
                 return True
             else:
                 self.logger.error("Не удалось получить markdown контент")
@@ -66,24 +137,579 @@ class DocumentConverter:
             self.logger.error(f"Ошибка при конвертации: {e}")
             return False
     
-    def _convert_with_docling(self, input_file: Path) -> Optional[str]:
+    def convert_to_string(self, input_path: InputSource, filename: Optional[str] = None,
+                          backend: Optional[str] = None,
+                          require: Iterable[str] = (),
+                          postprocess: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
-        Конвертирует файл с помощью docling
+        Конвертирует документ в markdown строку
         
         Args:
-            input_file: Путь к входному файлу
+            input_path: Путь к входному файлу, байты или бинарный поток
+            filename: Имя документа, если на вход переданы байты или поток
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            require: Возможности, обязательные для бэкенда
+            postprocess: Опции постобработки поверх конфигурации
             
         Returns:
             Markdown контент или None при ошибке
         """
         try:
-            # Здесь будет интеграция с docling
-            # Пока что возвращаем заглушку
-            return f"# Конвертированный документ\n\nФайл: {input_file.name}\n\n"
+            input_file = self._resolve_input(input_path, filename)
+            
+            if isinstance(input_file, Path) and not input_file.exists():
+                self.logger.error(f"Входной файл не найден: {input_path}")
+                return None
+            
+            if self._use_low_memory(input_file):
+                # Строка результата остается, но бэкенд и постобработка не
+                # держат в памяти весь документ и его копии
+                markdown_content = ''.join(
+                    piece for piece, _ in self._iter_markdown(input_file, backend, postprocess, require)
+                )
+                return markdown_content or None
+                
+            return self._postprocess(self._convert_document(
+                input_file, self._block_cache_path(input_file), backend, require
+            ), postprocess)
+                
         except Exception as e:
-            self.logger.error(f"Ошибка при работе с docling: {e}")
+            self.logger.error(f"Ошибка при конвертации: {e}")
             return None
     
+    def iter_markdown(self, input_path: InputSource, filename: Optional[str] = None,
+                      backend: Optional[str] = None,
+                      postprocess: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Конвертирует документ и возвращает markdown по фрагментам
+        
+        Args:
+            input_path: Путь к входному файлу, байты или бинарный поток
+            filename: Имя документа, если на вход переданы байты или поток
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            postprocess: Опции постобработки поверх конфигурации
+            
+        Returns:
+            Итератор фрагментов markdown
+        """
+        input_file = self._resolve_input(input_path, filename)
+        
+        if isinstance(input_file, Path) and not input_file.exists():
+            raise FileNotFoundError(f"Входной файл не найден: {input_path}")
+        
+        return (piece for piece, _ in self._iter_markdown(input_file, backend, postprocess))
+    
+    def iter_chunks(self, input_path: str, max_chars: int = 2000,
+                    max_tokens: Optional[int] = None,
+                    backend: Optional[str] = None,
+                    postprocess: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Конвертирует документ и разбивает markdown на секции по заголовкам
+        за один проход, по мере получения фрагментов от конвертера
+        
+        Args:
+            input_path: Путь к входному файлу
+            max_chars: Максимальный размер секции в символах
+            max_tokens: Максимальный размер секции в токенах
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            postprocess: Опции постобработки поверх конфигурации
+            
+        Returns:
+            Итератор секций с путем заголовков, диапазоном страниц и байтовыми смещениями
+        """
+        input_file = Path(input_path)
+        
+        if not input_file.exists():
+            raise FileNotFoundError(f"Входной файл не найден: {input_path}")
+        
+        return chunk_markdown(self._iter_markdown(input_file, backend, postprocess), max_chars, max_tokens)
+    
+    def convert_to_chunks(self, input_path: str, output_path: str, max_chars: int = 2000,
+                          max_tokens: Optional[int] = None) -> bool:
+        """
+        Конвертирует документ в JSONL файл с секциями
+        
+        Args:
+            input_path: Путь к входному файлу
+            output_path: Путь к выходному JSONL файлу (.jsonl.gz - со сжатием)
+            max_chars: Максимальный размер секции в символах
+            max_tokens: Максимальный размер секции в токенах
+            
+        Returns:
+            True если конвертация прошла успешно, False иначе
+        """
+        try:
+            chunks = self.iter_chunks(input_path, max_chars, max_tokens)
+            
+            output_file = Path(output_path)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            self.logger.info(f"Конвертируем {input_path} в секции {output_path}")
+            
+            with self._open_output(output_file) as f:
+                count = write_jsonl(chunks, f)
+            
+            self.logger.info(f"Записано секций: {count}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка при конвертации в секции: {e}")
+            return False
+    
+    def is_low_memory(self, input_path: InputSource, filename: Optional[str] = None) -> bool:
+        """
+        Проверяет будет ли документ конвертироваться в режиме low_memory
+        
+        Args:
+            input_path: Путь к входному файлу или бинарный поток
+            filename: Имя документа, если на вход передан поток
+            
+        Returns:
+            True если документ конвертируется по страницам
+        """
+        return self._use_low_memory(self._resolve_input(input_path, filename))
+    
+    def _use_low_memory(self, input_file: Union[Path, DocumentStream]) -> bool:
+        """Решает по config['low_memory'] и размеру входа, нужен ли режим low_memory"""
+        mode = self.config.get('low_memory', False)
+        if mode != 'auto':
+            return bool(mode)
+        size = _input_size(input_file)
+        # Бэкенд и постобработка держат несколько копий документа, поэтому
+        # целиком конвертируются только входы до четверти бюджета
+        return size is not None and size > self.memory_budget // 4
+    
+    def _segment_size(self) -> int:
+        """Размер части документа без страниц в режиме low_memory"""
+        return max(MIN_SEGMENT_SIZE, self.memory_budget // 16)
+    
+    def _open_output(self, output_file: Path, codec: Optional[str] = None):
+        """
+        Открывает выходной файл на запись текста
+        
+        Args:
+            output_file: Путь к выходному файлу
+            codec: Кодек сжатия (по умолчанию по расширению output_file)
+            
+        Returns:
+            Текстовый файловый объект со сжатием на лету
+        """
+        codec = codec or codec_for_path(output_file)
+        # Словарь есть только у zstd и zlib, gzip и несжатые файлы пишутся без него
+        dictionary = self.compression_dictionary if codec in ('zstd', 'zlib') else None
+        return open_compressed(
+            output_file, 'wt', codec=codec, level=self.config.get('compression_level'), dictionary=dictionary
+        )
+    
+    def _convert_low_memory(self, input_file: Union[Path, DocumentStream], output_file: Path,
+                            backend: Optional[str], require: Iterable[str],
+                            postprocess: Optional[Dict[str, Any]]) -> bool:
+        """
+        Конвертирует документ по страницам с записью результата сразу на диск
+        
+        Страницы проходят постобработку и сбрасываются во временный файл рядом
+        с результатом, который атомарно заменяет выходной файл. Карта
+        отпечатков блоков DOCX не ведется. Сжатие, если оно задано
+        расширением, идет на лету. Результат больше четверти бюджета
+        памяти не индексируется: для индексов его пришлось бы прочитать целиком.
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            output_file: Путь к выходному markdown файлу
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            require: Возможности, обязательные для бэкенда
+            postprocess: Опции постобработки поверх конфигурации
+            
+        Returns:
+            True если конвертация прошла успешно, False иначе
+        """
+        tmp_file = output_file.with_name(f"{output_file.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            size = 0
+            with self._open_output(tmp_file, codec_for_path(output_file)) as f:
+                for piece, _ in self._iter_markdown(input_file, backend, postprocess, require):
+                    f.write(piece)
+                    size += len(piece)
+            if not size:
+                self.logger.error("Не удалось получить markdown контент")
+                return False
+            os.replace(tmp_file, output_file)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+        self.logger.info(f"Конвертация по страницам завершена: {output_file} ({size} символов)")
+        
+        if size <= self.memory_budget // 4:
+            with open_compressed(output_file, 'rt', dictionary=self.compression_dictionary) as f:
+                markdown_content = f.read()
+            self._index_document(input_file, markdown_content)
+            self._register_converted(input_file, markdown_content)
+        elif self.search_index is not None or self.near_duplicate_index is not None:
+            self.logger.warning(f"Результат {output_file} больше бюджета памяти, индексация пропущена")
+        return True
+    
+    def _iter_markdown(self, input_file: Union[Path, DocumentStream], backend: Optional[str] = None,
+                       postprocess: Optional[Dict[str, Any]] = None,
+                       require: Iterable[str] = ()) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Возвращает markdown по фрагментам по мере конвертации
+        
+        Постобработка применяется к фрагментам на лету, за один проход.
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            postprocess: Опции постобработки поверх конфигурации
+            require: Возможности, обязательные для бэкенда
+            
+        Returns:
+            Итератор пар (фрагмент markdown, номер страницы или None)
+        """
+        processor = self._postprocessor(postprocess)
+        page = None
+        for piece, page in self._iter_raw_markdown(input_file, backend, require):
+            check_cancelled()
+            if processor is None:
+                yield piece, page
+                continue
+            processed = ''.join(processor.feed(piece))
+            if processed:
+                yield processed, page
+        if processor is not None:
+            tail = ''.join(processor.close())
+            if tail:
+                yield tail, page
+            self._log_timings(processor, input_file.name)
+    
+    def _iter_raw_markdown(self, input_file: Union[Path, DocumentStream],
+                           backend: Optional[str] = None,
+                           require: Iterable[str] = ()) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Возвращает markdown бэкенда по фрагментам без постобработки
+        
+        В режиме low_memory фрагменты идут по страницам от бэкенда с
+        возможностью streaming; если такого нет, документ конвертируется целиком.
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            require: Возможности, обязательные для бэкенда
+            
+        Returns:
+            Итератор пар (фрагмент markdown, номер страницы или None)
+        """
+        if self._use_low_memory(input_file):
+            pages = self.selector.iter_pages(
+                input_file, self._segment_size(), require, backend or self.config.get('backend')
+            )
+            if pages is not None:
+                yield from pages
+                return
+            self.logger.warning(f"Нет бэкенда для конвертации {input_file.name} по страницам, конвертируем целиком")
+        markdown_content = self._convert_document(input_file, backend=backend, require=require)
+        if markdown_content is None:
+            raise RuntimeError(f"Не удалось конвертировать файл: {input_file}")
+        yield markdown_content, None
+    
+    def _postprocessor(self, overrides: Optional[Dict[str, Any]] = None) -> Optional[PostProcessor]:
+        """
+        Собирает постобработку из конфигурации и опций вызова
+        
+        Args:
+            overrides: Опции постобработки поверх конфигурации
+            
+        Returns:
+            PostProcessor или None если преобразования отключены
+        """
+        return build_postprocessor({**self.config, **(overrides or {})})
+    
+    def _postprocess(self, markdown_content: Optional[str],
+                     overrides: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Применяет постобработку к результату конвертации
+        
+        Args:
+            markdown_content: Markdown контент или None
+            overrides: Опции постобработки поверх конфигурации
+            
+        Returns:
+            Обработанный markdown или None
+        """
+        if not markdown_content:
+            return markdown_content
+        processor = self._postprocessor(overrides)
+        if processor is None:
+            return markdown_content
+        result = processor.process_text(markdown_content)
+        self._log_timings(processor)
+        return result
+    
+    def _log_timings(self, processor: PostProcessor, name: str = '') -> None:
+        """Пишет в лог время преобразований постобработки"""
+        timings = ', '.join(f"{t} {seconds * 1000:.2f} мс" for t, seconds in processor.timings.items())
+        self.logger.debug(f"Постобработка {name}: {timings}")
+    
+    def _index_document(self, input_file: Union[Path, DocumentStream], markdown_content: str) -> None:
+        """
+        Добавляет результат конвертации в полнотекстовый индекс
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            markdown_content: Markdown контент
+        """
+        if self.search_index is None:
+            return
+        try:
+            key = str(input_file.resolve()) if isinstance(input_file, Path) else input_file.key
+            self.search_index.add_document(key, input_file.name, markdown_content)
+        except Exception as e:
+            # Ошибка индексации не должна ломать саму конвертацию
+            self.logger.error(f"Ошибка при индексации {input_file}: {e}")
+    
+    def find_near_duplicates(self, input_path: str, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Находит в индексе почти одинаковые документы по быстро извлеченному тексту
+        
+        Args:
+            input_path: Путь к входному файлу
+            exclude: Ключ самого документа, если он уже есть в индексе
+            
+        Returns:
+            Список пар (ключ документа, сходство) по убыванию сходства
+        """
+        if self.near_duplicate_index is None:
+            return []
+        signature = self._similarity_signature(Path(input_path))
+        if signature is None:
+            return []
+        return self.near_duplicate_index.query(signature, exclude=exclude)
+    
+    def register_near_duplicate(self, key: str, input_path: Optional[str],
+                                markdown_content: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Добавляет документ в индекс почти одинаковых документов
+        
+        Args:
+            key: Ключ документа в индексе
+            input_path: Путь к входному файлу (None для документов из потока)
+            markdown_content: Результат конвертации, если текст не извлекается быстро
+            
+        Returns:
+            Список почти одинаковых документов, найденных при добавлении
+        """
+        if self.near_duplicate_index is None:
+            return []
+        try:
+            input_file = Path(input_path) if input_path is not None else None
+            signature = self._similarity_signature(input_file, markdown_content)
+            if signature is None:
+                return []
+            return self.near_duplicate_index.add(key, signature)
+        except Exception as e:
+            self.logger.error(f"Ошибка при добавлении {input_path} в индекс сходства: {e}")
+            return []
+    
+    def _similarity_signature(self, input_file: Optional[Path], markdown_content: Optional[str] = None):
+        """
+        Вычисляет MinHash сигнатуру документа
+        
+        Args:
+            input_file: Путь к входному файлу или None
+            markdown_content: Результат конвертации для форматов без быстрого извлечения текста
+            
+        Returns:
+            Сигнатура или None если текст недоступен
+        """
+        signature = self._text_signature(input_file) if input_file is not None else None
+        if signature is None and markdown_content:
+            signature = self.near_duplicate_index.signature(markdown_content)
+        return signature
+    
+    def _text_signature(self, input_file: Path):
+        """
+        Вычисляет сигнатуру по быстро извлеченному тексту файла
+        
+        Последняя сигнатура запоминается: batch сначала ищет похожие документы,
+        затем конвертирует тот же файл, и текст не извлекается второй раз.
+        
+        Args:
+            input_file: Путь к входному файлу
+            
+        Returns:
+            Сигнатура или None если текст не извлекается
+        """
+        try:
+            stat = input_file.stat()
+            stamp = (str(input_file.resolve()), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        cached = self._last_text_signature
+        if stamp is not None and cached is not None and cached[0] == stamp:
+            return cached[1]
+        text = extract_text(input_file)
+        signature = self.near_duplicate_index.signature(text) if text else None
+        if stamp is not None:
+            self._last_text_signature = (stamp, signature)
+        return signature
+    
+    def _register_converted(self, input_file: Union[Path, DocumentStream],
+                            markdown_content: str) -> None:
+        """
+        Регистрирует результат конвертации в индексе почти одинаковых документов
+        
+        Args:
+            input_file: Путь к входному файлу или поток
+            markdown_content: Markdown контент
+        """
+        if isinstance(input_file, Path):
+            self.register_near_duplicate(str(input_file.resolve()), str(input_file), markdown_content)
+        else:
+            self.register_near_duplicate(input_file.key, None, markdown_content)
+    
+    def _resolve_input(self, source: InputSource,
+                       filename: Optional[str] = None) -> Union[Path, DocumentStream]:
+        """
+        Приводит вход к пути или потоку документа
+        
+        Args:
+            source: Путь, байты, бинарный поток или DocumentStream
+            filename: Имя документа (обязательно для байтов и потоков)
+            
+        Returns:
+            Path для файлов на диске или DocumentStream
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return Path(source)
+        if isinstance(source, DocumentStream):
+            return source
+        if filename is None:
+            raise ValueError("Для байтов и потоков нужно указать filename")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return DocumentStream(filename, io.BytesIO(bytes(source)))
+        if hasattr(source, 'read'):
+            return DocumentStream(filename, source)
+        raise TypeError(f"Неподдерживаемый тип входа: {type(source).__name__}")
+    
+    def _convert_document(self, input_file: Union[Path, DocumentStream],
+                          block_cache_path: Optional[Path] = None,
+                          backend: Optional[str] = None,
+                          require: Iterable[str] = ()) -> Optional[str]:
+        """
+        Конвертирует документ подходящим бэкендом
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            block_cache_path: Путь к карте отпечатков блоков DOCX
+            backend: Имя бэкенда (по умолчанию config['backend'] или автоматический выбор)
+            require: Возможности, обязательные для бэкенда
+            
+        Returns:
+            Markdown контент или None при ошибке
+        """
+        return self.selector.run(
+            input_file, require, backend or self.config.get('backend'), block_cache_path
+        )
+    
+    def _block_cache_path(self, input_file: Union[Path, DocumentStream],
+                          output_file: Optional[Path] = None) -> Optional[Path]:
+        """
+        Определяет где хранить карту отпечатков блоков документа
+        
+        Карты лежат в каталоге config['block_cache_dir'] (при конвертации в
+        файл по умолчанию - default_block_cache_dir()). При конвертации в файл
+        ключ - путь к результату: новая версия документа, сконвертированная
+        туда же, переиспользует неизмененные блоки. При конвертации в строку
+        ключ - SHA-256 содержимого, чтобы разные документы с одинаковым
+        именем не затирали карты друг друга.
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            output_file: Путь к выходному markdown файлу
+            
+        Returns:
+            Путь к карте или None если кэш блоков не используется
+        """
+        if input_file.suffix.lower() != '.docx' or not self.config.get('block_cache', True):
+            return None
+        cache_dir = self.config.get('block_cache_dir')
+        if output_file is not None:
+            cache_dir = cache_dir or default_block_cache_dir()
+            key = hashlib.sha256(str(output_file.resolve()).encode('utf-8')).hexdigest()
+        else:
+            key = self._content_hash(input_file) if cache_dir else None
+            if key is None:
+                return None
+        return Path(cache_dir) / f"{key}.blocks.json"
+    
+    @staticmethod
+    def _content_hash(input_file: Union[Path, DocumentStream]) -> Optional[str]:
+        """
+        Считает SHA-256 содержимого документа, возвращая поток на место
+        
+        Args:
+            input_file: Путь к входному файлу или поток документа
+            
+        Returns:
+            Hex SHA-256 или None для потока без перемотки
+        """
+        digest = hashlib.sha256()
+        if isinstance(input_file, Path):
+            with open(input_file, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            return digest.hexdigest()
+        position = _stream_position(input_file)
+        if position is None:
+            return None
+        stream = input_file.stream
+        try:
+            for block in iter(lambda: stream.read(1024 * 1024), b''):
+                digest.update(block)
+        finally:
+            stream.seek(position)
+        return digest.hexdigest()
+    
+    def inspect(self, input_path: InputSource, filename: Optional[str] = None,
+                backend: Optional[str] = None,
+                require: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Осматривает документ без конвертации и оценивает ее стоимость
+        
+        Время оценивается по замерам скорости бэкенда, который был бы выбран
+        для этого документа.
+        
+        Args:
+            input_path: Путь к входному файлу или бинарный поток (байты тоже подходят)
+            filename: Имя документа, если на вход переданы байты или поток
+            backend: Имя бэкенда (по умолчанию выбирается автоматически)
+            require: Возможности, обязательные для бэкенда
+            
+        Returns:
+            Результат inspect_document с полями supported, backend и cost
+        """
+        if isinstance(input_path, (bytes, bytearray, memoryview)):
+            input_path = io.BytesIO(bytes(input_path))
+        info = inspect_document(input_path, filename)
+        suffix = info["extension"]
+        try:
+            candidates = self.selector.select(suffix, require, backend or self.config.get('backend'))
+        except ValueError:
+            candidates = []
+        selected = candidates[0] if candidates else None
+        info["supported"] = suffix in self.get_supported_formats()
+        info["backend"] = selected.name if selected else None
+        info["cost"] = estimate_cost(info, self.selector.speed(selected, suffix) if selected else None)
+        return info
+    
+    def get_backends(self) -> List[Dict[str, Any]]:
+        """
+        Возвращает описание бэкендов с профилем замеров
+        
+        Returns:
+            Список описаний бэкендов
+        """
+        return self.selector.describe()
+    
     def get_supported_formats(self) -> list:
         """
         Возвращает список поддерживаемых форматов
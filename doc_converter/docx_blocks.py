@@ -0,0 +1,345 @@
+"""
+Поблочная конвертация DOCX в markdown с повторным использованием неизмененных блоков
+"""
+
+import os
+import re
+import json
+import uuid
+import hashlib
+import zipfile
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union, BinaryIO
+from xml.etree import ElementTree
+
+from .cancellation import check_cancelled
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W = '{' + W_NS + '}'
+
+# Версия формата рендеринга: при изменении рендерера кэш блоков сбрасывается
+RENDER_VERSION = 1
+
+_HEADING_NAME_RE = re.compile(r'^heading\s*(\d)$', re.IGNORECASE)
+_HEADING_ID_RE = re.compile(r'^heading(\d)$', re.IGNORECASE)
+
+
+def _load_styles(archive: zipfile.ZipFile) -> Tuple[Dict[str, str], str]:
+    """
+    Читает имена стилей абзацев
+
+    Returns:
+        Словарь styleId -> имя стиля и хеш styles.xml
+    """
+    try:
+        data = archive.read('word/styles.xml')
+    except KeyError:
+        return {}, ''
+    styles = {}
+    root = ElementTree.fromstring(data)
+    for style in root.iter(W + 'style'):
+        style_id = style.get(W + 'styleId')
+        name = style.find(W + 'name')
+        if style_id and name is not None:
+            styles[style_id] = name.get(W + 'val', '')
+    return styles, hashlib.sha1(data).hexdigest()
+
+
+class DocxBlockRenderer:
+    """
+    Рендерит блоки верхнего уровня тела документа (абзацы, таблицы,
+    разрывы разделов) в markdown.
+
+    Результат блока зависит только от XML блока и таблицы стилей, поэтому
+    markdown неизмененного блока можно взять из кэша предыдущей конвертации.
+    """
+
+    def __init__(self, styles: Dict[str, str]):
+        """
+        Инициализация
+
+        Args:
+            styles: Словарь styleId -> имя стиля
+        """
+        self.styles = styles
+
+    def render(self, element: ElementTree.Element) -> str:
+        """
+        Рендерит блок в markdown
+
+        Args:
+            element: Элемент w:p, w:tbl или w:sectPr
+
+        Returns:
+            Markdown блока (пустая строка для пустых блоков)
+        """
+        if element.tag == W + 'p':
+            return self._render_paragraph(element)
+        if element.tag == W + 'tbl':
+            return self._render_table(element)
+        return ''
+
+    def _style_id(self, paragraph: ElementTree.Element) -> str:
+        """Идентификатор стиля абзаца"""
+        style = paragraph.find(f'{W}pPr/{W}pStyle')
+        return style.get(W + 'val', '') if style is not None else ''
+
+    def _style_name(self, paragraph: ElementTree.Element) -> str:
+        """Имя стиля абзаца"""
+        style_id = self._style_id(paragraph)
+        return self.styles.get(style_id, style_id).strip()
+
+    def _heading_level(self, paragraph: ElementTree.Element) -> int:
+        """Уровень заголовка по стилю абзаца, 0 для обычного текста"""
+        style_id = self._style_id(paragraph)
+        if not style_id:
+            return 0
+        name = self._style_name(paragraph)
+        if name.lower() == 'title':
+            return 1
+        match = _HEADING_NAME_RE.match(name) or _HEADING_ID_RE.match(style_id)
+        return min(int(match.group(1)), 6) if match else 0
+
+    def _paragraph_text(self, paragraph: ElementTree.Element) -> str:
+        """Текст абзаца с жирным и курсивным начертанием"""
+        runs: List[Tuple[bool, bool, str]] = []
+        for run in paragraph.iter(W + 'r'):
+            props = run.find(W + 'rPr')
+            bold = props is not None and _is_on(props.find(W + 'b'))
+            italic = props is not None and _is_on(props.find(W + 'i'))
+            parts = []
+            for child in run:
+                if child.tag == W + 't':
+                    parts.append(child.text or '')
+                elif child.tag == W + 'tab':
+                    parts.append('\t')
+                elif child.tag in (W + 'br', W + 'cr'):
+                    parts.append('\n')
+            text = ''.join(parts)
+            if not text:
+                continue
+            # Word часто дробит текст на прогоны с одинаковым форматом
+            if runs and runs[-1][0] == bold and runs[-1][1] == italic:
+                runs[-1] = (bold, italic, runs[-1][2] + text)
+            else:
+                runs.append((bold, italic, text))
+
+        pieces = []
+        for bold, italic, text in runs:
+            marker = ('**' if bold else '') + ('*' if italic else '')
+            if marker and text.strip():
+                stripped = text.strip()
+                lead = text[:len(text) - len(text.lstrip())]
+                trail = text[len(text.rstrip()):]
+                pieces.append(f"{lead}{marker}{stripped}{marker[::-1]}{trail}")
+            else:
+                pieces.append(text)
+        return ''.join(pieces)
+
+    def _render_paragraph(self, paragraph: ElementTree.Element) -> str:
+        """Рендерит абзац, заголовок или элемент списка"""
+        text = self._paragraph_text(paragraph).strip()
+        if not text:
+            return ''
+
+        level = self._heading_level(paragraph)
+        if level:
+            return f"{'#' * level} {text}"
+
+        num = paragraph.find(f'{W}pPr/{W}numPr')
+        if num is not None:
+            ilvl = num.find(W + 'ilvl')
+            depth = int(ilvl.get(W + 'val', '0')) if ilvl is not None else 0
+            return f"{'  ' * depth}- {text}"
+        # Нумерация может быть задана в самом стиле (List Bullet, List Number)
+        if self._style_name(paragraph).lower().startswith('list'):
+            return f"- {text}"
+        return text
+
+    def _render_table(self, table: ElementTree.Element) -> str:
+        """Рендерит таблицу в формате pipe"""
+        rows = []
+        for row in table.findall(W + 'tr'):
+            cells = []
+            for cell in row.findall(W + 'tc'):
+                paragraphs = [self._paragraph_text(p).strip() for p in cell.iter(W + 'p')]
+                text = '<br>'.join(p for p in paragraphs if p)
+                cells.append(text.replace('|', '\\|').replace('\n', ' '))
+            rows.append(cells)
+        if not rows:
+            return ''
+
+        width = max(len(r) for r in rows)
+        rows = [r + [''] * (width - len(r)) for r in rows]
+        lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + ' --- |' * width]
+        lines.extend('| ' + ' | '.join(r) + ' |' for r in rows[1:])
+        return '\n'.join(lines)
+
+
+def _is_on(toggle: Optional[ElementTree.Element]) -> bool:
+    """Проверяет включен ли переключатель свойства (w:b, w:i)"""
+    if toggle is None:
+        return False
+    return toggle.get(W + 'val', 'true') not in ('0', 'false', 'off')
+
+
+def _iter_body_blocks(document: BinaryIO):
+    """
+    Потоково перебирает блоки верхнего уровня w:body
+
+    Обработанные блоки удаляются из дерева, поэтому память не растет
+    с размером документа.
+    """
+    depth = 0
+    body = None
+    for event, element in ElementTree.iterparse(document, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 2 and element.tag == W + 'body':
+                body = element
+            continue
+        depth -= 1
+        if depth == 2 and body is not None:
+            yield element
+            body.remove(element)
+
+
+def block_fingerprint(element: ElementTree.Element) -> str:
+    """
+    Отпечаток блока по его XML
+
+    Args:
+        element: Элемент блока
+
+    Returns:
+        Hex SHA-1 сериализованного XML
+    """
+    return hashlib.sha1(ElementTree.tostring(element)).hexdigest()
+
+
+def default_block_cache_dir() -> Path:
+    """
+    Каталог карт отпечатков блоков по умолчанию (в пользовательском кэше,
+    $XDG_CACHE_HOME/doc-converter/blocks)
+
+    Returns:
+        Путь к каталогу
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache_home) / 'doc-converter' / 'blocks'
+
+
+def load_block_cache(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Загружает карту отпечатков блоков
+
+    Args:
+        path: Путь к файлу кэша
+
+    Returns:
+        Кэш или None если файла нет или он поврежден
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('version') != RENDER_VERSION:
+        return None
+    return cache
+
+
+def save_block_cache(path: Union[str, Path], cache: Dict[str, Any]) -> None:
+    """
+    Атомарно сохраняет карту отпечатков блоков
+
+    Args:
+        path: Путь к файлу кэша
+        cache: Кэш блоков
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def convert_docx(source: Union[str, Path, BinaryIO],
+                 cache: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any], Dict[str, int]]:
+    """
+    Конвертирует DOCX в markdown, переиспользуя markdown неизмененных блоков
+
+    Результат всегда совпадает с полной конвертацией без кэша: блок берется
+    из кэша только при совпадении отпечатка его XML и таблицы стилей.
+
+    Args:
+        source: Путь к DOCX или бинарный поток
+        cache: Карта отпечатков предыдущей конвертации этого документа
+
+    Returns:
+        Кортеж (markdown, новая карта отпечатков, статистика reused/rendered)
+    """
+    with zipfile.ZipFile(source) as archive:
+        styles, styles_hash = _load_styles(archive)
+        if cache is None or cache.get('styles') != styles_hash:
+            cached_blocks: Dict[str, str] = {}
+        else:
+            cached_blocks = cache.get('blocks', {})
+
+        renderer = DocxBlockRenderer(styles)
+        order: List[str] = []
+        blocks: Dict[str, str] = {}
+        stats = {'reused': 0, 'rendered': 0}
+
+        with archive.open('word/document.xml') as document:
+            for element in _iter_body_blocks(document):
+                check_cancelled()
+                fingerprint = block_fingerprint(element)
+                if fingerprint in blocks:
+                    markdown = blocks[fingerprint]
+                elif fingerprint in cached_blocks:
+                    markdown = cached_blocks[fingerprint]
+                    stats['reused'] += 1
+                else:
+                    markdown = renderer.render(element)
+                    stats['rendered'] += 1
+                blocks[fingerprint] = markdown
+                order.append(fingerprint)
+
+    parts = [blocks[fingerprint] for fingerprint in order if blocks[fingerprint]]
+    markdown_content = '\n\n'.join(parts) + '\n' if parts else ''
+    new_cache = {
+        'version': RENDER_VERSION,
+        'styles': styles_hash,
+        'order': order,
+        'blocks': blocks,
+    }
+    return markdown_content, new_cache, stats
+
+
+def iter_docx_markdown(source: Union[str, Path, BinaryIO]) -> Iterator[str]:
+    """
+    Конвертирует DOCX в markdown по блокам без карты отпечатков
+
+    В памяти находится только текущий блок; склеенные фрагменты совпадают
+    с результатом convert_docx.
+
+    Args:
+        source: Путь к DOCX или бинарный поток
+
+    Returns:
+        Итератор фрагментов markdown
+    """
+    with zipfile.ZipFile(source) as archive:
+        styles, _ = _load_styles(archive)
+        renderer = DocxBlockRenderer(styles)
+        started = False
+        with archive.open('word/document.xml') as document:
+            for element in _iter_body_blocks(document):
+                check_cancelled()
+                markdown = renderer.render(element)
+                if markdown:
+                    yield f"\n{markdown}\n" if started else f"{markdown}\n"
+                    started = True
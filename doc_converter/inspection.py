@@ -0,0 +1,275 @@
+"""
+Быстрый осмотр документа до конвертации и оценка ее стоимости
+"""
+
+import io
+import os
+import re
+import math
+import zipfile
+from pathlib import Path
+from typing import Optional, Dict, Any, Union, BinaryIO, Tuple
+from xml.etree import ElementTree
+
+
+# Вес в единицах стоимости: страница с текстовым слоем стоит 1
+PAGE_COST = 1.0
+# Страница без текстового слоя потребует OCR
+SCANNED_PAGE_COST = 10.0
+IMAGE_COST = 0.2
+# Сколько символов текста приходится на страницу при оценке числа страниц
+CHARS_PER_PAGE = 3000
+PARAGRAPHS_PER_PAGE = 15
+OCR_SECONDS_PER_PAGE = 2.0
+
+_APP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}'
+# Абзацы и таблицы в document.xml; <w:pPr>, <w:tblPr> и т.п. не совпадают
+_DOCX_BLOCK_RE = re.compile(rb'<w:(p|tbl)[\s>/]')
+_SCAN_BUFFER = 1024 * 1024
+_SCAN_OVERLAP = 8
+
+# Запасной разбор PDF без PyPDF2 по сырым байтам (объекты в сжатых потоках не видны)
+_PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![s\w])')
+_PDF_IMAGE_RE = re.compile(rb'/Subtype\s*/Image\b')
+_PDF_FONT_RE = re.compile(rb'/Font\b')
+
+
+def inspect_document(source: Union[str, os.PathLike, BinaryIO],
+                     filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Читает заголовки и метаданные документа без конвертации
+
+    Для DOCX используется оглавление ZIP (изображения в word/media),
+    docProps/app.xml (страницы, слова) и потоковый подсчет абзацев и таблиц
+    по document.xml без построения дерева. Для PDF - дерево страниц и их
+    ресурсы (шрифты и изображения) без извлечения текста и декодирования
+    потоков.
+
+    Args:
+        source: Путь к файлу или бинарный поток с возможностью перемотки
+        filename: Имя документа, если передан поток
+
+    Returns:
+        Словарь с размером, числом страниц (всего, с текстовым слоем и
+        сканов), изображений, абзацев, таблиц; неизвестные значения равны None
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = Path(source)
+        stat = path.stat()
+        name, size, modified = path.name, stat.st_size, stat.st_mtime
+    else:
+        if filename is None:
+            raise ValueError("Для потока нужно указать filename")
+        path = None
+        name, modified = filename, None
+        start = source.tell()
+        size = source.seek(0, io.SEEK_END) - start
+        source.seek(start)
+
+    suffix = Path(name).suffix.lower()
+    info: Dict[str, Any] = {
+        "name": name,
+        "size": size,
+        "extension": suffix,
+        "modified": modified,
+        "pages": None,
+        "images": 0,
+        "images_size": 0,
+        "text_pages": None,
+        "scanned_pages": 0,
+        "scanned": False,
+        "paragraphs": None,
+        "tables": None,
+        "words": None,
+        "encrypted": False,
+        "error": None,
+    }
+    target = path if path is not None else source
+    try:
+        if suffix == '.docx':
+            info.update(_inspect_docx(target))
+        elif suffix == '.pdf':
+            info.update(_inspect_pdf(target))
+        elif suffix in ('.txt', '.rtf'):
+            info["pages"] = max(1, math.ceil(size / CHARS_PER_PAGE))
+            info["text_pages"] = info["pages"]
+    except Exception as e:
+        # Поврежденный файл не должен ломать оценку: остаются размер и расширение
+        info["error"] = f"Не удалось прочитать {name}: {e}"
+    finally:
+        if path is None:
+            source.seek(start)
+    return info
+
+
+def estimate_cost(info: Dict[str, Any], throughput: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Оценивает стоимость конвертации по результату inspect_document
+
+    Единицы стоимости предназначены для квот и планировщиков: страница с
+    текстом стоит PAGE_COST, страница скана - SCANNED_PAGE_COST, каждое
+    изображение - IMAGE_COST.
+
+    Args:
+        info: Результат inspect_document
+        throughput: Скорость бэкенда в байтах в секунду (для оценки времени)
+
+    Returns:
+        Словарь с единицами стоимости (units), оценкой времени в секундах
+        (seconds, None без throughput) и оценкой числа страниц (pages)
+    """
+    pages = info.get("pages")
+    if info.get("paragraphs"):
+        # Pages в app.xml бывает устаревшим (документы из генераторов), поэтому
+        # берем большую из оценок
+        pages = max(pages or 0, math.ceil(info["paragraphs"] / PARAGRAPHS_PER_PAGE))
+    elif pages is None:
+        pages = max(1, math.ceil(info.get("size", 0) / CHARS_PER_PAGE))
+    scanned_pages = min(info.get("scanned_pages") or 0, pages)
+    units = (pages - scanned_pages) * PAGE_COST + scanned_pages * SCANNED_PAGE_COST
+    units += info.get("images", 0) * IMAGE_COST
+
+    seconds = None
+    if throughput:
+        seconds = info.get("size", 0) / throughput + scanned_pages * OCR_SECONDS_PER_PAGE
+    return {"units": round(units, 2), "seconds": seconds, "pages": pages}
+
+
+def _inspect_docx(source: Union[Path, BinaryIO]) -> Dict[str, Any]:
+    """Осматривает DOCX по оглавлению ZIP, app.xml и разметке document.xml"""
+    result: Dict[str, Any] = {}
+    with zipfile.ZipFile(source) as archive:
+        media = [i for i in archive.infolist() if i.filename.startswith('word/media/') and not i.is_dir()]
+        result["images"] = len(media)
+        result["images_size"] = sum(i.file_size for i in media)
+
+        names = set(archive.namelist())
+        if 'docProps/app.xml' in names:
+            root = ElementTree.fromstring(archive.read('docProps/app.xml'))
+            for field, key in (('Pages', 'pages'), ('Words', 'words')):
+                value = root.findtext(_APP_NS + field)
+                if value and value.strip().isdigit():
+                    result[key] = int(value)
+
+        paragraphs = tables = 0
+        with archive.open('word/document.xml') as document:
+            tail = b''
+            while True:
+                block = document.read(_SCAN_BUFFER)
+                if not block:
+                    break
+                data = tail + block
+                # Совпадения в хвосте посчитаются со следующим блоком
+                cut = max(len(data) - _SCAN_OVERLAP, 0)
+                for match in _DOCX_BLOCK_RE.finditer(data):
+                    if match.start() >= cut:
+                        break
+                    if match.group(1) == b'p':
+                        paragraphs += 1
+                    else:
+                        tables += 1
+                tail = data[cut:]
+            for match in _DOCX_BLOCK_RE.finditer(tail):
+                if match.group(1) == b'p':
+                    paragraphs += 1
+                else:
+                    tables += 1
+        result["paragraphs"] = paragraphs
+        result["tables"] = tables
+    return result
+
+
+def _inspect_pdf(source: Union[Path, BinaryIO]) -> Dict[str, Any]:
+    """Осматривает PDF по дереву страниц и ресурсам страниц"""
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        return _scan_pdf_bytes(source)
+
+    reader = PdfReader(str(source) if isinstance(source, Path) else source)
+    if reader.is_encrypted:
+        return {"encrypted": True}
+
+    seen: Dict[Any, Tuple[bool, bool]] = {}
+    images = images_size = text_pages = image_pages = 0
+    for page in reader.pages:
+        resources = page.get('/Resources')
+        resources = resources.get_object() if resources is not None else {}
+        has_text = bool(resources.get('/Font'))
+        page_images, page_size, has_images, form_text = _count_pdf_images(resources, seen)
+        images += page_images
+        images_size += page_size
+        if has_text or form_text:
+            text_pages += 1
+        elif has_images:
+            image_pages += 1
+
+    pages = len(reader.pages)
+    return {
+        "pages": pages,
+        "images": images,
+        "images_size": images_size,
+        "text_pages": text_pages,
+        "scanned_pages": image_pages,
+        "scanned": pages > 0 and text_pages == 0 and image_pages > 0,
+    }
+
+
+def _count_pdf_images(resources, seen: Dict[Any, Tuple[bool, bool]], depth: int = 0) -> Tuple[int, int, bool, bool]:
+    """
+    Считает изображения в ресурсах страницы (включая вложенные формы)
+
+    Изображение, общее для нескольких страниц, считается один раз, но
+    каждая такая страница отмечается как содержащая изображения.
+
+    Returns:
+        Кортеж (число новых изображений, их размер в байтах, есть ли
+        изображения, есть ли шрифты во вложенных формах)
+    """
+    xobjects = resources.get('/XObject')
+    if not xobjects:
+        return 0, 0, False, False
+    xobjects = xobjects.get_object()
+    count = size = 0
+    has_images = form_text = False
+    for name in xobjects:
+        reference = xobjects.raw_get(name)
+        key = (reference.idnum, reference.generation) if hasattr(reference, 'idnum') else id(reference)
+        if key in seen:
+            image, text = seen[key]
+            has_images, form_text = has_images or image, form_text or text
+            continue
+        xobject = reference.get_object()
+        subtype = xobject.get('/Subtype')
+        image = text = False
+        if subtype == '/Image':
+            image = True
+            count += 1
+            length = xobject.get('/Length')
+            size += int(length.get_object()) if length is not None else 0
+        elif subtype == '/Form' and depth < 3:
+            form_resources = xobject.get('/Resources')
+            if form_resources is not None:
+                form_resources = form_resources.get_object()
+                nested_count, nested_size, image, text = _count_pdf_images(form_resources, seen, depth + 1)
+                text = text or bool(form_resources.get('/Font'))
+                count, size = count + nested_count, size + nested_size
+        seen[key] = (image, text)
+        has_images, form_text = has_images or image, form_text or text
+    return count, size, has_images, form_text
+
+
+def _scan_pdf_bytes(source: Union[Path, BinaryIO]) -> Dict[str, Any]:
+    """Приблизительный осмотр PDF по сырым байтам, когда PyPDF2 не установлен"""
+    data = source.read_bytes() if isinstance(source, Path) else source.read()
+    pages = len(_PDF_PAGE_RE.findall(data))
+    images = len(_PDF_IMAGE_RE.findall(data))
+    has_fonts = bool(_PDF_FONT_RE.search(data))
+    scanned = bool(pages) and not has_fonts and images > 0
+    return {
+        "pages": pages or None,
+        "images": images,
+        "text_pages": pages if has_fonts else 0,
+        "scanned_pages": pages if scanned else 0,
+        "scanned": scanned,
+    }
@@ -0,0 +1,379 @@
+"""
+Потоковая постобработка markdown за один проход по строкам
+"""
+
+import re
+import time
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple, Callable
+from urllib.parse import urljoin
+
+from .cancellation import check_cancelled
+from .chunking import FENCE_RE
+
+
+# Строка и признак того, что она внутри блока кода (вместе с ограждениями)
+Line = Tuple[str, bool]
+
+TABLE_FORMATS = ('pipe', 'grid', 'simple')
+
+# Закрывающие # отделяются пробелом, поэтому '# C#' остается как есть
+_HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$')
+_SEPARATOR_CELL_RE = re.compile(r'^:?-+:?$')
+_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+_LINK_RE = re.compile(r'(!?\[[^\]]*\])\(([^)\s]+)((?:\s+"[^"]*")?)\)')
+_SCHEME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+
+
+class LineTransform:
+    """
+    Базовый класс преобразования
+
+    Преобразование получает пачку строк и возвращает пачку строк; состояние
+    между пачками хранится в объекте, поэтому результат не зависит от того,
+    как текст был разбит на фрагменты.
+    """
+
+    name = ''
+
+    def process(self, lines: List[Line]) -> List[Line]:
+        """
+        Обрабатывает пачку строк
+
+        Args:
+            lines: Строки без символа перевода строки
+
+        Returns:
+            Обработанные строки
+        """
+        raise NotImplementedError
+
+    def flush(self) -> List[Line]:
+        """
+        Возвращает строки, накопленные к концу документа
+
+        Returns:
+            Оставшиеся строки
+        """
+        return []
+
+
+class WhitespaceTransform(LineTransform):
+    """
+    Убирает пробелы в конце строк, пустые строки в начале и повторные пустые
+    строки. Ровно два пробела в конце строки текста - жесткий перенос
+    markdown, они сохраняются.
+    """
+
+    name = 'whitespace'
+
+    def __init__(self):
+        self._started = False
+        self._blank = False
+
+    def process(self, lines: List[Line]) -> List[Line]:
+        result = []
+        for text, fenced in lines:
+            if fenced:
+                if self._blank:
+                    result.append(('', False))
+                    self._blank = False
+                result.append((text, True))
+                self._started = True
+                continue
+            text = text.replace('\u00a0', ' ')
+            hard_break = text.endswith('  ') and not text.endswith('   ')
+            text = text.rstrip()
+            if hard_break and text and not _HEADING_RE.match(text):
+                text += '  '
+            if not text:
+                # Пустую строку выводим только перед следующей непустой
+                self._blank = self._started
+                continue
+            if self._blank:
+                result.append(('', False))
+                self._blank = False
+            result.append((text, False))
+            self._started = True
+        return result
+
+
+class HeadingTransform(LineTransform):
+    """Исправляет пропуски уровней заголовков (# -> ### становится # -> ##)"""
+
+    name = 'headings'
+
+    def __init__(self):
+        self._level = 0
+
+    def process(self, lines: List[Line]) -> List[Line]:
+        result = []
+        for text, fenced in lines:
+            if not fenced and text.startswith('#'):
+                match = _HEADING_RE.match(text)
+                if match:
+                    level = min(len(match.group(1)), self._level + 1)
+                    self._level = level
+                    text = f"{'#' * level} {match.group(2).strip()}"
+            result.append((text, fenced))
+        return result
+
+
+class TableTransform(LineTransform):
+    """
+    Перерисовывает pipe-таблицы в выбранном формате (pipe с выровненными
+    колонками, grid или simple). В памяти держится только текущая таблица.
+    """
+
+    name = 'tables'
+
+    def __init__(self, table_format: str = 'pipe'):
+        """
+        Инициализация
+
+        Args:
+            table_format: Формат таблиц: pipe, grid или simple
+        """
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"Неизвестный формат таблиц: {table_format}")
+        self.table_format = table_format
+        self._rows: List[str] = []
+
+    def process(self, lines: List[Line]) -> List[Line]:
+        result = []
+        for text, fenced in lines:
+            if not fenced and text.lstrip().startswith('|'):
+                self._rows.append(text)
+                continue
+            if self._rows:
+                result.extend(self._render())
+            result.append((text, fenced))
+        return result
+
+    def flush(self) -> List[Line]:
+        return self._render() if self._rows else []
+
+    def _render(self) -> List[Line]:
+        """Перерисовывает накопленную таблицу"""
+        rows, self._rows = self._rows, []
+        cells = [_split_cells(row) for row in rows]
+        if len(cells) < 2 or not all(_SEPARATOR_CELL_RE.match(c) for c in cells[1]):
+            # Не таблица (нет строки-разделителя) - оставляем как есть
+            return [(row, False) for row in rows]
+
+        alignments = cells[1]
+        body = [cells[0]] + cells[2:]
+        width = max(len(row) for row in body)
+        body = [row + [''] * (width - len(row)) for row in body]
+        alignments = alignments + ['---'] * (width - len(alignments))
+        widths = [max(3, *(len(row[i]) for row in body)) for i in range(width)]
+
+        def format_row(row):
+            return '| ' + ' | '.join(cell.ljust(w) for cell, w in zip(row, widths)) + ' |'
+
+        if self.table_format == 'grid':
+            border = '+' + '+'.join('-' * (w + 2) for w in widths) + '+'
+            header_border = '+' + '+'.join('=' * (w + 2) for w in widths) + '+'
+            lines = [border, format_row(body[0]), header_border]
+            for row in body[1:]:
+                lines.extend((format_row(row), border))
+            if len(body) == 1:
+                lines.append(border)
+        elif self.table_format == 'simple':
+            lines = [
+                '  '.join(cell.ljust(w) for cell, w in zip(body[0], widths)).rstrip(),
+                '  '.join('-' * w for w in widths)
+            ]
+            lines.extend('  '.join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip() for row in body[1:])
+        else:
+            separator = '| ' + ' | '.join(
+                _alignment_marker(a, w) for a, w in zip(alignments, widths)
+            ) + ' |'
+            lines = [format_row(body[0]), separator] + [format_row(row) for row in body[1:]]
+        return [(line, False) for line in lines]
+
+
+def _split_cells(row: str) -> List[str]:
+    """Разбивает строку pipe-таблицы на ячейки с учетом экранированных |"""
+    row = row.strip()
+    if row.startswith('|'):
+        row = row[1:]
+    if row.endswith('|') and not row.endswith('\\|'):
+        row = row[:-1]
+    return [cell.strip() for cell in _CELL_SPLIT_RE.split(row)]
+
+
+def _alignment_marker(marker: str, width: int) -> str:
+    """Строит ячейку разделителя с сохранением выравнивания"""
+    left, right = marker.startswith(':'), marker.endswith(':')
+    dashes = '-' * (width - left - right)
+    return f"{':' if left else ''}{dashes}{':' if right else ''}"
+
+
+class LinkTransform(LineTransform):
+    """Переписывает адреса ссылок и изображений"""
+
+    name = 'links'
+
+    def __init__(self, base_url: Optional[str] = None,
+                 mapping: Optional[Dict[str, str]] = None,
+                 rewrite: Optional[Callable[[str], str]] = None):
+        """
+        Инициализация
+
+        Args:
+            base_url: База для относительных адресов
+            mapping: Замена адресов по точному совпадению
+            rewrite: Произвольная функция переписывания адреса
+        """
+        self.base_url = base_url
+        self.mapping = mapping or {}
+        self.rewrite = rewrite
+
+    def _rewrite_url(self, url: str) -> str:
+        if url in self.mapping:
+            return self.mapping[url]
+        if self.rewrite is not None:
+            return self.rewrite(url)
+        if self.base_url and not url.startswith('#') and not _SCHEME_RE.match(url):
+            return urljoin(self.base_url, url)
+        return url
+
+    def _replace(self, match) -> str:
+        return f"{match.group(1)}({self._rewrite_url(match.group(2))}{match.group(3)})"
+
+    def process(self, lines: List[Line]) -> List[Line]:
+        return [
+            (_LINK_RE.sub(self._replace, text), fenced) if not fenced and '](' in text else (text, fenced)
+            for text, fenced in lines
+        ]
+
+
+class PostProcessor:
+    """
+    Применяет цепочку преобразований к markdown за один проход
+
+    Текст подается фрагментами через feed(); фрагменты режутся на строки,
+    и каждая пачка строк проходит все преобразования по очереди, не собирая
+    промежуточных копий всего документа. Время каждого преобразования
+    накапливается в timings.
+    """
+
+    def __init__(self, transforms: List[LineTransform]):
+        """
+        Инициализация
+
+        Args:
+            transforms: Преобразования в порядке применения
+        """
+        self.transforms = transforms
+        self.timings: Dict[str, float] = {t.name: 0.0 for t in transforms}
+        self._partial = ''
+        self._in_fence = False
+
+    def feed(self, text: str) -> Iterator[str]:
+        """
+        Обрабатывает очередной фрагмент markdown
+
+        Args:
+            text: Фрагмент текста
+
+        Returns:
+            Итератор готовых строк с переводом строки
+        """
+        check_cancelled()
+        text = self._partial + text
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        yield from self._emit(self._mark_fences(lines), 0)
+
+    def close(self) -> Iterator[str]:
+        """
+        Завершает документ
+
+        Returns:
+            Итератор последних строк
+        """
+        if self._partial:
+            lines, self._partial = [self._partial], ''
+            yield from self._emit(self._mark_fences(lines), 0)
+        for index, transform in enumerate(self.transforms):
+            started = time.perf_counter()
+            flushed = transform.flush()
+            self.timings[transform.name] += time.perf_counter() - started
+            if flushed:
+                yield from self._emit(flushed, index + 1)
+
+    def process(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Обрабатывает документ, поданный фрагментами
+
+        Args:
+            pieces: Фрагменты markdown
+
+        Returns:
+            Итератор строк результата
+        """
+        for piece in pieces:
+            yield from self.feed(piece)
+        yield from self.close()
+
+    def process_text(self, text: str) -> str:
+        """
+        Обрабатывает markdown целиком
+
+        Args:
+            text: Markdown контент
+
+        Returns:
+            Обработанный markdown
+        """
+        return ''.join(self.process([text]))
+
+    def _mark_fences(self, lines: List[str]) -> List[Line]:
+        """Отмечает строки внутри блоков кода"""
+        marked = []
+        for line in lines:
+            if line.endswith('\r'):
+                line = line[:-1]
+            if FENCE_RE.match(line):
+                self._in_fence = not self._in_fence
+                marked.append((line, True))
+            else:
+                marked.append((line, self._in_fence))
+        return marked
+
+    def _emit(self, lines: List[Line], start: int) -> Iterator[str]:
+        """Пропускает пачку строк через преобразования начиная с start"""
+        for transform in self.transforms[start:]:
+            if not lines:
+                return
+            started = time.perf_counter()
+            lines = transform.process(lines)
+            self.timings[transform.name] += time.perf_counter() - started
+        for text, _ in lines:
+            yield text + '\n'
+
+
+def build_postprocessor(options: Optional[Dict[str, Any]] = None) -> Optional[PostProcessor]:
+    """
+    Собирает постобработку по опциям
+
+    Args:
+        options: normalize_whitespace (по умолчанию True), fix_headings
+            (по умолчанию True), table_format (pipe/grid/simple, None - не трогать
+            таблицы), link_base и link_map для переписывания ссылок
+
+    Returns:
+        PostProcessor или None если преобразований нет
+    """
+    options = options or {}
+    transforms: List[LineTransform] = []
+    if options.get('normalize_whitespace', True):
+        transforms.append(WhitespaceTransform())
+    if options.get('fix_headings', True):
+        transforms.append(HeadingTransform())
+    if options.get('table_format'):
+        transforms.append(TableTransform(options['table_format']))
+    if options.get('link_base') or options.get('link_map'):
+        transforms.append(LinkTransform(options.get('link_base'), options.get('link_map')))
+    return PostProcessor(transforms) if transforms else None
@@ -0,0 +1,181 @@
+"""
+Полнотекстовый индекс сконвертированных документов на SQLite FTS5
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+
+DEFAULT_INDEX_NAME = "search.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title,
+    content,
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+_TERM_RE = re.compile(r'[^\s"]+')
+
+
+def build_match_query(query: str) -> str:
+    """
+    Преобразует пользовательский запрос в безопасное выражение FTS5
+
+    Каждое слово берется в кавычки, поэтому служебные символы FTS5 не
+    ломают запрос. Звездочка в конце слова сохраняет поиск по префиксу.
+
+    Args:
+        query: Строка запроса
+
+    Returns:
+        Выражение для MATCH или пустая строка
+    """
+    terms = []
+    for term in _TERM_RE.findall(query):
+        prefix = term.endswith('*')
+        term = term.rstrip('*')
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """
+    Полнотекстовый индекс markdown документов.
+
+    Документ идентифицируется ключом, повторная индексация с тем же ключом
+    заменяет запись. DocumentConverter по умолчанию использует путь
+    исходного файла (DocumentStream.key для потоков); API-сервис передает
+    SHA-256 содержимого загрузки, а имя файла хранится как заголовок.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Инициализация индекса
+
+        Args:
+            db_path: Путь к файлу базы SQLite
+        """
+        self.db_path = db_path
+        if db_path != ':memory:':
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add_document(self, key: str, title: str, content: str) -> None:
+        """
+        Добавляет или заменяет документ в индексе
+
+        Args:
+            key: Уникальный ключ документа
+            title: Заголовок (обычно имя файла)
+            content: Markdown контент
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                doc_id = row[0]
+                self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                self._conn.execute(
+                    "UPDATE documents SET title = ?, indexed_at = ? WHERE id = ?",
+                    (title, time.time(), doc_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (key, title, indexed_at) VALUES (?, ?, ?)",
+                    (key, title, time.time())
+                )
+                doc_id = cursor.lastrowid
+            self._conn.execute(
+                "INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)",
+                (doc_id, title, content)
+            )
+
+    def remove_document(self, key: str) -> bool:
+        """
+        Удаляет документ из индекса
+
+        Args:
+            key: Ключ документа
+
+        Returns:
+            True если документ был в индексе
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return False
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            return True
+
+    def search(self, query: str, limit: int = 10, highlight: tuple = ('**', '**'),
+               snippet_tokens: int = 16) -> List[Dict[str, Any]]:
+        """
+        Ищет документы и возвращает фрагменты, отсортированные по релевантности
+
+        Args:
+            query: Строка запроса
+            limit: Максимальное количество результатов
+            highlight: Маркеры начала и конца найденных слов
+            snippet_tokens: Длина фрагмента в токенах
+
+        Returns:
+            Список результатов с ключом, заголовком, фрагментом и оценкой
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT d.key, d.title, snippet(documents_fts, 1, ?, ?, '…', ?), "
+            "bm25(documents_fts) AS score "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ? ORDER BY score LIMIT ?"
+        )
+        params = (highlight[0], highlight[1], snippet_tokens, match, limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {"key": key, "title": title, "snippet": " ".join(snippet.split()), "score": -score}
+            for key, title, snippet, score in rows
+        ]
+
+    def count(self) -> int:
+        """
+        Возвращает количество документов в индексе
+
+        Returns:
+            Количество документов
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        """Закрывает соединение с базой"""
+        with self._lock:
+            self._conn.close()
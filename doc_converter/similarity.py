@@ -0,0 +1,464 @@
+"""
+Поиск почти одинаковых документов с помощью MinHash и LSH
+"""
+
+import os
+import re
+import json
+import random
+import hashlib
+import zipfile
+import threading
+import uuid
+from array import array
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Tuple, Iterable
+from xml.etree import ElementTree
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy только ускоряет расчет
+    np = None
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+_UINT64_MASK = (1 << 64) - 1
+_NP_BLOCK = 4096
+_FALSE_POSITIVE_WEIGHT = 0.2
+_FALSE_NEGATIVE_WEIGHT = 0.8
+
+_WORD_RE = re.compile(r'\w+')
+_RTF_CONTROL_RE = re.compile(r'\\[a-zA-Z]+-?\d* ?|[{}]')
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def extract_text(input_file: Path) -> Optional[str]:
+    """
+    Быстро извлекает текст документа без полной конвертации
+
+    Args:
+        input_file: Путь к файлу
+
+    Returns:
+        Текст документа или None если формат не поддерживается
+    """
+    suffix = input_file.suffix.lower()
+    try:
+        if suffix == '.txt':
+            return input_file.read_text(encoding='utf-8', errors='replace')
+        if suffix == '.rtf':
+            raw = input_file.read_text(encoding='latin-1')
+            return _RTF_CONTROL_RE.sub(' ', raw)
+        if suffix == '.docx':
+            return _extract_docx_text(input_file)
+        if suffix == '.pdf':
+            return _extract_pdf_text(input_file)
+    except (OSError, zipfile.BadZipFile, ElementTree.ParseError):
+        return None
+    return None
+
+
+def _extract_docx_text(input_file: Path) -> str:
+    """Извлекает текст из word/document.xml потоковым разбором"""
+    parts = []
+    with zipfile.ZipFile(input_file) as archive:
+        with archive.open('word/document.xml') as document:
+            for _, element in ElementTree.iterparse(document):
+                if element.tag == _W_NS + 't' and element.text:
+                    parts.append(element.text)
+                elif element.tag == _W_NS + 'p':
+                    parts.append('\n')
+                    element.clear()
+    return ''.join(parts)
+
+
+def _extract_pdf_text(input_file: Path) -> Optional[str]:
+    """Извлекает текстовый слой PDF, если установлен PyPDF2"""
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        return None
+    reader = PdfReader(str(input_file))
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def shingle_hashes(text: str, size: int = 5) -> List[int]:
+    """
+    Возвращает 32-битные хеши словесных шинглов текста
+
+    Args:
+        text: Текст
+        size: Количество слов в шингле
+
+    Returns:
+        Список уникальных хешей шинглов
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return []
+    if len(words) < size:
+        size = len(words)
+    seen = set()
+    for i in range(len(words) - size + 1):
+        shingle = ' '.join(words[i:i + size]).encode('utf-8')
+        seen.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=4).digest(), 'little'))
+    return list(seen)
+
+
+class MinHasher:
+    """
+    Вычисляет MinHash сигнатуры фиксированной длины.
+
+    Перестановки задаются сидом, поэтому сигнатуры воспроизводимы и
+    совместимы между запусками и сохраненными индексами. С numpy и без
+    него результат одинаковый.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        """
+        Инициализация
+
+        Args:
+            num_perm: Количество хеш-функций (длина сигнатуры)
+            seed: Сид генератора перестановок
+        """
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = random.Random(seed)
+        self._a = [rng.randint(1, MERSENNE_PRIME - 1) for _ in range(num_perm)]
+        self._b = [rng.randint(0, MERSENNE_PRIME - 1) for _ in range(num_perm)]
+        if np is not None:
+            self._np_a = np.array(self._a, dtype=np.uint64)[:, None]
+            self._np_b = np.array(self._b, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes: List[int]) -> Optional[array]:
+        """
+        Вычисляет сигнатуру по хешам шинглов
+
+        Args:
+            hashes: Хеши шинглов
+
+        Returns:
+            Сигнатура или None для пустого документа
+        """
+        if not hashes:
+            return None
+        if np is not None:
+            result = np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+            values = np.array(hashes, dtype=np.uint64)
+            # Блоками, чтобы матрица num_perm x шинглы не росла с документом
+            for start in range(0, len(values), _NP_BLOCK):
+                block = values[None, start:start + _NP_BLOCK]
+                # Переполнение uint64 здесь ожидаемо и совпадает с маской в ветке без numpy
+                permuted = ((self._np_a * block + self._np_b) % np.uint64(MERSENNE_PRIME)) & np.uint64(MAX_HASH)
+                np.minimum(result, permuted.min(axis=1), out=result)
+            return array('Q', result.tolist())
+        return array('Q', (
+            min((((a * x + b) & _UINT64_MASK) % MERSENNE_PRIME) & MAX_HASH for x in hashes)
+            for a, b in zip(self._a, self._b)
+        ))
+
+    def text_signature(self, text: str, shingle_size: int = 5) -> Optional[array]:
+        """
+        Вычисляет сигнатуру текста
+
+        Args:
+            text: Текст
+            shingle_size: Количество слов в шингле
+
+        Returns:
+            Сигнатура или None для пустого текста
+        """
+        return self.signature(shingle_hashes(text, shingle_size))
+
+
+def estimate_similarity(first: array, second: array) -> float:
+    """
+    Оценивает коэффициент Жаккара по двум сигнатурам
+
+    Args:
+        first: Первая сигнатура
+        second: Вторая сигнатура
+
+    Returns:
+        Доля совпавших позиций от 0 до 1
+    """
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def _collision_probability(similarity: float, bands: int, rows: int) -> float:
+    """Вероятность того, что документы попадут хотя бы в один общий бакет"""
+    return 1.0 - (1.0 - similarity ** rows) ** bands
+
+
+def _integrate(func, start: float, end: float, steps: int = 100) -> float:
+    """Численное интегрирование методом трапеций"""
+    if end <= start:
+        return 0.0
+    step = (end - start) / steps
+    total = (func(start) + func(end)) / 2.0
+    for i in range(1, steps):
+        total += func(start + i * step)
+    return total * step
+
+
+def choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Подбирает число полос и строк LSH под порог сходства
+
+    Минимизирует взвешенную сумму площадей ложных срабатываний (ниже
+    порога) и пропусков (выше порога) под S-кривой вероятности попадания
+    в бакет. Пропуски весят больше: ложные кандидаты все равно отсеиваются
+    проверкой сходства по сигнатуре.
+
+    Args:
+        threshold: Порог сходства
+        num_perm: Длина сигнатуры
+
+    Returns:
+        Кортеж (полосы, строки в полосе)
+    """
+    best = (num_perm, 1)
+    best_error = float('inf')
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        false_positive = _integrate(
+            lambda s: _collision_probability(s, bands, rows), 0.0, threshold)
+        false_negative = _integrate(
+            lambda s: 1.0 - _collision_probability(s, bands, rows), threshold, 1.0)
+        error = _FALSE_POSITIVE_WEIGHT * false_positive + _FALSE_NEGATIVE_WEIGHT * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    LSH индекс MinHash сигнатур.
+
+    Поиск кандидатов идет по бакетам полос, поэтому не зависит линейно
+    от размера корпуса; кандидаты проверяются оценкой сходства по
+    сигнатуре. Пары, найденные при добавлении, объединяются в кластеры.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128,
+                 shingle_size: int = 5, seed: int = 1):
+        """
+        Инициализация индекса
+
+        Args:
+            threshold: Порог сходства для почти одинаковых документов
+            num_perm: Длина сигнатуры
+            shingle_size: Количество слов в шингле
+            seed: Сид перестановок MinHash
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold должен быть в диапазоне (0, 1]")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+
+        self._lock = threading.RLock()
+        self._signatures: Dict[str, array] = {}
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in range(self.bands)]
+        self._parent: Dict[str, str] = {}
+        # Состав кластера по его корню: удаление не обходит весь индекс
+        self._members: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def signature(self, text: str) -> Optional[array]:
+        """
+        Вычисляет сигнатуру текста с параметрами индекса
+
+        Args:
+            text: Текст
+
+        Returns:
+            Сигнатура или None для пустого текста
+        """
+        return self.hasher.text_signature(text, self.shingle_size)
+
+    def _band_keys(self, signature: array) -> Iterable[Tuple[int, int]]:
+        """Возвращает пары (номер полосы, хеш полосы)"""
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, hash(tuple(signature[start:start + self.rows]))
+
+    def query(self, signature: array, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Находит почти одинаковые документы
+
+        Args:
+            signature: Сигнатура искомого документа
+            exclude: Ключ, который не нужно возвращать
+
+        Returns:
+            Список пар (ключ, сходство) по убыванию сходства
+        """
+        with self._lock:
+            candidates = set()
+            for band, band_key in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            candidates.discard(exclude)
+
+            matches = []
+            for key in candidates:
+                similarity = estimate_similarity(signature, self._signatures[key])
+                if similarity >= self.threshold:
+                    matches.append((key, similarity))
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches
+
+    def add(self, key: str, signature: array) -> List[Tuple[str, float]]:
+        """
+        Добавляет документ в индекс
+
+        Args:
+            key: Уникальный ключ документа
+            signature: Сигнатура документа
+
+        Returns:
+            Найденные при добавлении почти одинаковые документы
+        """
+        with self._lock:
+            current = self._signatures.get(key)
+            if current is not None:
+                # Повторная конвертация того же документа: индекс не меняется
+                if current == signature:
+                    return self.query(signature, exclude=key)
+                self.remove(key)
+            matches = self.query(signature, exclude=key)
+
+            self._signatures[key] = signature
+            for band, band_key in self._band_keys(signature):
+                self._buckets[band].setdefault(band_key, []).append(key)
+
+            self._parent[key] = key
+            self._members[key] = {key}
+            for other, _ in matches:
+                self._union(key, other)
+            return matches
+
+    def remove(self, key: str) -> bool:
+        """
+        Удаляет документ из индекса
+
+        Args:
+            key: Ключ документа
+
+        Returns:
+            True если документ был в индексе
+        """
+        with self._lock:
+            signature = self._signatures.pop(key, None)
+            if signature is None:
+                return False
+            for band, band_key in self._band_keys(signature):
+                bucket = self._buckets[band].get(band_key)
+                if bucket and key in bucket:
+                    bucket.remove(key)
+                    if not bucket:
+                        del self._buckets[band][band_key]
+            # Кластеры пересобираем для оставшихся документов кластера
+            members = self._members.pop(self._find(key))
+            members.discard(key)
+            del self._parent[key]
+            for member in members:
+                self._parent[member] = member
+                self._members[member] = {member}
+            for member in members:
+                for other, _ in self.query(self._signatures[member], exclude=member):
+                    self._union(member, other)
+            return True
+
+    def clusters(self, min_size: int = 2) -> List[List[str]]:
+        """
+        Возвращает кластеры почти одинаковых документов
+
+        Args:
+            min_size: Минимальный размер кластера
+
+        Returns:
+            Список кластеров, каждый - отсортированный список ключей
+        """
+        with self._lock:
+            result = [sorted(group) for group in self._members.values() if len(group) >= min_size]
+        result.sort(key=lambda group: (-len(group), group[0]))
+        return result
+
+    def _find(self, key: str) -> str:
+        """Находит корень кластера с сжатием пути"""
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[key] != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def _union(self, first: str, second: str) -> None:
+        """Объединяет кластеры двух документов"""
+        first_root, second_root = self._find(first), self._find(second)
+        if first_root != second_root:
+            root, child = min(first_root, second_root), max(first_root, second_root)
+            self._parent[child] = root
+            members, child_members = self._members[root], self._members.pop(child)
+            # Меньшее множество вливается в большее
+            if len(members) < len(child_members):
+                members, child_members = child_members, members
+            members |= child_members
+            self._members[root] = members
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет индекс в JSON файл
+
+        Args:
+            path: Путь к файлу
+        """
+        with self._lock:
+            data = {
+                "threshold": self.threshold,
+                "num_perm": self.hasher.num_perm,
+                "shingle_size": self.shingle_size,
+                "seed": self.hasher.seed,
+                "signatures": {key: list(sig) for key, sig in self._signatures.items()},
+            }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Запись во временный файл: при сбое останется прежний индекс
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str, threshold: Optional[float] = None) -> 'NearDuplicateIndex':
+        """
+        Загружает индекс из JSON файла
+
+        Полосы LSH строятся заново при загрузке, поэтому порог можно сменить:
+        сигнатуры от порога не зависят.
+
+        Args:
+            path: Путь к файлу
+            threshold: Новый порог сходства (по умолчанию сохраненный)
+
+        Returns:
+            Восстановленный индекс
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(data["threshold"] if threshold is None else threshold, data["num_perm"], data["shingle_size"], data["seed"])
+        for key, values in data["signatures"].items():
+            index.add(key, array('Q', values))
+        return index
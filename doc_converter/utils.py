@@ -3,6 +3,7 @@
 """
 
 import json
+import stat
 import yaml
 from pathlib import Path
 from typing import Dict, Any, Optional
@@ -66,16 +67,19 @@ def get_file_info(file_path: str) -> Dict[str, Any]:
     """
     file = Path(file_path)
     
-    if not file.exists():
+    # Один stat() вместо отдельных вызовов exists/stat/is_file/is_dir
+    try:
+        stat_result = file.stat()
+    except FileNotFoundError:
         return {"error": "Файл не найден"}
     
     return {
         "name": file.name,
-        "size": file.stat().st_size,
+        "size": stat_result.st_size,
         "extension": file.suffix.lower(),
-        "modified": file.stat().st_mtime,
-        "is_file": file.is_file(),
-        "is_dir": file.is_dir()
+        "modified": stat_result.st_mtime,
+        "is_file": stat.S_ISREG(stat_result.st_mode),
+        "is_dir": stat.S_ISDIR(stat_result.st_mode)
     }
 
 
@@ -1,4 +1,5 @@
 import axios from 'axios'
+import { sha256HexSync } from './sha256'
 
 // Создаем экземпляр axios с базовым URL
 const api = axios.create({
@@ -9,6 +10,39 @@ const api = axios.create({
   }
 })
 
+// Файлы больше этого размера загружаются по частям
+export const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024
+
+const CHUNK_SIZE = 5 * 1024 * 1024
+const CHUNK_CONCURRENCY = 4
+const CHUNK_MAX_RETRIES = 8
+const CHUNK_TIMEOUT = 120000 // 2 минуты на одну часть
+const UPLOAD_STORAGE_PREFIX = 'chunked-upload:'
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms))
+
+// SHA-256 в виде hex строки. crypto.subtle есть только в безопасном
+// контексте (HTTPS или localhost), по HTTP считаем на чистом JS
+async function sha256Hex(buffer) {
+  if (!globalThis.crypto || !globalThis.crypto.subtle) {
+    return sha256HexSync(buffer)
+  }
+  const digest = await crypto.subtle.digest('SHA-256', buffer)
+  return Array.from(new Uint8Array(digest))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('')
+}
+
+// Сетевая ошибка или 5xx - часть можно отправить повторно
+function isRetryable(error) {
+  return !error.response || error.response.status >= 500
+}
+
+// Ключ для возобновления загрузки того же файла после обрыва или перезагрузки страницы
+function uploadStorageKey(file) {
+  return `${UPLOAD_STORAGE_PREFIX}${file.name}:${file.size}:${file.lastModified}`
+}
+
 // Интерцептор для обработки ошибок
 api.interceptors.response.use(
   response => response,
@@ -29,6 +63,14 @@ export default {
     return api.get('/health')
   },
   
+  // Полный адрес сохраненного результата (result_url из ответа конвертации)
+  resultUrl(resultUrl, download = false) {
+    const base = new URL(api.defaults.baseURL, window.location.origin)
+    const url = new URL(resultUrl, base)
+    if (download) url.searchParams.set('download', '1')
+    return url.href
+  },
+  
   // Конвертация документа
   async convertDocument(file, options = {}) {
     const formData = new FormData()
@@ -45,5 +87,96 @@ export default {
         'Content-Type': 'multipart/form-data'
       }
     })
+  },
+  
+  // Возобновляемая загрузка по частям с параллельной отправкой.
+  // Части, уже полученные сервером, повторно не отправляются; после
+  // обрыва сети часть отправляется повторно с экспоненциальной задержкой.
+  async uploadChunked(file, options = {}, { onProgress } = {}) {
+    const storageKey = uploadStorageKey(file)
+    let upload = null
+    
+    // Пытаемся продолжить ранее начатую загрузку этого файла
+    const savedId = localStorage.getItem(storageKey)
+    if (savedId) {
+      try {
+        upload = (await api.get(`/uploads/${savedId}`)).data
+      } catch (error) {
+        localStorage.removeItem(storageKey)
+      }
+    }
+    
+    if (!upload) {
+      upload = (await api.post('/uploads', {
+        filename: file.name,
+        size: file.size,
+        chunk_size: CHUNK_SIZE
+      })).data
+      localStorage.setItem(storageKey, upload.upload_id)
+    }
+    
+    const { upload_id: uploadId, chunk_size: chunkSize, total_chunks: totalChunks } = upload
+    const received = new Set(upload.received)
+    const digests = new Array(totalChunks)
+    let uploadedBytes = 0
+    
+    const chunkBlob = index => file.slice(index * chunkSize, Math.min((index + 1) * chunkSize, file.size))
+    const reportProgress = () => onProgress && onProgress(Math.round(uploadedBytes * 100 / file.size))
+    
+    const sendChunk = async index => {
+      const blob = chunkBlob(index)
+      const buffer = await blob.arrayBuffer()
+      digests[index] = await sha256Hex(buffer)
+      
+      if (!received.has(index)) {
+        for (let attempt = 0; ; attempt++) {
+          try {
+            await api.put(`/uploads/${uploadId}/chunks/${index}`, buffer, {
+              timeout: CHUNK_TIMEOUT,
+              headers: {
+                'Content-Type': 'application/octet-stream',
+                'X-Chunk-SHA256': digests[index]
+              }
+            })
+            break
+          } catch (error) {
+            if (!isRetryable(error) || attempt >= CHUNK_MAX_RETRIES) {
+              throw error
+            }
+            await sleep(Math.min(1000 * 2 ** attempt, 30000))
+          }
+        }
+      }
+      
+      uploadedBytes += blob.size
+      reportProgress()
+    }
+    
+    // Несколько воркеров разбирают общую очередь частей
+    let next = 0
+    const worker = async () => {
+      while (next < totalChunks) {
+        await sendChunk(next++)
+      }
+    }
+    await Promise.all(Array.from({ length: Math.min(CHUNK_CONCURRENCY, totalChunks) }, worker))
+    
+    // Контрольная сумма: SHA-256 от склеенных hex SHA-256 частей по порядку
+    const checksum = await sha256Hex(new TextEncoder().encode(digests.join('')))
+    
+    const response = await api.post(`/uploads/${uploadId}/finalize`, {
+      checksum,
+      options: {
+        preserve_formatting: options.preserve_formatting ?? true,
+        include_images: options.include_images ?? true,
+        max_image_size: options.max_image_size ?? 1024,
+        table_format: options.table_format ?? 'grid'
+      }
+    }, {
+      timeout: 0 // конвертация большого файла может идти долго
+    })
+    
+    localStorage.removeItem(storageKey)
+    return response
   }
 }
@@ -1,11 +1,12 @@
 import { createStore } from 'vuex'
-import api from '../services/api'
+import api, { CHUNKED_UPLOAD_THRESHOLD } from '../services/api'
 
 export default createStore({
   state: {
     supportedFormats: [],
     conversionResult: null,
     isLoading: false,
+    uploadProgress: 0,
     error: null
   },
   
@@ -19,6 +20,9 @@ export default createStore({
     SET_LOADING(state, loading) {
       state.isLoading = loading
     },
+    SET_UPLOAD_PROGRESS(state, progress) {
+      state.uploadProgress = progress
+    },
     SET_ERROR(state, error) {
       state.error = error
     },
@@ -48,7 +52,14 @@ export default createStore({
         commit('CLEAR_ERROR')
         commit('SET_CONVERSION_RESULT', null)
         
-        const response = await api.convertDocument(file, options)
+        commit('SET_UPLOAD_PROGRESS', 0)
+        
+        // Большие файлы отправляем по частям, чтобы не начинать заново после обрыва
+        const response = file.size > CHUNKED_UPLOAD_THRESHOLD
+          ? await api.uploadChunked(file, options, {
+            onProgress: progress => commit('SET_UPLOAD_PROGRESS', progress)
+          })
+          : await api.convertDocument(file, options)
         commit('SET_CONVERSION_RESULT', response.data)
       } catch (error) {
         commit('SET_ERROR', error.response?.data?.detail || error.message || 'Ошибка при конвертации')
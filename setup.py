@@ -46,6 +46,9 @@ setup(
             "flake8>=3.8",
             "mypy>=0.800",
         ],
+        "zstd": [
+            "zstandard>=0.15",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -1,130 +1,16 @@
 """
 Общий модуль для конвертации документов в markdown
+
+Реализация находится в пакете doc_converter; модуль оставлен, чтобы
+backend мог импортировать `from converter import DocumentConverter`.
 """
 
 import os
-import logging
-from pathlib import Path
-from typing import Optional, Dict, Any
-import docling
+import sys
+
+# Добавляем путь к пакету doc_converter
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from doc_converter.converter import DocumentConverter, DocumentStream, InputSource  # noqa: E402
 
-class DocumentConverter:
-    """
-    Класс для конвертации документов различных форматов в markdown
-    """
-    
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
-        """
-        Инициализация конвертера
-        
-        Args:
-            config: Конфигурация для docling
-        """
-        self.config = config or {}
-        self.logger = logging.getLogger(__name__)
-        
-    def convert(self, input_path: str, output_path: str) -> bool:
-        """
-        Конвертирует документ в markdown
-        
-        Args:
-            input_path: Путь к входному файлу
-            output_path: Путь к выходному markdown файлу
-            
-        Returns:
-            True если конвертация прошла успешно, False иначе
-        """
-        try:
-            input_file = Path(input_path)
-            output_file = Path(output_path)
-            
-            if not input_file.exists():
-                self.logger.error(f"Входной файл не найден: {input_path}")
-                return False
-                
-            # Создаем директорию для выходного файла если её нет
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Используем docling для конвертации
-            self.logger.info(f"Конвертируем {input_path} в {output_path}")
-            
-            # Здесь будет основная логика конвертации с docling
-            # Пока что создаем заглушку
-            markdown_content = self._convert_with_docling(input_file)
-            
-            if markdown_content:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
-                self.logger.info(f"Конвертация завершена: {output_path}")
-                return True
-            else:
-                self.logger.error("Не удалось получить markdown контент")
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка при конвертации: {e}")
-            return False
-    
-    def convert_to_string(self, input_path: str) -> Optional[str]:
-        """
-        Конвертирует документ в markdown строку
-        
-        Args:
-            input_path: Путь к входному файлу
-            
-        Returns:
-            Markdown контент или None при ошибке
-        """
-        try:
-            input_file = Path(input_path)
-            
-            if not input_file.exists():
-                self.logger.error(f"Входной файл не найден: {input_path}")
-                return None
-                
-            return self._convert_with_docling(input_file)
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка при конвертации: {e}")
-            return None
-    
-    def _convert_with_docling(self, input_file: Path) -> Optional[str]:
-        """
-        Конвертирует файл с помощью docling
-        
-        Args:
-            input_file: Путь к входному файлу
-            
-        Returns:
-            Markdown контент или None при ошибке
-        """
-        try:
-            # Здесь будет интеграция с docling
-            # Пока что возвращаем заглушку
-            return f"# Конвертированный документ\n\nФайл: {input_file.name}\n\n"
-        except Exception as e:
-            self.logger.error(f"Ошибка при работе с docling: {e}")
-            return None
-    
-    def get_supported_formats(self) -> list:
-        """
-        Возвращает список поддерживаемых форматов
-        
-        Returns:
-            Список расширений файлов
-        """
-        return ['.docx', '.pdf', '.txt', '.rtf']
-    
-    def is_supported_format(self, file_path: str) -> bool:
-        """
-        Проверяет поддерживается ли формат файла
-        
-        Args:
-            file_path: Путь к файлу
-            
-        Returns:
-            True если формат поддерживается
-        """
-        file_ext = Path(file_path).suffix.lower()
-        return file_ext in self.get_supported_formats()
+__all__ = ["DocumentConverter", "DocumentStream", "InputSource"]
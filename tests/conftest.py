@@ -0,0 +1,12 @@
+"""
+Общие настройки тестов
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def block_cache_home(tmp_path, monkeypatch):
+    """Карты блоков DOCX пишутся во временный каталог, а не в ~/.cache"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
@@ -0,0 +1,175 @@
+"""
+Тесты для потоковой конвертации архивов
+"""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from doc_converter.archive import (
+    convert_archive,
+    iter_archive_members,
+    output_member_name,
+    safe_member_name,
+)
+from doc_converter.converter import DocumentConverter
+
+
+def make_zip(files: dict) -> io.BytesIO:
+    """Создает ZIP архив в памяти"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def make_tar(files: dict) -> io.BytesIO:
+    """Создает TAR.GZ архив в памяти"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+class NonSeekable(io.RawIOBase):
+    """Поток без возможности перемотки, как сокет или pipe"""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._buffer.read(len(b))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+class TestArchiveMembers:
+    """Тесты чтения членов архива"""
+
+    def test_safe_member_name(self):
+        """Тест нормализации опасных имен"""
+        assert safe_member_name('../../etc/passwd') == 'etc/passwd'
+        assert safe_member_name('/abs/file.txt') == 'abs/file.txt'
+        assert safe_member_name('dir\\file.txt') == 'dir/file.txt'
+        assert safe_member_name('..') is None
+
+    def test_tar_from_non_seekable_stream(self):
+        """Тест потокового чтения TAR из несикабельного потока"""
+        data = make_tar({'a.txt': b'one', 'b/c.txt': b'two'}).getvalue()
+        members = list(iter_archive_members(io.BufferedReader(NonSeekable(data)), 'in.tar.gz'))
+        assert members == [('a.txt', b'one'), ('b/c.txt', b'two')]
+
+    def test_filters_are_not_read(self):
+        """Тест что отфильтрованные и большие члены не читаются"""
+        source = make_zip({'a.txt': b'x' * 100, 'b.png': b'img', 'c.txt': b'ok'})
+        members = list(iter_archive_members(
+            source, 'in.zip', max_member_size=10, accept=lambda name: name.endswith('.txt')
+        ))
+        assert members == [('a.txt', None), ('b.png', None), ('c.txt', b'ok')]
+
+    def test_unsupported_archive(self):
+        """Тест неподдерживаемого формата архива"""
+        with pytest.raises(ValueError):
+            list(iter_archive_members(io.BytesIO(b''), 'in.rar'))
+
+
+class TestConvertArchive:
+    """Тесты конвертации архива в архив"""
+
+    def test_zip_to_zip(self):
+        """Тест конвертации ZIP в ZIP"""
+        files = {f'docs/d{i}.txt': f'doc {i}'.encode() for i in range(10)}
+        files['image.png'] = b'png'
+        output = io.BytesIO()
+
+        stats = convert_archive(DocumentConverter(), make_zip(files), 'in.zip',
+                                output, 'out.zip', workers=3, max_in_flight=2)
+
+        assert stats['converted'] == 10
+        assert stats['skipped'] == 1
+        assert stats['failed'] == 0
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as archive:
+            names = set(archive.namelist())
+            assert names == {f'docs/d{i}.md' for i in range(10)}
+            assert 'd3.txt' in archive.read('docs/d3.md').decode('utf-8')
+
+    def test_tar_to_tar(self):
+        """Тест конвертации TAR в TAR.GZ"""
+        output = io.BytesIO()
+        stats = convert_archive(DocumentConverter(), make_tar({'a.pdf': b'%PDF'}), 'in.tgz',
+                                output, 'out.tar.gz')
+
+        assert stats['converted'] == 1
+        output.seek(0)
+        with tarfile.open(fileobj=output, mode='r:gz') as archive:
+            assert archive.getnames() == ['a.md']
+
+    def test_same_base_names(self):
+        """Тест что документы с одним именем и разными расширениями не затирают друг друга"""
+        files = {'a.txt': b'text', 'a.rtf': b'rtf', 'b.txt': b'b'}
+        output = io.BytesIO()
+        stats = convert_archive(DocumentConverter(), make_zip(files), 'in.zip',
+                                output, 'out.zip', workers=4)
+
+        assert stats['converted'] == 3
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as archive:
+            names = archive.namelist()
+            assert sorted(names) == ['a.md', 'a.rtf.md', 'b.md']
+            assert 'a.txt' in archive.read('a.md').decode('utf-8')
+
+    def test_output_member_name(self):
+        """Тест выбора свободного имени"""
+        used = set()
+        assert output_member_name('docs/a.txt', used) == 'docs/a.md'
+        assert output_member_name('docs/a.rtf', used) == 'docs/a.rtf.md'
+        used.add('docs/a.pdf.md')
+        assert output_member_name('docs/a.pdf', used) == 'docs/a.pdf-2.md'
+        assert output_member_name('docs/a.txt') == 'docs/a.md'
+
+    def test_errors_name_member(self):
+        """Тест что в ошибках указан документ архива"""
+        class FailingConverter:
+            def is_supported_format(self, name):
+                return True
+
+            def convert_to_string(self, data, filename=None):
+                if filename == 'bad.txt':
+                    raise ValueError('поврежденный документ')
+                return f'# {filename}'
+
+        output = io.BytesIO()
+        stats = convert_archive(FailingConverter(), make_zip({'ok.txt': b'1', 'dir/bad.txt': b'2'}),
+                                'in.zip', output, 'out.zip')
+        assert stats['converted'] == 1 and stats['failed'] == 1
+        assert stats['errors'] == ['dir/bad.txt: поврежденный документ']
+
+
+class TestStreamInputs:
+    """Тесты конвертации из байтов и потоков"""
+
+    def test_convert_bytes(self):
+        """Тест конвертации байтов"""
+        converter = DocumentConverter()
+        content = converter.convert_to_string(b'Test content', filename='test.txt')
+        assert 'test.txt' in content
+
+    def test_convert_stream(self):
+        """Тест конвертации бинарного потока"""
+        converter = DocumentConverter()
+        content = converter.convert_to_string(io.BytesIO(b'Test'), filename='test.txt')
+        assert content is not None
+
+    def test_bytes_without_filename(self):
+        """Тест что для байтов нужно имя документа"""
+        assert DocumentConverter().convert_to_string(b'Test') is None
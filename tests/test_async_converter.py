@@ -0,0 +1,157 @@
+"""
+Тесты для асинхронного конвертера
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from doc_converter.async_converter import AsyncDocumentConverter
+from doc_converter.backends import ConverterBackend
+from doc_converter.cancellation import ConversionCancelled, cancel_scope, check_cancelled
+from doc_converter.converter import DocumentConverter
+
+
+class SlowBackend(ConverterBackend):
+    """Бэкенд, конвертирующий документ по шагам с проверкой отмены"""
+
+    name = 'slow'
+    formats = {'.txt': 1.0}
+
+    def __init__(self, steps=100, delay=0.01):
+        super().__init__()
+        self.steps = steps
+        self.delay = delay
+        self.done_steps = 0
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def convert(self, input_file, block_cache_path=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            for _ in range(self.steps):
+                check_cancelled()
+                time.sleep(self.delay)
+                self.done_steps += 1
+            return f"# {input_file.name}\n"
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def make_converter(backend, max_workers=2):
+    return AsyncDocumentConverter(DocumentConverter(backends=[backend]), max_workers=max_workers)
+
+
+class TestAsyncDocumentConverter:
+    """Тесты для класса AsyncDocumentConverter"""
+
+    def test_convert_to_string(self):
+        """Тест что результат совпадает с синхронной конвертацией"""
+        source = b'# A\n\n\n\n### B\ntext   \n'
+
+        async def main():
+            async with AsyncDocumentConverter(config={'backend': 'text'}) as converter:
+                result = await converter.convert_to_string(source, 'a.txt')
+                pieces = [piece async for piece in converter.iter_markdown(source, 'a.txt')]
+                return result, pieces
+
+        result, pieces = asyncio.run(main())
+        expected = DocumentConverter({'backend': 'text'}).convert_to_string(source, filename='a.txt')
+        assert result == expected == '# A\n\n## B\ntext\n'
+        assert ''.join(pieces) == expected
+
+    def test_cancel_stops_worker(self):
+        """Тест что отмена задачи останавливает рабочий поток"""
+        backend = SlowBackend(steps=200)
+        converter = make_converter(backend)
+
+        async def main():
+            task = asyncio.ensure_future(converter.convert_to_string(b'x', 'a.txt'))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return converter.active
+
+        assert asyncio.run(main()) == 0
+        steps = backend.done_steps
+        time.sleep(0.1)
+        assert steps == backend.done_steps < 200
+        converter.close()
+
+    def test_close_stream_stops_worker(self):
+        """Тест что закрытие потокового итератора останавливает конвертацию"""
+        backend = SlowBackend(steps=200)
+        converter = make_converter(backend)
+
+        async def main():
+            stream = converter.iter_markdown(b'x', 'a.txt')
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(stream.__anext__(), 0.1)
+            await stream.aclose()
+
+        asyncio.run(main())
+        assert backend.done_steps < 200 and backend.running == 0
+        converter.close()
+
+    def test_convert_many_bounded(self):
+        """Тест пакетной конвертации с ограничением одновременных конвертаций"""
+        backend = SlowBackend(steps=3)
+        converter = make_converter(backend, max_workers=2)
+        items = [(f'{i}'.encode(), f'{i}.txt') for i in range(6)]
+
+        async def main():
+            results = await converter.convert_many(items)
+            completed = [index async for index, _ in converter.as_completed(items[:3])]
+            return results, completed
+
+        results, completed = asyncio.run(main())
+        assert results == [f'# {i}.txt\n' for i in range(6)]
+        assert sorted(completed) == [0, 1, 2]
+        assert backend.max_running == 2
+        converter.close()
+
+    def test_cancel_all(self):
+        """Тест отмены всех конвертаций при закрытии"""
+        backend = SlowBackend(steps=200)
+        converter = make_converter(backend)
+
+        async def main():
+            task = asyncio.ensure_future(converter.convert_many([(b'x', 'a.txt'), (b'y', 'b.txt')]))
+            await asyncio.sleep(0.1)
+            converter.cancel_all()
+            with pytest.raises(ConversionCancelled):
+                await task
+
+        asyncio.run(main())
+        assert backend.done_steps < 400 and backend.running == 0
+        converter.close()
+
+
+class TestCancellation:
+    """Тесты кооперативной отмены"""
+
+    def test_scope(self):
+        """Тест что отмена действует только внутри cancel_scope"""
+        event = threading.Event()
+        event.set()
+        check_cancelled()
+        with cancel_scope(event):
+            with pytest.raises(ConversionCancelled):
+                check_cancelled()
+        check_cancelled()
+
+    def test_not_swallowed_by_converter(self):
+        """Тест что отмена проходит сквозь обработку ошибок конвертера"""
+        event = threading.Event()
+        event.set()
+        converter = DocumentConverter({'backend': 'text'})
+        with cancel_scope(event):
+            with pytest.raises(ConversionCancelled):
+                converter.convert_to_string(b'text', filename='a.txt')
@@ -0,0 +1,131 @@
+"""
+Тесты для бэкендов конвертации и их автоматического выбора
+"""
+
+import io
+import os
+import tempfile
+
+import pytest
+
+from doc_converter.backends import (
+    BackendProfile,
+    BackendSelector,
+    ConverterBackend,
+    default_backends,
+)
+from doc_converter.converter import DocumentConverter
+
+
+class FakeBackend(ConverterBackend):
+    """Бэкенд для тестов с заданным результатом"""
+
+    def __init__(self, name, quality=1.0, throughput=1e6, result="ok\n", capabilities=()):
+        super().__init__()
+        self.name = name
+        self.formats = {'.txt': quality}
+        self.throughput = throughput
+        self.capabilities = frozenset(capabilities)
+        self.result = result
+        self.calls = 0
+
+    def convert(self, input_file, block_cache_path=None):
+        self.calls += 1
+        if not isinstance(input_file, os.PathLike):
+            input_file.stream.read()
+        return self.result
+
+
+class TestBackendSelector:
+    """Тесты выбора бэкенда"""
+
+    def test_default_selection(self):
+        """Тест выбора встроенных бэкендов по умолчанию"""
+        selector = BackendSelector()
+        assert selector.select('.docx')[0].name == 'docx'
+        assert selector.select('.txt')[0].name == 'docling'
+        assert selector.select('.PDF')[0].name == 'docling'
+
+    def test_min_quality_allows_faster_backend(self):
+        """Тест что снижение порога качества выбирает более быстрый бэкенд"""
+        selector = BackendSelector(min_quality=0.5)
+        assert [b.name for b in selector.select('.txt')] == ['text', 'docling']
+
+    def test_measured_throughput_wins(self):
+        """Тест что замеры скорости меняют выбор"""
+        fast, slow = FakeBackend('fast', throughput=10), FakeBackend('slow', throughput=1)
+        selector = BackendSelector([slow, fast])
+        assert selector.select('.txt')[0] is fast
+
+        for _ in range(5):
+            selector.profile.record('fast', '.txt', 100, 1.0, True)
+            selector.profile.record('slow', '.txt', 100, 0.01, True)
+        assert selector.select('.txt')[0] is slow
+
+    def test_required_capabilities(self):
+        """Тест фильтрации по обязательным возможностям"""
+        selector = BackendSelector()
+        assert selector.select('.pdf', require=['incremental']) == []
+        assert [b.name for b in selector.select('.txt', require=['formatting'])] == ['docling']
+
+    def test_override(self):
+        """Тест явного выбора бэкенда"""
+        selector = BackendSelector()
+        assert [b.name for b in selector.select('.txt', backend='text')] == ['text']
+        with pytest.raises(ValueError):
+            selector.select('.txt', backend='missing')
+        with pytest.raises(ValueError):
+            selector.select('.txt', backend='pypdf')
+
+    def test_fallback_on_failure(self):
+        """Тест перехода к следующему бэкенду при ошибке и учета ошибок в качестве"""
+        broken = FakeBackend('broken', throughput=10, result=None)
+        working = FakeBackend('working', quality=0.95, throughput=1)
+        selector = BackendSelector([broken, working])
+        stream = type('Doc', (), {'name': 'a.txt', 'suffix': '.txt', 'stream': io.BytesIO(b'data')})()
+
+        assert selector.run(stream) == "ok\n"
+        assert (broken.calls, working.calls) == (1, 1)
+        assert selector.quality(broken, '.txt') < 0.9
+
+        # После ошибки сломанный бэкенд опускается ниже порога качества
+        assert selector.select('.txt')[0] is working
+
+
+class TestBackendProfile:
+    """Тесты профиля замеров"""
+
+    def test_ewma(self):
+        """Тест скользящего среднего скорости и доли успехов"""
+        profile = BackendProfile(alpha=0.5)
+        profile.record('b', '.txt', 100, 1.0, True)
+        profile.record('b', '.txt', 300, 1.0, True)
+        profile.record('b', '.txt', 100, 1.0, False)
+        assert profile.throughput('b', '.txt') == 200
+        assert profile.success_rate('b', '.txt') == 0.5
+        assert profile.snapshot()['b']['.txt']['count'] == 3
+
+
+class TestConverterBackends:
+    """Тесты бэкендов в DocumentConverter"""
+
+    def test_backend_override(self):
+        """Тест явного бэкенда для отдельного вызова"""
+        converter = DocumentConverter()
+        content = converter.convert_to_string(b'line\r\n\r\n\r\n\r\nnext', filename='a.txt', backend='text')
+        assert content == 'line\n\nnext\n'
+        assert converter.convert_to_string(b'x', filename='a.txt', backend='missing') is None
+
+    def test_backend_from_config(self):
+        """Тест бэкенда по умолчанию из конфигурации"""
+        converter = DocumentConverter({'backend': 'text'})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, 'out.md')
+            assert converter.convert(b'hello', output_path, filename='a.txt') is True
+            with open(output_path, encoding='utf-8') as f:
+                assert f.read() == 'hello\n'
+
+    def test_describe(self):
+        """Тест описания бэкендов"""
+        names = [b['name'] for b in DocumentConverter().get_backends()]
+        assert names == [b.name for b in default_backends()]
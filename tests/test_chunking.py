@@ -0,0 +1,111 @@
+"""
+Тесты для разбиения markdown на секции
+"""
+
+import json
+import os
+import tempfile
+
+import pytest
+
+from doc_converter.chunking import MarkdownChunker, chunk_markdown
+from doc_converter.converter import DocumentConverter
+
+
+SAMPLE = (
+    "# Глава 1\n"
+    "Вступление.\n"
+    "## Раздел 1.1\n"
+    "Текст раздела.\n"
+    "```\n"
+    "# не заголовок\n"
+    "```\n"
+    "## Раздел 1.2\n"
+    "Еще текст.\n"
+    "# Глава 2\n"
+    "Финал"
+)
+
+
+class TestMarkdownChunker:
+    """Тесты для класса MarkdownChunker"""
+
+    def test_heading_paths(self):
+        """Тест путей заголовков и игнорирования заголовков в коде"""
+        chunks = list(chunk_markdown([(SAMPLE, None)]))
+        paths = [c["heading_path"] for c in chunks]
+        assert paths == [
+            ["Глава 1"],
+            ["Глава 1", "Раздел 1.1"],
+            ["Глава 1", "Раздел 1.2"],
+            ["Глава 2"],
+        ]
+        assert "# не заголовок" in chunks[1]["text"]
+
+    def test_byte_offsets_cover_document(self):
+        """Тест что байтовые смещения указывают на текст секции"""
+        data = SAMPLE.encode("utf-8")
+        chunks = list(chunk_markdown([(SAMPLE, None)]))
+        assert chunks[0]["byte_start"] == 0
+        assert chunks[-1]["byte_end"] == len(data)
+        for chunk in chunks:
+            assert data[chunk["byte_start"]:chunk["byte_end"]].decode("utf-8") == chunk["text"]
+
+    def test_streaming_feed_matches_single_feed(self):
+        """Тест что результат не зависит от разбиения входа на фрагменты"""
+        whole = list(chunk_markdown([(SAMPLE, None)], max_chars=30))
+        pieces = [(SAMPLE[i:i + 7], None) for i in range(0, len(SAMPLE), 7)]
+        assert list(chunk_markdown(pieces, max_chars=30)) == whole
+
+    def test_char_budget(self):
+        """Тест ограничения размера секции в символах"""
+        text = "# Заголовок\n" + "строка текста\n" * 50 + "x" * 95 + "\n"
+        chunks = list(chunk_markdown([(text, None)], max_chars=40))
+        assert all(c["chars"] <= 40 for c in chunks)
+        assert "".join(c["text"] for c in chunks) == text
+
+    def test_token_budget(self):
+        """Тест ограничения размера секции в токенах"""
+        text = "слово " * 200
+        chunks = list(chunk_markdown([(text, None)], max_chars=10000, max_tokens=16))
+        assert all(c["tokens"] <= 16 for c in chunks)
+        assert "".join(c["text"] for c in chunks) == text
+
+    def test_page_range(self):
+        """Тест диапазона страниц секции"""
+        pieces = [("# A\nпервая\n", 1), ("вторая\n", 2), ("# B\nтретья\n", 3)]
+        chunks = list(chunk_markdown(pieces))
+        assert (chunks[0]["page_start"], chunks[0]["page_end"]) == (1, 2)
+        assert (chunks[1]["page_start"], chunks[1]["page_end"]) == (3, 3)
+
+    def test_invalid_budget(self):
+        """Тест некорректного бюджета"""
+        with pytest.raises(ValueError):
+            MarkdownChunker(max_chars=0)
+
+
+class TestConvertToChunks:
+    """Тесты для режима вывода секциями в DocumentConverter"""
+
+    def test_convert_to_chunks_writes_jsonl(self):
+        """Тест записи JSONL файла секций"""
+        converter = DocumentConverter()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_file = os.path.join(temp_dir, "test.txt")
+            with open(input_file, "w") as f:
+                f.write("Test content")
+
+            output_path = os.path.join(temp_dir, "out", "test.jsonl")
+            assert converter.convert_to_chunks(input_file, output_path) is True
+
+            with open(output_path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+
+        assert records
+        assert records[0]["heading_path"] == ["Конвертированный документ"]
+
+    def test_iter_chunks_nonexistent_file(self):
+        """Тест секций для несуществующего файла"""
+        converter = DocumentConverter()
+        with pytest.raises(FileNotFoundError):
+            converter.iter_chunks("nonexistent.docx")
@@ -0,0 +1,121 @@
+"""
+Тесты для сжатия выходных файлов
+"""
+
+import io
+import os
+import tempfile
+
+import pytest
+
+from doc_converter.compression import (
+    compressed_path, open_compressed, resolve_codec, train_dictionary, zstd_available
+)
+from doc_converter.converter import DocumentConverter
+
+
+TEXT = "".join(f"# Раздел {i}\n\nТекст раздела {i} с общим шаблоном.\n\n" for i in range(2000))
+
+
+def small_documents(count: int):
+    """Небольшие документы по одному шаблону"""
+    return [
+        (f"# Акт проверки № {i}\n\n| Оборудование | Статус |\n|---|---|\n| Насос {i} | выполнено |\n\n"
+         f"Проверка проведена в соответствии с регламентом обслуживания.\n").encode('utf-8')
+        for i in range(count)
+    ]
+
+
+class TestOpenCompressed:
+    """Тесты потокового сжатия и распаковки"""
+
+    @pytest.mark.parametrize("codec", ["gzip", "zlib", "zstd"])
+    def test_roundtrip(self, codec):
+        """Тест записи по частям и чтения с определением кодека по сигнатуре"""
+        if codec == 'zstd' and not zstd_available():
+            pytest.skip("zstandard не установлен")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = compressed_path(os.path.join(temp_dir, 'out.md'), codec)
+            with open_compressed(path, 'wt') as f:
+                for i in range(0, len(TEXT), 1000):
+                    f.write(TEXT[i:i + 1000])
+            assert os.path.getsize(path) < len(TEXT.encode('utf-8')) // 4
+            with open_compressed(path, 'rt') as f:
+                assert f.read() == TEXT
+
+    def test_plain_file_passthrough(self):
+        """Тест что несжатый файл читается как есть"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'out.md')
+            with open_compressed(path, 'wt') as f:
+                f.write(TEXT)
+            with open(path, encoding='utf-8') as f:
+                assert f.read() == TEXT
+            with open_compressed(path, 'rt') as f:
+                assert f.read() == TEXT
+
+    def test_codec_errors(self):
+        """Тест ошибок выбора кодека"""
+        with pytest.raises(ValueError):
+            resolve_codec('lz4')
+        with pytest.raises(ValueError):
+            resolve_codec('gzip', dictionary=True)
+        assert resolve_codec('auto', dictionary=True) in ('zstd', 'zlib')
+        assert resolve_codec('none') is None
+
+
+class TestDictionary:
+    """Тесты словарного режима"""
+
+    def test_dictionary_improves_ratio(self):
+        """Тест что словарь лучше сжимает небольшие похожие документы"""
+        documents = small_documents(100)
+        dictionary = train_dictionary(documents[::5], codec='zlib')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sizes = {}
+            for name, codec, zdict in (('plain', 'gzip', None), ('dict', 'zlib', dictionary)):
+                total = 0
+                for i, document in enumerate(documents):
+                    path = compressed_path(os.path.join(temp_dir, f'{name}{i}.md'), codec)
+                    with open_compressed(path, 'wb', dictionary=zdict) as f:
+                        f.write(document)
+                    with open_compressed(path, 'rb', dictionary=zdict) as f:
+                        assert f.read() == document
+                    total += os.path.getsize(path)
+                sizes[name] = total
+            assert sizes['dict'] * 2 < sizes['plain']
+
+            with pytest.raises(ValueError):
+                open_compressed(compressed_path(os.path.join(temp_dir, 'dict0.md'), 'zlib'), 'rb')
+
+
+class TestConverterCompression:
+    """Тесты сжатого вывода DocumentConverter"""
+
+    @pytest.mark.parametrize("low_memory", [False, True])
+    def test_convert_to_gzip(self, low_memory):
+        """Тест что .md.gz пишется сжатым и совпадает с несжатым результатом"""
+        data = TEXT.encode('utf-8')
+        converter = DocumentConverter({'backend': 'text', 'low_memory': low_memory})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            plain = os.path.join(temp_dir, 'out.md')
+            packed = os.path.join(temp_dir, 'out.md.gz')
+            assert converter.convert(io.BytesIO(data), plain, filename='a.txt')
+            assert converter.convert(io.BytesIO(data), packed, filename='a.txt')
+            with open(packed, 'rb') as f:
+                assert f.read(2) == b'\x1f\x8b'
+            with open_compressed(packed, 'rt') as f, open(plain, encoding='utf-8') as g:
+                assert f.read() == g.read()
+            assert sorted(os.listdir(temp_dir)) == ['out.md', 'out.md.gz']
+
+    def test_dictionary_output(self):
+        """Тест вывода со словарем и игнорирования словаря для gzip"""
+        dictionary = train_dictionary(small_documents(20), codec='zlib')
+        converter = DocumentConverter({'backend': 'text', 'compression_dictionary': dictionary})
+        data = small_documents(1)[0]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ('out.md.zz', 'out.md.gz'):
+                path = os.path.join(temp_dir, name)
+                assert converter.convert(io.BytesIO(data), path, filename='a.txt')
+                with open_compressed(path, 'rb', dictionary=dictionary if name.endswith('.zz') else None) as f:
+                    assert f.read().decode('utf-8').startswith('# Акт проверки № 0')
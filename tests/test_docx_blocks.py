@@ -0,0 +1,175 @@
+"""
+Тесты для поблочной повторной конвертации DOCX
+"""
+
+import io
+import os
+import copy
+import tempfile
+
+import pytest
+
+docx = pytest.importorskip("docx")
+
+from doc_converter.converter import DocumentConverter
+from doc_converter.docx_blocks import convert_docx, iter_docx_markdown, load_block_cache
+
+
+def make_document() -> io.BytesIO:
+    """Создает исходный документ: заголовки, абзацы, список и таблица"""
+    document = docx.Document()
+    document.add_heading("Отчет", level=1)
+    for i in range(20):
+        paragraph = document.add_paragraph(f"Абзац {i} с обычным текстом. ")
+        paragraph.add_run("Жирный").bold = True
+        paragraph.add_run(" и ")
+        paragraph.add_run("курсив").italic = True
+    document.add_heading("Раздел", level=2)
+    document.add_paragraph("Первый пункт", style="List Bullet")
+    document.add_paragraph("Второй пункт", style="List Bullet")
+    table = document.add_table(rows=3, cols=2)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"ячейка {r}:{c}"
+    document.add_paragraph("Заключение")
+    return save(document)
+
+
+def save(document) -> io.BytesIO:
+    buffer = io.BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def edit(source: io.BytesIO, action) -> io.BytesIO:
+    """Применяет правку к копии документа"""
+    source.seek(0)
+    document = docx.Document(source)
+    action(document)
+    return save(document)
+
+
+def fix_typo(document):
+    document.paragraphs[5].runs[0].text = "Абзац 4 с исправленным текстом. "
+
+
+def insert_paragraph(document):
+    document.paragraphs[10].insert_paragraph_before("Новый абзац")
+
+
+def delete_paragraph(document):
+    element = document.paragraphs[7]._element
+    element.getparent().remove(element)
+
+
+def edit_table(document):
+    document.tables[0].cell(1, 1).text = "новое значение"
+
+
+def move_paragraph(document):
+    body = document.element.body
+    element = document.paragraphs[3]._element
+    body.remove(element)
+    document.paragraphs[15]._element.addnext(element)
+
+
+def duplicate_table(document):
+    document.paragraphs[-1]._element.addnext(copy.deepcopy(document.tables[0]._element))
+
+
+def restyle_heading(document):
+    document.paragraphs[2].style = document.styles["Heading 2"]
+
+
+EDITS = [fix_typo, insert_paragraph, delete_paragraph, edit_table,
+         move_paragraph, duplicate_table, restyle_heading]
+
+
+class TestIncrementalConversion:
+    """Тесты что повторная конвертация совпадает с полной"""
+
+    @pytest.mark.parametrize("action", EDITS, ids=lambda a: a.__name__)
+    def test_matches_full_conversion(self, action):
+        """Тест совпадения результата с полной конвертацией после правки"""
+        original = make_document()
+        _, cache, _ = convert_docx(original)
+        edited = edit(original, action)
+
+        full, _, full_stats = convert_docx(edited)
+        edited.seek(0)
+        incremental, _, stats = convert_docx(edited, cache)
+
+        assert incremental == full
+        assert full_stats["reused"] == 0
+        assert stats["reused"] > stats["rendered"]
+
+    def test_rendering(self):
+        """Тест рендеринга заголовков, начертания, списков и таблиц"""
+        markdown, _, _ = convert_docx(make_document())
+        assert markdown.startswith("# Отчет\n\n")
+        assert "Абзац 0 с обычным текстом. **Жирный** и *курсив*" in markdown
+        assert "## Раздел\n\n- Первый пункт\n\n- Второй пункт" in markdown
+        assert "| ячейка 0:0 | ячейка 0:1 |\n| --- | --- |\n| ячейка 1:0 | ячейка 1:1 |" in markdown
+
+    def test_unchanged_document_is_fully_reused(self):
+        """Тест что неизмененный документ не рендерится повторно"""
+        source = make_document()
+        _, cache, _ = convert_docx(source)
+        source.seek(0)
+        _, _, stats = convert_docx(source, cache)
+        assert stats["rendered"] == 0
+
+    def test_streaming_matches_full_conversion(self):
+        """Тест что поблочные фрагменты склеиваются в результат convert_docx"""
+        markdown, _, _ = convert_docx(make_document())
+        assert "".join(iter_docx_markdown(make_document())) == markdown
+
+
+class TestConverterBlockCache:
+    """Тесты карты отпечатков блоков в DocumentConverter"""
+
+    def test_cache_for_output(self, block_cache_home):
+        """Тест что карта результата хранится в кэше, а не рядом с ним, и используется повторно"""
+        converter = DocumentConverter()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = os.path.join(temp_dir, "report.docx")
+            output_path = os.path.join(temp_dir, "report.md")
+            original = make_document()
+            with open(input_path, "wb") as f:
+                f.write(original.getvalue())
+            assert converter.convert(input_path, output_path) is True
+            assert sorted(os.listdir(temp_dir)) == ["report.docx", "report.md"]
+            cache_files = list((block_cache_home / "doc-converter" / "blocks").iterdir())
+            assert len(cache_files) == 1
+            assert load_block_cache(cache_files[0]) is not None
+
+            with open(input_path, "wb") as f:
+                f.write(edit(original, fix_typo).getvalue())
+            assert converter.convert(input_path, output_path) is True
+
+            with open(output_path, encoding="utf-8") as f:
+                assert "Абзац 4 с исправленным текстом." in f.read()
+
+    def test_cache_dir_for_strings(self):
+        """Тест кэша по содержимому документа при конвертации в строку"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            converter = DocumentConverter(config={"block_cache_dir": temp_dir})
+            content = converter.convert_to_string(make_document().getvalue(), filename="a.docx")
+            assert content.startswith("# Отчет")
+            assert len(os.listdir(temp_dir)) == 1
+
+            # Другой документ с тем же именем получает свою карту
+            edited = edit(make_document(), fix_typo).getvalue()
+            assert converter.convert_to_string(edited, filename="a.docx")
+            assert len(os.listdir(temp_dir)) == 2
+
+    def test_output_cache_in_cache_dir(self):
+        """Тест что при конвертации в файл карта лежит в block_cache_dir"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, "blocks")
+            converter = DocumentConverter(config={"block_cache_dir": cache_dir})
+            output_path = os.path.join(temp_dir, "out", "report.md")
+            assert converter.convert(make_document().getvalue(), output_path, filename="report.docx") is True
+            assert os.listdir(os.path.dirname(output_path)) == ["report.md"]
+            assert len(os.listdir(cache_dir)) == 1
@@ -0,0 +1,137 @@
+"""
+Тесты для осмотра документов и оценки стоимости конвертации
+"""
+
+import io
+import os
+import zipfile
+import tempfile
+
+import pytest
+
+from doc_converter.converter import DocumentConverter
+from doc_converter.inspection import SCANNED_PAGE_COST, estimate_cost, inspect_document
+from doc_converter.utils import get_file_info
+
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+APP = 'xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"'
+
+
+def make_docx(paragraphs=3, tables=1, images=2) -> io.BytesIO:
+    """Собирает минимальный DOCX: абзацы, таблица с абзацем в ячейке и изображения"""
+    body = ''.join(f'<w:p><w:pPr/><w:r><w:t>Абзац {i}</w:t></w:r></w:p>' for i in range(paragraphs))
+    body += '<w:tbl><w:tblPr/><w:tr><w:tc><w:p/></w:tc></w:tr></w:tbl>' * tables
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('word/document.xml', f'<w:document {W}><w:body>{body}</w:body></w:document>')
+        archive.writestr('docProps/app.xml', f'<Properties {APP}><Pages>2</Pages><Words>40</Words></Properties>')
+        for i in range(images):
+            archive.writestr(f'word/media/image{i}.png', b'\x89PNG' + b'\0' * 96)
+    buffer.seek(0)
+    return buffer
+
+
+def make_pdf(pages: int, scanned: bool) -> bytes:
+    """Собирает PDF, где каждая страница содержит шрифт или только изображение"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>']
+    kids = ' '.join(f'{4 + i} 0 R' for i in range(pages))
+    objects.append(f'<< /Type /Pages /Kids [{kids}] /Count {pages} >>')
+    objects.append('<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /BitsPerComponent 8 '
+                   '/ColorSpace /DeviceGray /Length 1 >>\nstream\n\0\nendstream')
+    resources = '/XObject << /Im0 3 0 R >>' if scanned else '/Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >>'
+    for _ in range(pages):
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << {resources} >> >>')
+
+    output = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('ascii')
+    output += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('ascii')
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('ascii')
+    return output
+
+
+class TestInspectDocument:
+    """Тесты функции inspect_document"""
+
+    def test_docx(self):
+        """Тест подсчета абзацев, таблиц и изображений DOCX"""
+        info = inspect_document(make_docx(), 'report.docx')
+        assert info['paragraphs'] == 4  # три абзаца и абзац в ячейке
+        assert info['tables'] == 1
+        assert (info['images'], info['images_size']) == (2, 200)
+        assert (info['pages'], info['words']) == (2, 40)
+
+    def test_docx_large_buffer_boundaries(self, monkeypatch):
+        """Тест что разметка на границе блоков чтения считается один раз"""
+        monkeypatch.setattr('doc_converter.inspection._SCAN_BUFFER', 7)
+        info = inspect_document(make_docx(paragraphs=50, tables=3), 'report.docx')
+        assert (info['paragraphs'], info['tables']) == (53, 3)
+
+    def test_pdf_text_and_scanned(self):
+        """Тест определения текстового слоя и сканов PDF"""
+        pytest.importorskip("PyPDF2")
+        text = inspect_document(io.BytesIO(make_pdf(3, scanned=False)), 'text.pdf')
+        assert (text['pages'], text['text_pages'], text['scanned']) == (3, 3, False)
+
+        scanned = inspect_document(io.BytesIO(make_pdf(2, scanned=True)), 'scan.pdf')
+        assert (scanned['pages'], scanned['scanned_pages'], scanned['scanned']) == (2, 2, True)
+        # Общее изображение считается один раз
+        assert scanned['images'] == 1
+
+    def test_broken_file(self):
+        """Тест что поврежденный файл не ломает осмотр"""
+        info = inspect_document(io.BytesIO(b'not a zip'), 'broken.docx')
+        assert info['error'] and info['size'] == 9
+
+    def test_stream_position_restored(self):
+        """Тест что позиция потока восстанавливается"""
+        stream = make_docx()
+        inspect_document(stream, 'report.docx')
+        assert stream.tell() == 0
+
+
+class TestEstimateCost:
+    """Тесты оценки стоимости"""
+
+    def test_scanned_pages_cost_more(self):
+        """Тест что сканы дороже страниц с текстом"""
+        text = estimate_cost({'pages': 10, 'size': 1000})
+        scanned = estimate_cost({'pages': 10, 'size': 1000, 'scanned_pages': 10})
+        assert text['units'] == 10
+        assert scanned['units'] == 10 * SCANNED_PAGE_COST
+        assert text['seconds'] is None
+
+    def test_seconds_from_throughput(self):
+        """Тест оценки времени по скорости бэкенда"""
+        assert estimate_cost({'pages': 1, 'size': 2000}, throughput=1000)['seconds'] == 2.0
+
+    def test_pages_from_paragraphs(self):
+        """Тест оценки страниц DOCX без app.xml"""
+        assert estimate_cost({'pages': None, 'paragraphs': 31, 'size': 10})['pages'] == 3
+
+
+class TestConverterInspect:
+    """Тесты DocumentConverter.inspect"""
+
+    def test_inspect(self):
+        """Тест выбора бэкенда и оценки стоимости"""
+        info = DocumentConverter().inspect(make_docx().getvalue(), filename='report.docx')
+        assert info['supported'] is True
+        assert info['backend'] == 'docx'
+        assert info['cost']['units'] > 0 and info['cost']['seconds'] > 0
+
+    def test_file_info(self):
+        """Тест информации о файле"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'a.txt')
+            with open(path, 'wb') as f:
+                f.write(b'abc')
+            info = get_file_info(path)
+            assert (info['size'], info['is_file'], info['is_dir']) == (3, True, False)
+            assert get_file_info(temp_dir)['is_dir'] is True
+            assert get_file_info(os.path.join(temp_dir, 'missing')) == {"error": "Файл не найден"}
@@ -0,0 +1,161 @@
+"""
+Тесты для конвертации по страницам с ограничением памяти
+"""
+
+import io
+import os
+import tempfile
+import tracemalloc
+
+import pytest
+
+from doc_converter.backends import ConverterBackend
+from doc_converter.converter import DocumentConverter
+
+
+SAMPLE_TEXT = (
+    "\r\n  \n"
+    + "".join(
+        f"Строка {i} документа\r\n" + ("\n" * (i % 5)) + ("  \n" if i % 7 == 0 else "")
+        for i in range(300)
+    )
+    + "\n\n\n   \n"
+)
+
+
+def make_text_pdf(pages: int) -> bytes:
+    """Собирает PDF, где на каждой странице есть строка текста"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>']
+    kids = ' '.join(f'{4 + 2 * i} 0 R' for i in range(pages))
+    objects.append(f'<< /Type /Pages /Kids [{kids}] /Count {pages} >>')
+    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    for i in range(pages):
+        content = f'BT /F1 12 Tf 72 720 Td (Page {i + 1} text) Tj ET'
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>')
+        objects.append(f'<< /Length {len(content)} >>\nstream\n{content}\nendstream')
+
+    output = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('ascii')
+    output += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('ascii')
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('ascii')
+    return output
+
+
+class WholeDocumentBackend(ConverterBackend):
+    """Бэкенд без возможности streaming"""
+
+    name = 'whole'
+    formats = {'.txt': 1.0}
+
+    def convert(self, input_file, block_cache_path=None):
+        return "целиком\n"
+
+
+class BrokenPagesBackend(ConverterBackend):
+    """Бэкенд, падающий после первой страницы"""
+
+    name = 'broken'
+    formats = {'.txt': 1.0}
+    capabilities = frozenset({'streaming'})
+
+    def convert(self, input_file, block_cache_path=None):
+        return "целиком\n"
+
+    def iter_pages(self, input_file, segment_size):
+        yield "первая страница", 1
+        raise ValueError("поврежденная страница")
+
+
+def low_memory(**config) -> DocumentConverter:
+    """Конвертер в режиме low_memory"""
+    return DocumentConverter({'low_memory': True, **config})
+
+
+class TestStreamingBackends:
+    """Тесты совпадения результата по страницам с конвертацией целиком"""
+
+    @pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "cp1251"])
+    def test_text_matches_whole(self, encoding, monkeypatch):
+        """Тест текста на мелких частях: пустые строки, \\r\\n и пробелы на границах"""
+        monkeypatch.setattr('doc_converter.converter.MIN_SEGMENT_SIZE', 7)
+        data = SAMPLE_TEXT.encode(encoding)
+        whole = DocumentConverter({'backend': 'text'}).convert_to_string(data, filename='a.txt')
+        pages = low_memory(backend='text', memory_budget=1).convert_to_string(data, filename='a.txt')
+        assert pages == whole
+
+    def test_rtf_matches_whole(self, monkeypatch):
+        """Тест RTF по частям"""
+        monkeypatch.setattr('doc_converter.converter.MIN_SEGMENT_SIZE', 5)
+        data = b'{\\rtf1\\ansi {\\b Bold} text\\par\n\n\n\n second line\\par\n}'
+        whole = DocumentConverter({'backend': 'text'}).convert_to_string(data, filename='a.rtf')
+        pages = low_memory(backend='text', memory_budget=1).convert_to_string(data, filename='a.rtf')
+        assert pages == whole
+
+    def test_pdf_pages(self):
+        """Тест PDF по страницам с номерами страниц в секциях"""
+        pytest.importorskip("PyPDF2")
+        data = make_text_pdf(3)
+        whole = DocumentConverter({'backend': 'pypdf'}).convert_to_string(data, filename='a.pdf')
+        pages = low_memory(backend='pypdf').convert_to_string(data, filename='a.pdf')
+        assert pages == whole and 'Page 3 text' in pages
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'a.pdf')
+            with open(path, 'wb') as f:
+                f.write(data)
+            chunks = list(low_memory(backend='pypdf').iter_chunks(path, max_chars=12))
+        assert chunks[0]['page_start'] == 1
+        assert chunks[-1]['page_end'] == 3
+
+    def test_fallback_without_streaming_backend(self):
+        """Тест что без бэкенда с streaming документ конвертируется целиком"""
+        converter = DocumentConverter({'low_memory': True}, backends=[WholeDocumentBackend()])
+        assert converter.convert_to_string(b'abc', filename='a.txt') == "целиком\n"
+
+
+class TestLowMemoryConvert:
+    """Тесты DocumentConverter в режиме low_memory"""
+
+    def test_auto_mode(self):
+        """Тест что 'auto' включается для входов больше четверти бюджета"""
+        converter = DocumentConverter({'low_memory': 'auto', 'memory_budget': 400})
+        assert converter.is_low_memory(io.BytesIO(b'x' * 100), 'a.txt') is False
+        assert converter.is_low_memory(io.BytesIO(b'x' * 101), 'a.txt') is True
+        assert DocumentConverter().is_low_memory(io.BytesIO(b'x' * 10 ** 6), 'a.txt') is False
+
+    def test_huge_document_under_memory_limit(self):
+        """Тест конвертации документа в 8 раз больше бюджета памяти"""
+        budget = 4 * 1024 * 1024
+        line = ("Раздел руководства по эксплуатации оборудования, пункт 1. " * 2).strip().encode('utf-8')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = os.path.join(temp_dir, 'manual.txt')
+            output_path = os.path.join(temp_dir, 'manual.md')
+            with open(input_path, 'wb') as f:
+                for _ in range(8 * budget // (len(line) + 1)):
+                    f.write(line + b"\n")
+
+            converter = DocumentConverter({'low_memory': 'auto', 'memory_budget': budget, 'backend': 'text'})
+            tracemalloc.start()
+            try:
+                assert converter.convert(input_path, output_path)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            assert peak < budget
+            assert os.path.getsize(output_path) == os.path.getsize(input_path)
+            assert sorted(os.listdir(temp_dir)) == ['manual.md', 'manual.txt']
+
+    def test_error_after_first_page(self):
+        """Тест что ошибка посреди документа не оставляет частичный результат"""
+        converter = DocumentConverter({'low_memory': True}, backends=[BrokenPagesBackend()])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, 'out.md')
+            assert converter.convert(io.BytesIO(b'abc'), output_path, filename='a.txt') is False
+            assert os.listdir(temp_dir) == []
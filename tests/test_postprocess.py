@@ -0,0 +1,139 @@
+"""
+Тесты для потоковой постобработки markdown
+"""
+
+import os
+import random
+import tempfile
+
+import pytest
+
+from doc_converter.converter import DocumentConverter
+from doc_converter.postprocess import (
+    LinkTransform,
+    PostProcessor,
+    TableTransform,
+    build_postprocessor,
+)
+
+
+SAMPLE = (
+    "\n\n#  Отчет  \n\n\n\n### Раздел ##\nтекст   \n"
+    "| a | b |\n|:--|--:|\n| 1 | 22 |\n\n"
+    "```\n#### код   \n\n\n\n| x |\n```\n"
+    "[ссылка](img/a.png) [внешняя](http://example.com) [якорь](#top)\n## C#\n\n\n"
+)
+
+
+class TestPostProcessor:
+    """Тесты для класса PostProcessor"""
+
+    def test_default_transforms(self):
+        """Тест нормализации пробелов и уровней заголовков"""
+        result = build_postprocessor().process_text(SAMPLE)
+        lines = result.split('\n')
+        assert lines[0] == '# Отчет'
+        assert lines[2] == '## Раздел'
+        assert 'текст' in lines
+        assert '## C#' in lines
+        assert result.endswith('## C#\n')
+        assert '\n\n\n' not in result.split('```')[0]
+
+    def test_hard_line_breaks(self):
+        """Тест что ровно два пробела в конце строки (жесткий перенос) сохраняются"""
+        text = "строка  \nтри   \nnbsp\u00a0\u00a0\nтаб\t\n  \n# Заголовок  \nконец\n"
+        processor = build_postprocessor({'fix_headings': False})
+        assert processor.process_text(text) == "строка  \nтри\nnbsp  \nтаб\n\n# Заголовок\nконец\n"
+
+    def test_fenced_code_untouched(self):
+        """Тест что содержимое блоков кода не меняется"""
+        result = build_postprocessor({'table_format': 'grid'}).process_text(SAMPLE)
+        assert "```\n#### код   \n\n\n\n| x |\n```" in result
+
+    def test_chunk_boundaries(self):
+        """Тест что результат не зависит от разбиения на фрагменты"""
+        options = {'table_format': 'grid', 'link_base': 'https://cdn.example.com/docs/'}
+        expected = build_postprocessor(options).process_text(SAMPLE)
+        rng = random.Random(1)
+        for _ in range(20):
+            cuts = sorted(rng.sample(range(1, len(SAMPLE)), 10))
+            pieces = [SAMPLE[i:j] for i, j in zip([0] + cuts, cuts + [len(SAMPLE)])]
+            assert ''.join(build_postprocessor(options).process(pieces)) == expected
+
+    def test_timings(self):
+        """Тест учета времени каждого преобразования"""
+        processor = build_postprocessor({'table_format': 'pipe', 'link_map': {'a': 'b'}})
+        processor.process_text(SAMPLE)
+        assert list(processor.timings) == ['whitespace', 'headings', 'tables', 'links']
+        assert all(seconds >= 0 for seconds in processor.timings.values())
+
+    def test_disabled(self):
+        """Тест отключения всех преобразований"""
+        assert build_postprocessor({'normalize_whitespace': False, 'fix_headings': False}) is None
+
+
+class TestTableTransform:
+    """Тесты перерисовки таблиц"""
+
+    TABLE = "| a | b |\n|:--|--:|\n| 1 | 22 |\n"
+
+    def render(self, table_format):
+        return PostProcessor([TableTransform(table_format)]).process_text(self.TABLE)
+
+    def test_pipe(self):
+        """Тест выравнивания pipe-таблицы с сохранением выравнивания колонок"""
+        assert self.render('pipe') == "| a   | b   |\n| :-- | --: |\n| 1   | 22  |\n"
+
+    def test_grid(self):
+        """Тест grid-таблицы"""
+        assert self.render('grid') == (
+            "+-----+-----+\n| a   | b   |\n+=====+=====+\n| 1   | 22  |\n+-----+-----+\n"
+        )
+
+    def test_simple(self):
+        """Тест simple-таблицы"""
+        assert self.render('simple') == "a    b\n---  ---\n1    22\n"
+
+    def test_not_a_table(self):
+        """Тест что строки с | без разделителя остаются как есть"""
+        text = "| просто строка\nтекст\n"
+        assert PostProcessor([TableTransform('grid')]).process_text(text) == text
+
+    def test_unknown_format(self):
+        """Тест неизвестного формата таблиц"""
+        with pytest.raises(ValueError):
+            TableTransform('html')
+
+
+class TestLinkTransform:
+    """Тесты переписывания ссылок"""
+
+    def test_base_and_mapping(self):
+        """Тест базового адреса и замены по словарю"""
+        processor = PostProcessor([LinkTransform('https://cdn/x/', {'old.md': 'new.md'})])
+        result = processor.process_text(
+            '![img](a.png "title") [l](old.md) [e](mailto:a@b.c) [t](#top)'
+        )
+        assert result == '![img](https://cdn/x/a.png "title") [l](new.md) [e](mailto:a@b.c) [t](#top)\n'
+
+
+class TestConverterPostprocess:
+    """Тесты постобработки в DocumentConverter"""
+
+    def test_per_call_options(self):
+        """Тест опций постобработки для отдельного вызова"""
+        converter = DocumentConverter({'backend': 'text'})
+        source = "| a | b |\n|---|---|\n| 1 | 2 |\n".encode('utf-8')
+        result = converter.convert_to_string(source, filename='t.txt', postprocess={'table_format': 'grid'})
+        assert result.startswith('+-----+-----+\n')
+
+    def test_chunks_are_postprocessed(self):
+        """Тест что секции строятся по обработанному markdown"""
+        converter = DocumentConverter({'backend': 'text'})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'doc.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('# Глава\n\n\n\n### Часть\nтекст   \n')
+            chunks = list(converter.iter_chunks(path))
+        assert chunks[-1]['heading_path'] == ['Глава', 'Часть']
+        assert chunks[-1]['text'] == '## Часть\nтекст\n'
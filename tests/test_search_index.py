@@ -0,0 +1,81 @@
+"""
+Тесты для полнотекстового индекса
+"""
+
+import os
+import tempfile
+
+from doc_converter.converter import DocumentConverter
+from doc_converter.search_index import SearchIndex, build_match_query
+
+
+class TestSearchIndex:
+    """Тесты для класса SearchIndex"""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом"""
+        self.index = SearchIndex(':memory:')
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        self.index.close()
+
+    def test_search_ranked_snippets(self):
+        """Тест поиска с фрагментами и ранжированием"""
+        self.index.add_document('a', 'a.md', '# Отчет\n\nГодовой отчет о продажах. Продажи выросли.')
+        self.index.add_document('b', 'b.md', '# Заметки\n\nКоротко о продажах.')
+        self.index.add_document('c', 'c.md', '# Прочее\n\nНичего интересного.')
+
+        results = self.index.search('продажи')
+        assert [r['key'] for r in results] == ['a']
+        assert '**Продажи**' in results[0]['snippet']
+
+        results = self.index.search('продаж*')
+        assert {r['key'] for r in results} == {'a', 'b'}
+
+    def test_reindex_replaces_document(self):
+        """Тест замены документа при повторной индексации"""
+        self.index.add_document('a', 'a.md', 'старый текст')
+        self.index.add_document('a', 'a.md', 'новый текст')
+
+        assert self.index.count() == 1
+        assert self.index.search('старый') == []
+        assert len(self.index.search('новый')) == 1
+
+    def test_remove_document(self):
+        """Тест удаления документа"""
+        self.index.add_document('a', 'a.md', 'текст')
+        assert self.index.remove_document('a') is True
+        assert self.index.remove_document('a') is False
+        assert self.index.search('текст') == []
+
+    def test_query_with_special_characters(self):
+        """Тест что служебные символы FTS5 не ломают запрос"""
+        self.index.add_document('a', 'a.md', 'AND OR NOT (скобки) "кавычки"')
+        assert self.index.search('"') == []
+        assert len(self.index.search('(скобки) OR')) == 1
+
+    def test_build_match_query(self):
+        """Тест построения выражения MATCH"""
+        assert build_match_query('foo bar*') == '"foo" "bar"*'
+        assert build_match_query('  ') == ''
+
+
+class TestConverterIndexing:
+    """Тесты индексации из DocumentConverter"""
+
+    def test_convert_adds_to_index(self):
+        """Тест пополнения индекса после конвертации"""
+        index = SearchIndex(':memory:')
+        converter = DocumentConverter(search_index=index)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_file = os.path.join(temp_dir, 'test.txt')
+            with open(input_file, 'w') as f:
+                f.write('Test content')
+
+            assert converter.convert(input_file, os.path.join(temp_dir, 'out.md')) is True
+
+        results = index.search('конвертированный')
+        assert len(results) == 1
+        assert results[0]['title'] == 'test.txt'
+        index.close()
@@ -0,0 +1,223 @@
+"""
+Тесты для поиска почти одинаковых документов
+"""
+
+import os
+import random
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from doc_converter import converter as converter_module
+from doc_converter import similarity
+from doc_converter.converter import DocumentConverter
+from doc_converter.similarity import (
+    MinHasher,
+    NearDuplicateIndex,
+    choose_bands,
+    extract_text,
+    shingle_hashes,
+)
+
+
+def make_text(seed: int, words: int = 2000) -> list:
+    """Генерирует случайный текст из словаря"""
+    rng = random.Random(seed)
+    return [f"слово{rng.randint(0, 5000)}" for _ in range(words)]
+
+
+class TestMinHash:
+    """Тесты MinHash сигнатур"""
+
+    def test_numpy_and_pure_python_match(self, monkeypatch):
+        """Тест что сигнатура не зависит от наличия numpy"""
+        hashes = shingle_hashes(" ".join(make_text(1, 300)))
+        expected = MinHasher(num_perm=32).signature(hashes)
+        monkeypatch.setattr(similarity, "np", None)
+        assert MinHasher(num_perm=32).signature(hashes) == expected
+
+    def test_empty_text(self):
+        """Тест сигнатуры пустого текста"""
+        assert MinHasher().text_signature("   ") is None
+
+
+class TestNearDuplicateIndex:
+    """Тесты для класса NearDuplicateIndex"""
+
+    def setup_method(self):
+        """Настройка перед каждым тестом"""
+        self.index = NearDuplicateIndex(threshold=0.8)
+        self.original = make_text(1)
+        revised = list(self.original)
+        revised[10:13] = ["правка", "в", "тексте"]
+        self.revised = revised
+        self.other = make_text(2)
+
+    def test_detects_revision(self):
+        """Тест обнаружения исправленной копии"""
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        self.index.add("other", self.index.signature(" ".join(self.other)))
+
+        matches = self.index.query(self.index.signature(" ".join(self.revised)))
+        assert [key for key, _ in matches] == ["v1"]
+        assert matches[0][1] >= 0.8
+
+    def test_clusters_and_remove(self):
+        """Тест кластеров и удаления документа"""
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        self.index.add("v2", self.index.signature(" ".join(self.revised)))
+        self.index.add("other", self.index.signature(" ".join(self.other)))
+
+        assert self.index.clusters() == [["v1", "v2"]]
+        assert self.index.remove("v1") is True
+        assert self.index.clusters() == []
+        assert len(self.index) == 2
+
+    def test_remove_keeps_rest_of_cluster(self):
+        """Тест что после удаления остальные документы кластера остаются вместе"""
+        revised_again = list(self.revised)
+        revised_again[40:42] = ["еще", "правка"]
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        self.index.add("v2", self.index.signature(" ".join(self.revised)))
+        self.index.add("v3", self.index.signature(" ".join(revised_again)))
+
+        assert self.index.clusters() == [["v1", "v2", "v3"]]
+        self.index.remove("v1")
+        assert self.index.clusters() == [["v2", "v3"]]
+
+    def test_readd_unchanged(self, monkeypatch):
+        """Тест что повторное добавление той же сигнатуры не перестраивает индекс"""
+        signature = self.index.signature(" ".join(self.original))
+        self.index.add("v1", signature)
+        self.index.add("v2", self.index.signature(" ".join(self.revised)))
+
+        monkeypatch.setattr(self.index, "remove", lambda key: pytest.fail("индекс перестраивается"))
+        matches = self.index.add("v1", signature)
+        assert [key for key, _ in matches] == ["v2"]
+        assert self.index.clusters() == [["v1", "v2"]]
+
+    def test_readd_changed(self):
+        """Тест что документ с новой сигнатурой уходит из старого кластера"""
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        self.index.add("v2", self.index.signature(" ".join(self.revised)))
+
+        assert self.index.add("v1", self.index.signature(" ".join(self.other))) == []
+        assert self.index.clusters() == []
+        assert len(self.index) == 2
+
+    def test_save_replaces_file(self):
+        """Тест что сохранение заменяет файл целиком и не оставляет временных"""
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "index.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("старое содержимое" * 1000)
+            self.index.save(path)
+
+            assert os.listdir(temp_dir) == ["index.json"]
+            assert "v1" in NearDuplicateIndex.load(path)
+
+    def test_save_and_load(self):
+        """Тест сохранения и загрузки индекса"""
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "index.json")
+            self.index.save(path)
+            loaded = NearDuplicateIndex.load(path)
+
+        assert "v1" in loaded
+        assert loaded.query(loaded.signature(" ".join(self.revised)))[0][0] == "v1"
+
+    def test_load_with_threshold(self):
+        """Тест смены порога при загрузке"""
+        self.index.add("v1", self.index.signature(" ".join(self.original)))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "index.json")
+            self.index.save(path)
+            loaded = NearDuplicateIndex.load(path, threshold=0.5)
+
+        assert loaded.threshold == 0.5
+        assert (loaded.bands, loaded.rows) == choose_bands(0.5, 128)
+        assert loaded.query(loaded.signature(" ".join(self.revised)))[0][0] == "v1"
+
+    def test_invalid_threshold(self):
+        """Тест некорректного порога"""
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(threshold=0)
+
+
+class TestExtractText:
+    """Тесты быстрого извлечения текста"""
+
+    def test_docx_text(self):
+        """Тест извлечения текста из DOCX без python-docx"""
+        document = (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            '<w:body><w:p><w:r><w:t>Привет</w:t></w:r></w:p>'
+            '<w:p><w:r><w:t>мир</w:t></w:r></w:p></w:body></w:document>'
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.docx"
+            with zipfile.ZipFile(path, "w") as archive:
+                archive.writestr("word/document.xml", document)
+            assert extract_text(path).split() == ["Привет", "мир"]
+
+    def test_broken_docx(self):
+        """Тест поврежденного DOCX"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "broken.docx"
+            path.write_bytes(b"not a zip")
+            assert extract_text(path) is None
+
+
+class TestConverterNearDuplicates:
+    """Тесты поиска почти одинаковых документов в DocumentConverter"""
+
+    def test_convert_registers_documents(self):
+        """Тест что конвертация пополняет индекс сходства"""
+        converter = DocumentConverter(near_duplicate_index=NearDuplicateIndex())
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = os.path.join(temp_dir, "v1.txt")
+            second = os.path.join(temp_dir, "v2.txt")
+            with open(first, "w", encoding="utf-8") as f:
+                f.write(" ".join(make_text(1)))
+            with open(second, "w", encoding="utf-8") as f:
+                f.write(" ".join(make_text(1)[:-5]))
+
+            assert converter.find_near_duplicates(second) == []
+            assert converter.convert(first, os.path.join(temp_dir, "v1.md")) is True
+
+            matches = converter.find_near_duplicates(second)
+            assert [key for key, _ in matches] == [str(Path(first).resolve())]
+
+    def test_text_extracted_once(self, monkeypatch):
+        """Тест что поиск и последующая конвертация файла извлекают текст один раз"""
+        calls = []
+
+        def counting_extract(path):
+            calls.append(path)
+            return extract_text(path)
+
+        monkeypatch.setattr(converter_module, "extract_text", counting_extract)
+        converter = DocumentConverter(near_duplicate_index=NearDuplicateIndex())
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "v1.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(" ".join(make_text(1)))
+
+            assert converter.find_near_duplicates(path) == []
+            assert converter.convert(path, os.path.join(temp_dir, "v1.md")) is True
+            assert len(calls) == 1
+            assert str(Path(path).resolve()) in converter.near_duplicate_index
+
+            # Измененный файл извлекается заново
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(" дописано")
+            converter.find_near_duplicates(path)
+            assert len(calls) == 2
+
+    def test_without_index(self):
+        """Тест что без индекса поиск ничего не возвращает"""
+        assert DocumentConverter().find_near_duplicates("missing.txt") == []